@@ -0,0 +1,831 @@
+# Standard library imports
+import asyncio
+import csv
+import multiprocessing
+import struct
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import repeat
+from typing import Awaitable, Callable, List
+from uuid import UUID
+
+# Third party imports
+import asyncpg
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from osgeo import ogr, osr
+
+with warnings.catch_warnings():
+    # The vectorized functions are only provided by the unstable module of h3 3.x
+    warnings.simplefilter("ignore")
+    from h3.unstable import vect as h3_vect
+
+# Local application imports
+from src.core.config import settings
+from src.core.profile import get_geoparquet_metadata, get_geoparquet_srs
+from src.schemas.layer import OgrDriverType
+
+# Flag set in the geometry type of an EWKB header if a SRID follows the type
+EWKB_SRID_FLAG = 0x20000000
+# WKB type codes of 2D geometries (Point to GeometryCollection)
+WKB_POINT = 1
+WKB_POLYGON = 3
+WKB_2D_TYPES = set(range(1, 8))
+# Size of a 2D point in EWKB with SRID
+EWKB_POINT_SIZE = 25
+# H3 cells stored with the features of the user data tables
+H3_COLUMNS = ["h3_3", "h3_group"]
+H3_GROUP_RESOLUTION = 8
+# Bits of the resolution 3 base cell and digits kept in the short form of a cell
+H3_3_SHORT_MASK = np.uint64(0x000FFFF000000000)
+H3_3_SHORT_SHIFT = np.uint64(36)
+
+
+def wkb_to_ewkb(wkb: bytes, srid: int = 4326) -> bytes:
+    """Add a SRID to the header of a 2D WKB geometry to make it a valid PostGIS EWKB."""
+
+    byte_order = "<" if wkb[0] == 1 else ">"
+    geom_type = struct.unpack(byte_order + "I", wkb[1:5])[0]
+    return (
+        wkb[0:1]
+        + struct.pack(byte_order + "II", geom_type | EWKB_SRID_FLAG, srid)
+        + wkb[5:]
+    )
+
+
+def ewkb_to_wkb(ewkb: bytes) -> bytes:
+    """Remove the SRID from the header of a 2D EWKB geometry."""
+
+    byte_order = "<" if ewkb[0] == 1 else ">"
+    geom_type = struct.unpack(byte_order + "I", ewkb[1:5])[0]
+    if not geom_type & EWKB_SRID_FLAG:
+        return ewkb
+    return (
+        ewkb[0:1]
+        + struct.pack(byte_order + "I", geom_type & ~EWKB_SRID_FLAG)
+        + ewkb[9:]
+    )
+
+
+def get_centroids(geometries: List[bytes | None]) -> tuple[np.ndarray, np.ndarray]:
+    """Get the centroids of EWKB geometries as arrays of longitudes and latitudes.
+
+    Little-endian points are decoded together from their fixed size EWKB. The
+    centroids of other geometries are computed by OGR. Missing and empty geometries
+    get NaN coordinates.
+    """
+
+    lng = np.full(len(geometries), np.nan)
+    lat = np.full(len(geometries), np.nan)
+    point_idx = []
+    for idx, geometry in enumerate(geometries):
+        if geometry is None:
+            continue
+        if len(geometry) == EWKB_POINT_SIZE and geometry[0] == 1:
+            point_idx.append(idx)
+            continue
+        centroid = ogr.CreateGeometryFromWkb(ewkb_to_wkb(geometry)).Centroid()
+        if not centroid.IsEmpty():
+            lng[idx], lat[idx] = centroid.GetX(), centroid.GetY()
+
+    if point_idx:
+        points = np.frombuffer(
+            b"".join(geometries[idx] for idx in point_idx),
+            dtype=np.dtype([("header", "V9"), ("x", "<f8"), ("y", "<f8")]),
+        )
+        lng[point_idx] = points["x"]
+        lat[point_idx] = points["y"]
+    return lng, lat
+
+
+def get_h3_cells(geometries: List[bytes | None]) -> tuple[list, list]:
+    """Get the h3_3 (short form) and h3_group cells of the centroids of EWKB geometries.
+
+    The cells match the ones set by the trigger `basic.set_user_data_h3`, which is
+    skipped for rows that already carry both cells.
+    """
+
+    lng, lat = get_centroids(geometries)
+    valid = np.isfinite(lng) & np.isfinite(lat)
+    cells_3 = np.zeros(len(geometries), dtype=np.uint64)
+    cells_group = np.zeros(len(geometries), dtype=np.uint64)
+    if valid.any():
+        cells_3[valid] = h3_vect.geo_to_h3(lat[valid], lng[valid], 3)
+        cells_group[valid] = h3_vect.geo_to_h3(
+            lat[valid], lng[valid], H3_GROUP_RESOLUTION
+        )
+    short_cells_3 = ((cells_3 & H3_3_SHORT_MASK) >> H3_3_SHORT_SHIFT).astype(np.int32)
+
+    valid = valid.tolist()
+    return (
+        [
+            cell if is_valid else None
+            for cell, is_valid in zip(short_cells_3.tolist(), valid)
+        ],
+        [
+            cell if is_valid else None
+            for cell, is_valid in zip(cells_group.tolist(), valid)
+        ],
+    )
+
+
+def add_h3_cells(records: List[tuple], geom_idx: int) -> List[tuple]:
+    """Append the h3_3 and h3_group cells of the geometry to the records."""
+
+    cells_3, cells_group = get_h3_cells([record[geom_idx] for record in records])
+    return [
+        record + (cell_3, cell_group)
+        for record, cell_3, cell_group in zip(records, cells_3, cells_group)
+    ]
+
+
+def split_table_name(table_name: str) -> tuple[str, str]:
+    """Split a fully qualified table name into schema and table name."""
+
+    schema_name, table_name = table_name.split(".")
+    return schema_name.strip('"'), table_name.strip('"')
+
+
+async def get_bulk_load_connection() -> asyncpg.Connection:
+    """Open a dedicated connection for binary COPY operations.
+
+    The geometry type is exchanged as EWKB in binary format on this connection. This
+    differs from the text codec registered for the connections of the session pool,
+    which is why bulk loads do not reuse pooled connections.
+    """
+
+    connection = await asyncpg.connect(
+        settings.POSTGRES_DATABASE_URI,
+        server_settings={"application_name": "GOAT Core bulk load"},
+    )
+    await connection.set_type_codec(
+        "geometry",
+        encoder=bytes,
+        decoder=bytes,
+        schema="public",
+        format="binary",
+    )
+    # H3 cells are sent as 64-bit integers
+    await connection.set_type_codec(
+        "h3index",
+        encoder=lambda cell: struct.pack("!Q", cell),
+        decoder=lambda data: struct.unpack("!Q", data)[0],
+        schema="public",
+        format="binary",
+    )
+    return connection
+
+
+def _read_integer(feature: ogr.Feature, idx: int):
+    return feature.GetFieldAsInteger(idx)
+
+
+def _read_bigint(feature: ogr.Feature, idx: int):
+    return feature.GetFieldAsInteger64(idx)
+
+
+def _read_float(feature: ogr.Feature, idx: int):
+    return feature.GetFieldAsDouble(idx)
+
+
+def _read_text(feature: ogr.Feature, idx: int):
+    return feature.GetFieldAsString(idx)
+
+
+def _read_date_as_text(feature: ogr.Feature, idx: int):
+    # Format dates in ISO format as PostgreSQL does when casting a date to text
+    year, month, day, *_ = feature.GetFieldAsDateTime(idx)
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def _read_time_as_text(feature: ogr.Feature, idx: int):
+    # Format times in ISO format as PostgreSQL does when casting a time to text
+    _, _, _, hour, minute, second, _ = feature.GetFieldAsDateTime(idx)
+    return f"{hour:02d}:{minute:02d}:{int(second):02d}"
+
+
+def _read_timestamp(feature: ogr.Feature, idx: int):
+    year, month, day, hour, minute, second, _ = feature.GetFieldAsDateTime(idx)
+    return datetime(
+        year,
+        month,
+        day,
+        hour,
+        minute,
+        int(second),
+        int(round((second % 1) * 1000000)) % 1000000,
+    )
+
+
+field_readers = {
+    "integer": _read_integer,
+    "bigint": _read_bigint,
+    "float": _read_float,
+    "text": _read_text,
+    "timestamp": _read_timestamp,
+}
+
+
+def get_field_reader(field_type_code: int, data_type: str):
+    """Get the function reading an OGR field into the Python type of the target column."""
+
+    if data_type == "text" and field_type_code == ogr.OFTDate:
+        return _read_date_as_text
+    if data_type == "text" and field_type_code == ogr.OFTTime:
+        return _read_time_as_text
+    return field_readers[data_type]
+
+
+def get_transform_to_4326(
+    source_srs: osr.SpatialReference | None,
+) -> osr.CoordinateTransformation | None:
+    """Get the transformation to EPSG:4326. None is returned if no transformation is required."""
+
+    target_srs = osr.SpatialReference()
+    target_srs.ImportFromEPSG(4326)
+    target_srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+    if source_srs is None or source_srs.IsSame(target_srs):
+        return None
+    source_srs = source_srs.Clone()
+    source_srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+    return osr.CoordinateTransformation(source_srs, target_srs)
+
+
+def convert_geometry(
+    geometry: ogr.Geometry,
+    transform: osr.CoordinateTransformation | None,
+    geometry_type: str,
+) -> bytes | None:
+    """Convert a geometry to a 2D EWKB in EPSG:4326. The geometry is modified in place."""
+
+    if geometry.IsEmpty():
+        return None
+    if transform is not None:
+        geometry.Transform(transform)
+    geometry.FlattenTo2D()
+    if geometry_type == "polygon":
+        geometry = ogr.ForceToMultiPolygon(geometry)
+    return wkb_to_ewkb(geometry.ExportToWkb(ogr.wkbNDR))
+
+
+def convert_wkb(
+    wkb: bytes,
+    transform: osr.CoordinateTransformation | None,
+    geometry_type: str,
+) -> bytes | None:
+    """Convert a WKB geometry to a 2D EWKB in EPSG:4326.
+
+    2D geometries that neither need to be transformed nor converted to a multipolygon
+    only get the SRID added to their header, which avoids parsing them.
+    """
+
+    if transform is None and len(wkb) >= 9:
+        byte_order = "<" if wkb[0] == 1 else ">"
+        wkb_type, cnt = struct.unpack(byte_order + "II", wkb[1:9])
+        if wkb_type in WKB_2D_TYPES and not (
+            geometry_type == "polygon" and wkb_type == WKB_POLYGON
+        ):
+            # All types but points start with the number of parts or points
+            if wkb_type != WKB_POINT and cnt == 0:
+                return None
+            return wkb_to_ewkb(wkb)
+    return convert_geometry(ogr.CreateGeometryFromWkb(wkb), transform, geometry_type)
+
+
+class OgrFeatureBatchReader:
+    """Read the features of an OGR layer in batches of records for a user data table.
+
+    The records follow the column order returned by `columns`: the mapped attribute
+    columns, the geometry in EWKB (EPSG:4326) if the layer has one and the layer_id.
+    Features with an empty or missing geometry are skipped, as they can't be stored in
+    the feature tables. If a FID range is passed, only the features of this chunk are
+    read (see `plan_feature_chunks`).
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        driver_name: str,
+        attribute_mapping: dict,
+        layer_id: UUID,
+        geometry_type: str | None,
+        batch_size: int = settings.IMPORT_BATCH_SIZE,
+        feature_range: dict | None = None,
+    ):
+        self.file_path = file_path
+        self.driver_name = driver_name
+        self.attribute_mapping = attribute_mapping
+        self.layer_id = layer_id
+        self.geometry_type = geometry_type
+        self.batch_size = batch_size
+        self.feature_range = feature_range
+        self.data_source = None
+        self.layer = None
+        self.transform = None
+        self.field_readers = []
+
+    @property
+    def columns(self) -> List[str]:
+        """Columns of the target table in the order of the records."""
+
+        columns = list(self.attribute_mapping.keys())
+        if self.geometry_type:
+            columns.append("geom")
+        columns.append("layer_id")
+        return columns
+
+    def open(self):
+        """Open the data source and prepare the field readers and the transformation."""
+
+        driver = ogr.GetDriverByName(self.driver_name)
+        self.data_source = driver.Open(self.file_path, 0)
+        if self.data_source is None:
+            raise ValueError("Could not open the file.")
+        self.layer = self.data_source.GetLayer(0)
+        layer_def = self.layer.GetLayerDefn()
+
+        # Restrict the reading to the features of the chunk
+        if self.feature_range is not None:
+            start, end = self.feature_range["start"], self.feature_range["end"]
+            fid_column = self.feature_range["fid_column"]
+            self.layer.SetAttributeFilter(
+                f'"{fid_column}" >= {start} AND "{fid_column}" < {end}'
+            )
+
+        # Map the field names as saved in the attribute mapping to the field index
+        field_index = {}
+        for i in range(layer_def.GetFieldCount()):
+            field_name = layer_def.GetFieldDefn(i).GetName().lower().replace("-", "_")
+            field_index.setdefault(field_name, i)
+
+        for column, field_name in self.attribute_mapping.items():
+            idx = field_index[field_name]
+            data_type = column.split("_")[0]
+            field_type_code = layer_def.GetFieldDefn(idx).GetType()
+            self.field_readers.append(
+                (idx, get_field_reader(field_type_code, data_type))
+            )
+
+        # Transform geometries to EPSG:4326 if required
+        if self.geometry_type:
+            self.transform = get_transform_to_4326(self.layer.GetSpatialRef())
+        return self
+
+    def close(self):
+        """Close the data source."""
+
+        self.layer = None
+        self.data_source = None
+
+    def convert_geometry(self, geometry: ogr.Geometry) -> bytes | None:
+        """Convert the geometry to a 2D EWKB in EPSG:4326."""
+
+        if geometry is None:
+            return None
+        return convert_geometry(geometry.Clone(), self.transform, self.geometry_type)
+
+    def read_batch(self) -> List[tuple]:
+        """Read the next batch of records. An empty list is returned once all features are read."""
+
+        records = []
+        layer_id = str(self.layer_id)
+        while len(records) < self.batch_size:
+            feature = self.layer.GetNextFeature()
+            if feature is None:
+                break
+
+            record = [
+                reader(feature, idx) if feature.IsFieldSetAndNotNull(idx) else None
+                for idx, reader in self.field_readers
+            ]
+            if self.geometry_type:
+                geometry = self.convert_geometry(feature.GetGeometryRef())
+                if geometry is None:
+                    continue
+                record.append(geometry)
+            record.append(layer_id)
+            records.append(tuple(record))
+        return records
+
+
+# Arrow types the attribute columns are cast to before they are copied
+arrow_column_types = {
+    "integer": pa.int32(),
+    "bigint": pa.int64(),
+    "float": pa.float64(),
+    "text": pa.string(),
+    "timestamp": pa.timestamp("us"),
+}
+
+
+class ArrowBatchReader:
+    """Read GeoParquet or FlatGeobuf files as Arrow record batches for a user data table.
+
+    GeoParquet files are read with pyarrow and FlatGeobuf files through the Arrow
+    stream of OGR. The attribute columns of a batch are cast and converted as whole
+    columns, so only the geometries are handled one by one. At most one batch of
+    `batch_size` rows is held in memory.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        driver_name: str,
+        attribute_mapping: dict,
+        layer_id: UUID,
+        geometry_type: str | None,
+        geometry_column: str | None = None,
+        batch_size: int = settings.IMPORT_BATCH_SIZE,
+    ):
+        self.file_path = file_path
+        self.driver_name = driver_name
+        self.attribute_mapping = attribute_mapping
+        self.layer_id = layer_id
+        self.geometry_type = geometry_type
+        self.geometry_column = geometry_column
+        self.batch_size = batch_size
+        self.data_source = None
+        self.stream = None
+        self.batches = None
+        self.column_names = []
+        self.transform = None
+
+    @property
+    def columns(self) -> List[str]:
+        """Columns of the target table in the order of the records."""
+
+        columns = list(self.attribute_mapping.keys())
+        if self.geometry_type:
+            columns.append("geom")
+        columns.append("layer_id")
+        return columns
+
+    def open(self):
+        """Open the file and map the fields to the columns of the target table."""
+
+        if self.driver_name == OgrDriverType.parquet.value:
+            parquet_file = pq.ParquetFile(self.file_path)
+            schema = parquet_file.schema_arrow
+            source_srs = None
+            if self.geometry_type:
+                source_srs = get_geoparquet_srs(get_geoparquet_metadata(parquet_file))
+        else:
+            driver = ogr.GetDriverByName(self.driver_name)
+            self.data_source = driver.Open(self.file_path, 0)
+            if self.data_source is None:
+                raise ValueError("Could not open the file.")
+            layer = self.data_source.GetLayer(0)
+            source_srs = layer.GetSpatialRef()
+            # The geometry is part of the stream as WKB column
+            self.geometry_column = layer.GetGeometryColumn() or "wkb_geometry"
+            self.stream = layer.GetArrowStreamAsPyArrow(
+                [f"MAX_FEATURES_IN_BATCH={self.batch_size}", "INCLUDE_FID=NO"]
+            )
+            schema = self.stream.schema
+
+        # Map the field names as saved in the attribute mapping to the column names
+        field_names = {}
+        for name in schema.names:
+            field_names.setdefault(name.lower().replace("-", "_"), name)
+        self.column_names = [
+            field_names[field_name] for field_name in self.attribute_mapping.values()
+        ]
+        if self.geometry_type:
+            self.transform = get_transform_to_4326(source_srs)
+
+        if self.stream is not None:
+            self.batches = iter(self.stream)
+        else:
+            columns = self.column_names + (
+                [self.geometry_column] if self.geometry_type else []
+            )
+            self.batches = parquet_file.iter_batches(
+                batch_size=self.batch_size, columns=columns
+            )
+        return self
+
+    def close(self):
+        """Close the file."""
+
+        self.batches = None
+        self.stream = None
+        self.data_source = None
+
+    def convert_batch(self, batch: pa.RecordBatch) -> List[tuple]:
+        """Convert a record batch into records of the target table."""
+
+        columns = [
+            batch.column(batch.schema.get_field_index(name))
+            .cast(arrow_column_types[column.split("_")[0]])
+            .to_pylist()
+            for name, column in zip(self.column_names, self.attribute_mapping.keys())
+        ]
+        layer_ids = repeat(str(self.layer_id), batch.num_rows)
+        if not self.geometry_type:
+            return list(zip(*columns, layer_ids))
+
+        geometries = [
+            convert_wkb(wkb, self.transform, self.geometry_type)
+            if wkb is not None
+            else None
+            for wkb in batch.column(
+                batch.schema.get_field_index(self.geometry_column)
+            ).to_pylist()
+        ]
+        # Skip rows with an empty or missing geometry
+        return [
+            record
+            for record in zip(*columns, geometries, layer_ids)
+            if record[-2] is not None
+        ]
+
+    def read_batch(self) -> List[tuple]:
+        """Read the next batch of records. An empty list is returned once all rows are read."""
+
+        for batch in self.batches:
+            records = self.convert_batch(batch)
+            # Continue if all rows of the batch were skipped
+            if records:
+                return records
+        return []
+
+
+def plan_feature_chunks(
+    file_path: str,
+    driver_name: str,
+    chunk_cnt: int,
+    min_feature_cnt: int = 0,
+    feature_cnt: int | None = None,
+) -> List[dict]:
+    """Split the features of a layer into chunks that can be loaded independently.
+
+    Layers with a FID column (e.g. GeoPackage) are split into FID ranges, which the
+    driver resolves through the primary key. Other layers (e.g. GeoJSON) can only skip
+    to a feature by reading all features before it, so each worker would parse the
+    whole file. An empty list is returned for them and for layers with less than
+    `min_feature_cnt` features, which are loaded by one reader.
+    The feature count is taken from the dataset profile if passed, as counting can
+    require a scan of the layer.
+    """
+
+    driver = ogr.GetDriverByName(driver_name)
+    data_source = driver.Open(file_path, 0)
+    if data_source is None:
+        raise ValueError("Could not open the file.")
+    layer = data_source.GetLayer(0)
+    if feature_cnt is None:
+        feature_cnt = layer.GetFeatureCount()
+    if feature_cnt < max(min_feature_cnt, 1) or chunk_cnt < 1:
+        return []
+
+    fid_column = layer.GetFIDColumn()
+    if not fid_column:
+        return []
+    result = data_source.ExecuteSQL(
+        f'SELECT MIN("{fid_column}"), MAX("{fid_column}") FROM "{layer.GetName()}"'
+    )
+    feature = result.GetNextFeature()
+    start, end = feature.GetFieldAsInteger64(0), feature.GetFieldAsInteger64(1) + 1
+    data_source.ReleaseResultSet(result)
+
+    chunk_size = -(-(end - start) // chunk_cnt)
+    return [
+        {
+            "fid_column": fid_column,
+            "start": chunk_start,
+            "end": min(chunk_start + chunk_size, end),
+        }
+        for chunk_start in range(start, end, chunk_size)
+    ]
+
+
+def _parse_integer(value: str):
+    return int(value)
+
+
+def _parse_float(value: str):
+    return float(value)
+
+
+def _parse_text(value: str):
+    return value
+
+
+csv_value_parsers = {
+    "integer": _parse_integer,
+    "bigint": _parse_integer,
+    "float": _parse_float,
+    "text": _parse_text,
+}
+
+
+class CsvBatchReader:
+    """Read the rows of a CSV file in batches of records for the no_geometry user table.
+
+    The column types have been inferred by profiling the file beforehand, so the values
+    are parsed directly into the Python type of the target column. Empty values are
+    read as NULL.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        attribute_mapping: dict,
+        layer_id: UUID,
+        batch_size: int = settings.IMPORT_BATCH_SIZE,
+    ):
+        self.file_path = file_path
+        self.attribute_mapping = attribute_mapping
+        self.layer_id = layer_id
+        self.batch_size = batch_size
+        self.file = None
+        self.reader = None
+        self.value_parsers = []
+
+    @property
+    def columns(self) -> List[str]:
+        """Columns of the target table in the order of the records."""
+
+        return list(self.attribute_mapping.keys()) + ["layer_id"]
+
+    def open(self):
+        """Open the file and map the header to the columns of the target table."""
+
+        self.file = open(self.file_path, "r", newline="", encoding="utf-8-sig")
+        self.reader = csv.reader(self.file)
+        header = next(self.reader)
+
+        # Map the field names as saved in the attribute mapping to the column index
+        field_index = {}
+        for i, field_name in enumerate(header):
+            field_index.setdefault(field_name.lower().replace("-", "_"), i)
+
+        for column, field_name in self.attribute_mapping.items():
+            data_type = column.split("_")[0]
+            self.value_parsers.append(
+                (field_index[field_name], csv_value_parsers[data_type])
+            )
+        return self
+
+    def close(self):
+        """Close the file."""
+
+        if self.file is not None:
+            self.file.close()
+        self.reader = None
+        self.file = None
+
+    def read_batch(self) -> List[tuple]:
+        """Read the next batch of records. An empty list is returned once all rows are read."""
+
+        records = []
+        layer_id = str(self.layer_id)
+        for row in self.reader:
+            # Skip blank lines
+            if not row:
+                continue
+            record = [
+                parse(row[idx]) if row[idx] != "" else None
+                for idx, parse in self.value_parsers
+            ]
+            record.append(layer_id)
+            records.append(tuple(record))
+            if len(records) >= self.batch_size:
+                break
+        return records
+
+
+async def copy_batches(
+    connection: asyncpg.Connection,
+    table_name: str,
+    columns: List[str],
+    read_batch: Callable[[], List[tuple]],
+    on_progress: Callable[[int, float], Awaitable[None]] | None = None,
+    progress_interval: float = 2.0,
+) -> dict:
+    """Stream batches into a table using binary COPY.
+
+    Batches are read in a worker thread so that reading and decoding the source does
+    not block the event loop. The progress callback receives the number of copied rows
+    and the elapsed seconds and is called at most every `progress_interval` seconds.
+    If `IMPORT_COMPUTE_H3` is enabled, the H3 cells of the geometries are computed per
+    batch, so the h3 trigger of the feature tables doesn't compute them row by row.
+    """
+
+    if settings.IMPORT_COMPUTE_H3 and "geom" in columns:
+        geom_idx = columns.index("geom")
+        columns = columns + H3_COLUMNS
+
+        def read_batch_with_h3() -> List[tuple]:
+            return add_h3_cells(read_batch(), geom_idx)
+
+    else:
+        read_batch_with_h3 = read_batch
+
+    schema_name, table_name = split_table_name(table_name)
+    row_cnt = 0
+    start = time.monotonic()
+    last_progress = start
+    while True:
+        records = await asyncio.to_thread(read_batch_with_h3)
+        if not records:
+            break
+        await connection.copy_records_to_table(
+            table_name,
+            schema_name=schema_name,
+            columns=columns,
+            records=records,
+        )
+        row_cnt += len(records)
+
+        now = time.monotonic()
+        if on_progress and now - last_progress >= progress_interval:
+            await on_progress(row_cnt, now - start)
+            last_progress = now
+
+    duration = time.monotonic() - start
+    return {
+        "row_cnt": row_cnt,
+        "duration": duration,
+        "rows_per_second": round(row_cnt / duration) if duration > 0 else row_cnt,
+    }
+
+
+def _copy_chunk(reader_kwargs: dict, table_name: str) -> dict:
+    """Load one chunk of features into the table. Runs in a worker process."""
+
+    async def copy_chunk():
+        reader = OgrFeatureBatchReader(**reader_kwargs)
+        connection = await get_bulk_load_connection()
+        try:
+            reader.open()
+            async with connection.transaction():
+                return await copy_batches(
+                    connection=connection,
+                    table_name=table_name,
+                    columns=reader.columns,
+                    read_batch=reader.read_batch,
+                )
+        finally:
+            reader.close()
+            await connection.close()
+
+    return asyncio.run(copy_chunk())
+
+
+async def copy_chunks_parallel(
+    reader_kwargs: dict,
+    chunks: List[dict],
+    table_name: str,
+    worker_cnt: int = settings.IMPORT_WORKER_CNT,
+    on_progress: Callable[[int, float], Awaitable[None]] | None = None,
+) -> dict:
+    """Load the chunks of a layer concurrently using a bounded process pool.
+
+    Each worker process reads its chunk and copies it over its own connection. The
+    chunks are committed independently, so the caller is responsible for removing the
+    rows of the layer if the load fails. The progress callback is called whenever a
+    chunk is finished.
+    """
+
+    loop = asyncio.get_running_loop()
+    row_cnt = 0
+    start = time.monotonic()
+    # Spawn the workers as forking would copy the event loop and open connections
+    pool = ProcessPoolExecutor(
+        max_workers=worker_cnt, mp_context=multiprocessing.get_context("spawn")
+    )
+    tasks = []
+    try:
+        tasks = [
+            loop.run_in_executor(
+                pool,
+                _copy_chunk,
+                {**reader_kwargs, "feature_range": chunk},
+                table_name,
+            )
+            for chunk in chunks
+        ]
+        for task in asyncio.as_completed(tasks):
+            result = await task
+            row_cnt += result["row_cnt"]
+            if on_progress:
+                await on_progress(row_cnt, time.monotonic() - start)
+    finally:
+        # Stop pending chunks if a chunk failed. Running chunks are awaited in a
+        # thread, so the event loop isn't blocked and no rows are written after the
+        # caller removed the rows of the layer.
+        for task in tasks:
+            task.cancel()
+        await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+
+    duration = time.monotonic() - start
+    return {
+        "row_cnt": row_cnt,
+        "duration": duration,
+        "rows_per_second": round(row_cnt / duration) if duration > 0 else row_cnt,
+        "worker_cnt": worker_cnt,
+    }
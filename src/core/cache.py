@@ -0,0 +1,163 @@
+# Standard library imports
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+TEMP_FILE_SUFFIX = ".tmp"
+
+
+class CacheStats:
+    """Hit and miss counters of a cache within the process."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def record_hit(self):
+        self.hits += 1
+
+    def record_miss(self):
+        self.misses += 1
+
+    def record_evictions(self, cnt: int):
+        self.evictions += cnt
+
+    def dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+# Counters of all caches by name
+cache_stats: dict[str, CacheStats] = {}
+
+# Caches in memory by name
+memory_caches: dict[str, "MemoryCache"] = {}
+
+
+def get_cache_stats(name: str) -> CacheStats:
+    """Get the counters of a cache, creating them on first use."""
+
+    if name not in cache_stats:
+        cache_stats[name] = CacheStats(name)
+    return cache_stats[name]
+
+
+def evict_lru(cache_dir: str, max_size: int, max_age: int | None = None) -> int:
+    """Delete the files of a cache directory unused for longer than max_age, then the
+    least recently used files until the directory fits into max_size bytes.
+
+    The last use of a file is its modification time. Files that are still being
+    written are skipped. Returns the number of deleted files.
+    """
+
+    entries = []
+    for root, _dirs, files in os.walk(cache_dir):
+        for file in files:
+            if file.endswith(TEMP_FILE_SUFFIX):
+                continue
+            path = os.path.join(root, file)
+            try:
+                stat_result = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat_result.st_mtime, stat_result.st_size, path))
+
+    min_mtime = time.time() - max_age if max_age is not None else None
+    total_size = sum(size for _mtime, size, _path in entries)
+    deleted_cnt = 0
+    for mtime, size, path in sorted(entries):
+        if (min_mtime is None or mtime >= min_mtime) and total_size <= max_size:
+            break
+        try:
+            os.remove(path)
+            deleted_cnt += 1
+        except FileNotFoundError:
+            pass
+        total_size -= size
+    return deleted_cnt
+
+
+class MemoryCache:
+    """Cache of results in the memory of the process.
+
+    Entries expire max_age seconds after they were added and the least recently used
+    entries are evicted once the cache holds more than max_entries. Results of a layer
+    are keyed with tuples starting with the layer ID, see `invalidate_layer`.
+    """
+
+    def __init__(self, name: str, max_entries: int, max_age: int | None = None):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.stats = get_cache_stats(name)
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        memory_caches[name] = self
+
+    @staticmethod
+    def get_key(**options) -> str:
+        """Get a key from the options of a result, e.g. a filter."""
+
+        return hashlib.sha256(
+            json.dumps(options, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def get(self, key: Hashable) -> Any | None:
+        """Get a cached result and mark it as used."""
+
+        entry = self._entries.get(key)
+        if entry is None or (
+            self.max_age is not None and time.monotonic() - entry[0] > self.max_age
+        ):
+            if entry is not None:
+                del self._entries[key]
+                self.stats.record_evictions(1)
+            self.stats.record_miss()
+            return None
+        self._entries.move_to_end(key)
+        self.stats.record_hit()
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        """Add a result and evict the least recently used results."""
+
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        evicted_cnt = 0
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            evicted_cnt += 1
+        self.stats.record_evictions(evicted_cnt)
+
+    def delete(self, match) -> int:
+        """Delete the results of which the key matches, e.g. of an updated layer."""
+
+        keys = [key for key in self._entries if match(key)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+
+
+def invalidate_layer(layer_id) -> int:
+    """Delete the cached results of a layer from all caches in memory.
+
+    Returns the number of deleted results.
+    """
+
+    return sum(
+        cache.delete(
+            lambda key: isinstance(key, tuple) and str(key[0]) == str(layer_id)
+        )
+        for cache in memory_caches.values()
+    )
@@ -29,6 +29,95 @@ class Settings(BaseSettings):
     BASE_STREET_NETWORK: Optional[UUID] = "903ecdca-b717-48db-bbce-0219e41439cf"
 
     JOB_TIMEOUT_DEFAULT: int = 120
+    IMPORT_BATCH_SIZE: int = 10000  # Number of features copied per batch on import
+    IMPORT_WORKER_CNT: int = 4  # Number of processes loading the chunks of a file
+    IMPORT_PARALLEL_MIN_FEATURES: int = (
+        200000  # Minimum number of features to load a file in parallel chunks
+    )
+    IMPORT_COMPUTE_H3: bool = (
+        True  # Compute the H3 cells of imported features in batches instead of the trigger
+    )
+    IMPORT_H3_CHECK_SAMPLE_SIZE: int = (
+        1000  # Number of imported features checked against the H3 cells of the trigger
+    )
+    IMPORT_BATCH_MAX_FILE_CNT: int = 100  # Max number of datasets in a batch import
+    IMPORT_BATCH_CONCURRENCY: int = 4  # Number of datasets of a batch loaded at a time
+    IMPORT_BATCH_MAX_CONNECTIONS: int = (
+        8  # Number of database connections shared by the datasets of a batch
+    )
+    IMPORT_BATCH_VALIDATION_WORKER_CNT: int = (
+        4  # Number of processes validating the datasets of a batch
+    )
+    IMPORT_BATCH_TIMEOUT: int = 3600  # Seconds each step of a batch import may take
+    EXPORT_BATCH_SIZE: int = 5000  # Number of rows fetched per batch on export
+    EXPORT_STREAM_CHUNK_SIZE: int = (
+        1024 * 1024
+    )  # Number of bytes of a streamed export sent at a time
+    EXPORT_ROW_GROUP_SIZE: int = (
+        100000  # Number of rows per row group of GeoParquet and Arrow exports
+    )
+    EXPORT_CACHE_DIR: str = "/app/cache/export"  # Cache of export archives
+    EXPORT_CACHE_MAX_SIZE: int = (
+        5 * 1024 * 1024 * 1024
+    )  # Max disk usage of the export cache in bytes
+    PROJECT_EXPORT_CONCURRENCY: int = (
+        4  # Number of layers of a project exported at a time
+    )
+    PROJECT_EXPORT_TIMEOUT: int = 3600  # Seconds a project export may take
+    UPLOAD_CHUNK_SIZE: int = (
+        8 * 1024 * 1024
+    )  # Chunk size suggested to clients of resumable uploads
+    UPLOAD_MAX_CHUNK_SIZE: int = 64 * 1024 * 1024  # Max chunk size of resumable uploads
+    UPLOAD_CACHE_DIR: str = "/app/cache/upload"  # Cache of uploads by file content
+    UPLOAD_CACHE_MAX_AGE: int = (
+        7 * 24 * 3600
+    )  # Seconds an upload cache entry is kept after its last use
+    UPLOAD_CACHE_MAX_SIZE: int = (
+        100 * 1024 * 1024
+    )  # Max disk usage of the upload cache in bytes
+    COLUMN_STATISTICS_TOP_K: int = (
+        100  # Number of most frequent values stored per column of a layer
+    )
+    COLUMN_STATISTICS_QUANTILE_CNT: int = (
+        2520  # Number of quantile intervals stored, exact for up to ten classes
+    )
+    CLASS_BREAKS_JENKS_SAMPLE_SIZE: int = (
+        1000  # Number of values natural breaks are computed on
+    )
+    CLASS_BREAKS_CACHE_SIZE: int = 256  # Number of class breaks results kept in memory
+    CLASS_BREAKS_CACHE_MAX_AGE: int = 3600  # Seconds class breaks results are kept
+    UNIQUE_VALUES_CACHE_SIZE: int = 128  # Number of unique values results kept in memory
+    UNIQUE_VALUES_CACHE_MAX_AGE: int = 3600  # Seconds unique values results are kept
+    UNIQUE_VALUES_CACHE_MAX_VALUES: int = (
+        10000  # Number of unique values kept per column and filter
+    )
+    FEATURE_COUNT_CACHE_SIZE: int = 4096  # Number of feature counts kept in memory
+    FEATURE_COUNT_CACHE_MAX_AGE: int = 3600  # Seconds feature counts are kept
+    STATISTIC_AGGREGATION_CACHE_SIZE: int = (
+        256  # Number of statistic aggregation results kept in memory
+    )
+    STATISTIC_AGGREGATION_CACHE_MAX_AGE: int = (
+        60  # Seconds statistic aggregation results are kept
+    )
+    APPROXIMATE_STATISTICS_SAMPLE_SIZE: int = (
+        50000  # Expected number of features sampled to estimate statistics
+    )
+    APPROXIMATE_STATISTICS_BLOCK_SAMPLE_MIN_PAGES: int = (
+        10000  # Pages of a user data table from which blocks instead of rows are sampled
+    )
+    METADATA_AGGREGATE_CACHE_SIZE: int = (
+        256  # Number of catalog metadata aggregates kept in memory
+    )
+    METADATA_AGGREGATE_CACHE_MAX_AGE: int = (
+        300  # Seconds catalog metadata aggregates are kept
+    )
+    WFS_PAGE_SIZE: int = 5000  # Number of features requested per WFS page
+    WFS_CONCURRENCY: int = 4  # Number of WFS pages requested at the same time
+    MVT_MAX_TILE_CNT: int = 1000  # Max number of vector tiles fetched for an import
+    MVT_CONCURRENCY: int = 8  # Number of vector tiles requested at the same time
+    CSV_PROFILE_SAMPLE_SIZE: int = (
+        10000  # Number of rows used to infer the column types of a CSV file
+    )
     ASYNC_CLIENT_DEFAULT_TIMEOUT: Optional[float] = (
         10.0  # Default timeout for async http client
     )
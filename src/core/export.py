@@ -0,0 +1,544 @@
+# Standard library imports
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import zipfile
+from contextlib import aclosing
+from functools import partial
+from typing import AsyncIterator, List, Tuple
+from uuid import uuid4
+
+# Third party imports
+import aiofiles
+import asyncpg
+import pyarrow as pa
+import pyarrow.parquet as pq
+from osgeo import ogr, osr
+from pyproj import CRS
+
+# Local application imports
+from src.core.cache import TEMP_FILE_SUFFIX, evict_lru, get_cache_stats
+from src.core.config import settings
+from src.db.models.layer import FeatureLayerExportType
+from src.schemas.layer import OgrDriverType
+
+EXPORT_CURSOR_NAME = "export_cursor"
+# File types that are written while the rows are read from the database
+STREAM_EXPORT_TYPES = [
+    FeatureLayerExportType.geojson.value,
+    FeatureLayerExportType.csv.value,
+    FeatureLayerExportType.fgb.value,
+    FeatureLayerExportType.gpkg.value,
+    FeatureLayerExportType.parquet.value,
+    FeatureLayerExportType.arrow.value,
+]
+# File types that can only be written into a seekable file by OGR
+OGR_EXPORT_TYPES = [
+    FeatureLayerExportType.fgb.value,
+    FeatureLayerExportType.gpkg.value,
+]
+# OGR field types of the column types of the user data tables. Arrays and JSON are
+# exported as JSON encoded strings.
+OGR_FIELD_TYPES = {
+    "integer": ogr.OFTInteger,
+    "bigint": ogr.OFTInteger64,
+    "float": ogr.OFTReal,
+    "text": ogr.OFTString,
+    "timestamp": ogr.OFTDateTime,
+    "boolean": ogr.OFTInteger,
+    "jsonb": ogr.OFTString,
+    "arrint": ogr.OFTString,
+    "arrfloat": ogr.OFTString,
+    "arrtext": ogr.OFTString,
+}
+# File types written with Arrow from the rows of the database
+ARROW_EXPORT_TYPES = [
+    FeatureLayerExportType.parquet.value,
+    FeatureLayerExportType.arrow.value,
+]
+# Arrow types of the column types of the user data tables. JSON is exported as JSON
+# encoded strings.
+ARROW_FIELD_TYPES = {
+    "integer": pa.int32(),
+    "bigint": pa.int64(),
+    "float": pa.float64(),
+    "text": pa.string(),
+    "timestamp": pa.timestamp("us"),
+    "boolean": pa.bool_(),
+    "jsonb": pa.string(),
+    "arrint": pa.list_(pa.int32()),
+    "arrfloat": pa.list_(pa.float64()),
+    "arrtext": pa.list_(pa.string()),
+}
+ARROW_COMPRESSION = "zstd"
+GEOPARQUET_VERSION = "1.0.0"
+
+
+def get_geometry_select(file_type: str, srid: int) -> str:
+    """Get the expression encoding the geometry in the database for the file type."""
+
+    geom = f"ST_Transform(geom, {int(srid)})"
+    if file_type == FeatureLayerExportType.geojson.value:
+        return f"ST_AsGeoJSON({geom})"
+    elif file_type == FeatureLayerExportType.csv.value:
+        return f"ST_AsText({geom})"
+    return f"ST_AsBinary({geom})"
+
+
+def encode_value(value):
+    """Encode values that JSON and CSV don't support natively."""
+
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=str)
+    return value
+
+
+def get_unique_file_names(names: List[str]) -> List[str]:
+    """Turn names into file names that are safe to use and unique within a folder."""
+
+    file_names = []
+    used_names = set()
+    for name in names:
+        file_name = re.sub(r"[^\w\-. ]", "_", name).strip(" .") or "layer"
+        unique_name = file_name
+        cnt = 1
+        # File systems may be case insensitive
+        while unique_name.lower() in used_names:
+            cnt += 1
+            unique_name = f"{file_name}_{cnt}"
+        used_names.add(unique_name.lower())
+        file_names.append(unique_name)
+    return file_names
+
+
+async def fetch_batches(
+    sql_query: str, batch_size: int | None = None
+) -> AsyncIterator[List[asyncpg.Record]]:
+    """Read the rows of a query in batches from a named server-side cursor.
+
+    The rows are fetched over a dedicated connection, so only one batch is held in
+    memory at a time.
+    """
+
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    connection = await asyncpg.connect(
+        settings.POSTGRES_DATABASE_URI,
+        server_settings={"application_name": "GOAT Core export"},
+    )
+    try:
+        # Cursors only exist within a transaction
+        async with connection.transaction(readonly=True):
+            await connection.execute(
+                f"DECLARE {EXPORT_CURSOR_NAME} NO SCROLL CURSOR FOR {sql_query}"
+            )
+            while True:
+                records = await connection.fetch(
+                    f"FETCH FORWARD {int(batch_size)} FROM {EXPORT_CURSOR_NAME}"
+                )
+                if not records:
+                    break
+                yield records
+    finally:
+        await connection.close()
+
+
+async def encode_geojson(
+    batches: AsyncIterator[List[asyncpg.Record]],
+    columns: List[str],
+    layer_name: str,
+    srid: int,
+) -> AsyncIterator[bytes]:
+    """Encode rows with the geometry as GeoJSON text in the last column."""
+
+    header = {"type": "FeatureCollection", "name": layer_name}
+    if srid != 4326:
+        header["crs"] = {
+            "type": "name",
+            "properties": {"name": f"urn:ogc:def:crs:EPSG::{srid}"},
+        }
+    yield (json.dumps(header)[:-1] + ', "features": [\n').encode()
+
+    is_first = True
+    async for records in batches:
+        features = []
+        for record in records:
+            *values, geometry = record
+            properties = {
+                column: encode_value(value) for column, value in zip(columns, values)
+            }
+            features.append(
+                '{"type": "Feature", "properties": '
+                + json.dumps(properties, default=str)
+                + ', "geometry": '
+                + (geometry or "null")
+                + "}"
+            )
+        yield (("" if is_first else ",\n") + ",\n".join(features)).encode()
+        is_first = False
+    yield b"\n]}\n"
+
+
+async def encode_csv(
+    batches: AsyncIterator[List[asyncpg.Record]],
+    columns: List[str],
+    has_geometry: bool,
+) -> AsyncIterator[bytes]:
+    """Encode rows as CSV. The geometry is written as WKT into the first column."""
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow((["WKT"] if has_geometry else []) + columns)
+    async for records in batches:
+        for record in records:
+            values = [encode_value(value) for value in record]
+            if has_geometry:
+                values = values[-1:] + values[:-1]
+            writer.writerow(values)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+class OgrExportWriter:
+    """Write batches of rows with the geometry as WKB in the last column into a file."""
+
+    def __init__(
+        self,
+        file_path: str,
+        file_type: str,
+        layer_name: str,
+        columns: List[Tuple[str, str]],
+        srid: int,
+    ):
+        self.file_path = file_path
+        self.file_type = file_type
+        self.layer_name = layer_name
+        self.columns = columns
+        self.srid = srid
+        self.data_source = None
+        self.layer = None
+
+    def open(self):
+        driver = ogr.GetDriverByName(OgrDriverType[self.file_type].value)
+        self.data_source = driver.CreateDataSource(self.file_path)
+        srs = osr.SpatialReference()
+        srs.ImportFromEPSG(self.srid)
+        srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        self.layer = self.data_source.CreateLayer(
+            self.layer_name, srs=srs, geom_type=ogr.wkbUnknown
+        )
+        for column, column_type in self.columns:
+            field = ogr.FieldDefn(column, OGR_FIELD_TYPES[column_type])
+            if column_type == "boolean":
+                field.SetSubType(ogr.OFSTBoolean)
+            self.layer.CreateField(field)
+
+    def write_batch(self, records: List[asyncpg.Record]):
+        self.layer.StartTransaction()
+        layer_defn = self.layer.GetLayerDefn()
+        for record in records:
+            *values, geometry = record
+            feature = ogr.Feature(layer_defn)
+            for index, value in enumerate(values):
+                if value is None:
+                    feature.SetFieldNull(index)
+                elif isinstance(value, (list, dict)):
+                    feature.SetField(index, json.dumps(value, default=str))
+                elif isinstance(value, bool):
+                    feature.SetField(index, int(value))
+                elif isinstance(value, (int, float, str)):
+                    feature.SetField(index, value)
+                else:
+                    feature.SetField(index, str(value))
+            if geometry is not None:
+                feature.SetGeometryDirectly(ogr.CreateGeometryFromWkb(geometry))
+            self.layer.CreateFeature(feature)
+        self.layer.CommitTransaction()
+
+    def close(self):
+        self.layer = None
+        self.data_source = None
+
+
+async def encode_ogr(
+    batches: AsyncIterator[List[asyncpg.Record]],
+    file_path: str,
+    file_type: str,
+    layer_name: str,
+    columns: List[Tuple[str, str]],
+    srid: int,
+    chunk_size: int = 1048576,
+) -> AsyncIterator[bytes]:
+    """Write the rows with OGR into a file and read it back in chunks.
+
+    GeoPackage and FlatGeobuf can't be written sequentially, so the file is written
+    into the export folder first and deleted once it is read.
+    """
+
+    writer = OgrExportWriter(file_path, file_type, layer_name, columns, srid)
+    try:
+        await asyncio.to_thread(writer.open)
+        async for records in batches:
+            await asyncio.to_thread(writer.write_batch, records)
+        await asyncio.to_thread(writer.close)
+
+        async with aiofiles.open(file_path, "rb") as f:
+            while chunk := await f.read(chunk_size):
+                yield chunk
+    finally:
+        writer.close()
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+def get_arrow_schema(columns: List[Tuple[str, str]], srid: int | None) -> pa.Schema:
+    """Get the Arrow schema of the rows with the geometry as WKB in the last column.
+
+    The geometry column is described by GeoParquet metadata, which is also read from
+    Arrow IPC files by GDAL and GeoPandas.
+    """
+
+    fields = [
+        pa.field(column, ARROW_FIELD_TYPES[column_type])
+        for column, column_type in columns
+    ]
+    if srid is None:
+        return pa.schema(fields)
+
+    geometry_column = "geometry"
+    while geometry_column in [column for column, _column_type in columns]:
+        geometry_column = f"_{geometry_column}"
+    fields.append(pa.field(geometry_column, pa.binary()))
+    column_metadata = {"encoding": "WKB", "geometry_types": []}
+    # Coordinates without a CRS are longitude and latitude on WGS 84
+    if srid != 4326:
+        column_metadata["crs"] = CRS.from_epsg(srid).to_json_dict()
+    geo = {
+        "version": GEOPARQUET_VERSION,
+        "primary_column": geometry_column,
+        "columns": {geometry_column: column_metadata},
+    }
+    return pa.schema(fields, metadata={"geo": json.dumps(geo)})
+
+
+def records_to_table(
+    batches: List[List[asyncpg.Record]], schema: pa.Schema
+) -> pa.Table:
+    """Convert batches of rows into a table of the schema."""
+
+    records = [record for records in batches for record in records]
+    values_by_column = list(zip(*records)) or [[] for _field in schema]
+    arrays = []
+    for field, values in zip(schema, values_by_column):
+        if field.type == pa.string():
+            values = [
+                value
+                if value is None or isinstance(value, str)
+                else encode_value(value)
+                if isinstance(value, (list, dict))
+                else str(value)
+                for value in values
+            ]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+async def encode_arrow(
+    batches: AsyncIterator[List[asyncpg.Record]],
+    file_type: str,
+    columns: List[Tuple[str, str]],
+    srid: int | None = None,
+    row_group_size: int | None = None,
+) -> AsyncIterator[bytes]:
+    """Encode rows as GeoParquet or Arrow IPC file with compressed row groups.
+
+    The geometry is expected as WKB in the last column if a SRID is given. The rows of
+    the batches are collected into row groups, which are written and yielded one at a
+    time.
+    """
+
+    row_group_size = row_group_size or settings.EXPORT_ROW_GROUP_SIZE
+    schema = get_arrow_schema(columns, srid)
+    sink = _StreamSink()
+    if file_type == FeatureLayerExportType.parquet.value:
+        writer = pq.ParquetWriter(
+            pa.PythonFile(sink, mode="w"), schema, compression=ARROW_COMPRESSION
+        )
+        write_table = partial(writer.write_table, row_group_size=row_group_size)
+    else:
+        writer = pa.ipc.new_file(
+            pa.PythonFile(sink, mode="w"),
+            schema,
+            options=pa.ipc.IpcWriteOptions(compression=ARROW_COMPRESSION),
+        )
+        write_table = partial(writer.write_table, max_chunksize=row_group_size)
+
+    def write_row_group(row_group: List[List[asyncpg.Record]]):
+        write_table(records_to_table(row_group, schema))
+
+    row_group = []
+    row_cnt = 0
+    async for records in batches:
+        row_group.append(records)
+        row_cnt += len(records)
+        if row_cnt >= row_group_size:
+            # Convert and compress in a thread to keep the event loop responsive
+            await asyncio.to_thread(write_row_group, row_group)
+            row_group = []
+            row_cnt = 0
+            yield sink.pop()
+    if row_group:
+        await asyncio.to_thread(write_row_group, row_group)
+    await asyncio.to_thread(writer.close)
+    yield sink.pop()
+
+
+async def iterate_content(data: bytes) -> AsyncIterator[bytes]:
+    """Provide content that is already in memory as a file of a ZIP stream."""
+
+    yield data
+
+
+async def iterate_file(f, chunk_size: int | None = None) -> AsyncIterator[bytes]:
+    """Read an opened file in chunks and close it."""
+
+    chunk_size = chunk_size or settings.EXPORT_STREAM_CHUNK_SIZE
+    try:
+        while chunk := await f.read(chunk_size):
+            yield chunk
+    finally:
+        await f.close()
+
+
+class _StreamSink:
+    """Unseekable file object collecting the bytes written by a ZipFile or an Arrow writer."""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def pop(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+
+async def stream_zip(
+    files: List[Tuple[str, AsyncIterator[bytes]]],
+    chunk_size: int | None = None,
+) -> AsyncIterator[bytes]:
+    """Compress the contents of files into a ZIP that is yielded while it is written.
+
+    The sizes and checksums of the entries are written after their content, so the
+    ZIP is created without seeking or knowing the size of the files in advance.
+    """
+
+    chunk_size = chunk_size or settings.EXPORT_STREAM_CHUNK_SIZE
+    sink = _StreamSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+        for name, content in files:
+            async with aclosing(content):
+                with zip_file.open(name, "w", force_zip64=True) as entry:
+                    async for data in content:
+                        # Compress in a thread to keep the event loop responsive
+                        await asyncio.to_thread(entry.write, data)
+                        if sink.size >= chunk_size:
+                            yield sink.pop()
+            yield sink.pop()
+    yield sink.pop()
+
+
+class ExportCache:
+    """Cache of export archives on disk.
+
+    Archives are keyed on the version of the layer data and the export options, so
+    changed data is exported again while unchanged layers are served from the cache.
+    The least recently used archives are evicted once the cache exceeds
+    `EXPORT_CACHE_MAX_SIZE` bytes.
+    """
+
+    def __init__(self, cache_dir: str | None = None, max_size: int | None = None):
+        self.cache_dir = cache_dir or settings.EXPORT_CACHE_DIR
+        self.max_size = settings.EXPORT_CACHE_MAX_SIZE if max_size is None else max_size
+        self.stats = get_cache_stats("export")
+
+    @staticmethod
+    def get_key(**options) -> str:
+        """Get the key of an export from the data version and the export options."""
+
+        return hashlib.sha256(
+            json.dumps(options, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.zip")
+
+    def get_temp_path(self, key: str) -> str:
+        return f"{self.get_path(key)}.{uuid4().hex}{TEMP_FILE_SUFFIX}"
+
+    def get(self, key: str) -> str | None:
+        """Get the path of a cached archive and mark it as used."""
+
+        path = self.get_path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.stats.record_miss()
+            return None
+        self.stats.record_hit()
+        return path
+
+    def add(self, key: str, temp_path: str):
+        """Move a completely written archive into the cache and evict old archives."""
+
+        os.replace(temp_path, self.get_path(key))
+        self.stats.record_evictions(evict_lru(self.cache_dir, max_size=self.max_size))
+
+    def put(self, key: str, file_path: str) -> str:
+        """Copy an archive into the cache."""
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = self.get_temp_path(key)
+        shutil.copyfile(file_path, temp_path)
+        self.add(key, temp_path)
+        return self.get_path(key)
+
+    async def tee(self, key: str, stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Write a streamed archive into the cache while it is sent.
+
+        The archive is only added to the cache if the stream completes.
+        """
+
+        await asyncio.to_thread(os.makedirs, self.cache_dir, exist_ok=True)
+        temp_path = self.get_temp_path(key)
+        is_complete = False
+        try:
+            async with aclosing(stream), aiofiles.open(temp_path, "wb") as f:
+                async for chunk in stream:
+                    await f.write(chunk)
+                    yield chunk
+            is_complete = True
+        finally:
+            if is_complete:
+                await asyncio.to_thread(self.add, key, temp_path)
+            elif os.path.exists(temp_path):
+                os.remove(temp_path)
@@ -12,7 +12,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.core.config import settings
 from src.crud.crud_job import job as crud_job
 from src.schemas.error import ERROR_MAPPING, JobKilledError, TimeoutError, UnknownError
-from src.schemas.job import JobStatusType
+from src.schemas.job import JobStatusType, Msg
 from src.schemas.layer import LayerType, UserDataTable
 from src.utils import table_exists
 
@@ -227,7 +227,17 @@ def job_init():
     return decorator
 
 
-def job_log(job_step_name: str, timeout: int = settings.JOB_TIMEOUT_DEFAULT):
+def job_log(
+    job_step_name: str,
+    timeout: int = settings.JOB_TIMEOUT_DEFAULT,
+    report_msg: bool = False,
+):
+    """Log the status of a job step.
+
+    With report_msg the message of a finished step is kept as the job message e.g. to
+    report the import rate, otherwise the job finished successfully.
+    """
+
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
@@ -312,7 +322,10 @@ def job_log(job_step_name: str, timeout: int = settings.JOB_TIMEOUT_DEFAULT):
                     msg_text = result["msg"]
                 elif result["status"] == JobStatusType.finished.value:
                     status = JobStatusType.finished.value
-                    msg_text = "Job finished successfully."
+                    if report_msg and isinstance(result.get("msg"), Msg):
+                        msg_text = result["msg"].text
+                    else:
+                        msg_text = "Job finished successfully."
                 else:
                     raise ValueError(
                         f"Invalid status {result['status']} returned by function {func.__name__}."
@@ -1,10 +1,12 @@
 # Standard library imports
 import asyncio
 import csv
+import hashlib
 import os
 import re
 import time
 import zipfile
+from datetime import datetime
 from enum import Enum
 from typing import Union
 from uuid import UUID
@@ -12,10 +14,10 @@ from uuid import UUID
 # Third party imports
 import aiofiles
 import aiofiles.os as aos
-import pandas as pd
+import aiohttp
 from fastapi import HTTPException, status
 from openpyxl import load_workbook
-from osgeo import ogr, osr
+from osgeo import ogr
 from pydantic import BaseModel, HttpUrl
 from pyproj import CRS
 from qgis.core import (
@@ -30,9 +32,33 @@ from sqlmodel import SQLModel
 from starlette.datastructures import UploadFile
 
 # Local application imports
+from src.core.bulk_load import (
+    H3_COLUMNS,
+    H3_GROUP_RESOLUTION,
+    ArrowBatchReader,
+    CsvBatchReader,
+    OgrFeatureBatchReader,
+    copy_batches,
+    copy_chunks_parallel,
+    get_bulk_load_connection,
+    plan_feature_chunks,
+)
+from src.core.cache import invalidate_layer
 from src.core.config import settings
 from src.core.job import job_log
+from src.core.profile import (
+    CSVProfiler,
+    build_ogr_profile,
+    build_parquet_profile,
+)
+from src.core.mvt import MVTFetcher
+from src.core.upload import UploadCache, hash_file
+from src.core.wfs import WFSFetcher, WFSFormatError
 from src.crud.base import CRUDBase
+from src.crud.crud_job import job as crud_job
+from src.crud.crud_layer_statistics import (
+    layer_column_statistics as crud_layer_statistics,
+)
 from src.db.models._link_model import LayerProjectLink
 from src.db.models.layer import (
     FeatureDataType,
@@ -43,9 +69,10 @@ from src.db.models.layer import (
     LayerType,
     TableLayerExportType,
 )
-from src.schemas.error import DataOutCRSBoundsError, Ogr2OgrError
+from src.schemas.error import DataImportError, DataOutCRSBoundsError, Ogr2OgrError
 from src.schemas.job import JobStatusType, Msg, MsgType
 from src.schemas.layer import (
+    DatasetProfile,
     IFileUploadExternalService,
     MaxFileSizeType,
     NumberColumnsPerType,
@@ -57,6 +84,7 @@ from src.utils import (
     async_delete_dir,
     async_run_command,
     async_scandir,
+    print_info,
     print_warning,
     sanitize_error_message,
 )
@@ -107,7 +135,57 @@ def get_user_table(layer: Union[dict, SQLModel, BaseModel]):
     return f"{settings.USER_DATA_SCHEMA}.{table_prefix}_{str(user_id).replace('-', '')}"
 
 
+def check_crs_bounds(layer: Layer, crs: str):
+    """Check if the extent of a feature layer falls within the bounds of the target CRS."""
+
+    # Define target CRS
+    target_crs = CRS(crs)
+
+    # Get the layer's extent
+    minx, miny, maxx, maxy = wkb.loads(layer.extent.desc, hex=True).bounds
+
+    if not (
+        target_crs.area_of_use.west
+        <= minx
+        <= maxx
+        <= target_crs.area_of_use.east
+        and target_crs.area_of_use.south <= miny <= maxy <= target_crs.area_of_use.north
+    ):
+        raise DataOutCRSBoundsError("The data is outside the bounds of the provided CRS.")
+
+
+def get_attribute_mapping(data_types: dict) -> dict:
+    """Map the valid attributes of a validated file to the columns of the user data table."""
+
+    attribute_mapping = {}
+    for field_type, field_names in data_types["valid"].items():
+        cnt = 1
+        for field_name in field_names:
+            if field_name == "id":
+                continue
+            # Replace hyphens with an underscore to keep the column names of layers imported with ogr2ogr
+            attribute_mapping[field_type + "_attr" + str(cnt)] = field_name.replace(
+                "-", "_"
+            )
+            cnt += 1
+    return attribute_mapping
+
+
 class CRUDLayerBase(CRUDBase):
+    async def get_data_updated_at(
+        self, async_session: AsyncSession, layer_id: UUID
+    ) -> datetime | None:
+        """Get the data version of a layer.
+
+        Results cached across requests are keyed with it, as other processes don't see
+        the invalidation of the caches in memory. It is read from the row count stored
+        with the layer, see `LayerRowCount`.
+        """
+
+        return await crud_layer_statistics.get_data_updated_at(
+            async_session, layer_id=layer_id
+        )
+
     async def check_and_alter_layer_name(
         self,
         async_session: AsyncSession,
@@ -177,6 +255,7 @@ class FileUpload:
         self.folder_path = os.path.join(
             settings.DATA_DIR, str(self.user_id), str(dataset_id)
         )
+        self.content_hash = None
 
         if isinstance(source, UploadFile):
             self.file_ending = os.path.splitext(source.filename)[-1][1:]
@@ -190,13 +269,16 @@ class FileUpload:
         """Fetch data from external service if required, save file to disk."""
 
         if isinstance(self.source, UploadFile):
-            # An existing file was uploaded, save file in chunks
+            # An existing file was uploaded, save file in chunks and hash its content
+            hasher = hashlib.sha256()
             async with aiofiles.open(self.file_path, "wb") as buffer:
                 while True:
                     chunk = await self.source.read(65536)
                     if not chunk:
                         break
+                    hasher.update(chunk)
                     await buffer.write(chunk)
+            self.content_hash = hasher.hexdigest()
         else:
             # Ensure a URL is specified
             url = self.source.other_properties.url
@@ -219,20 +301,35 @@ class FileUpload:
                     )
 
                 # Fetch the specified layer
-                fetch_layer_external_service.fetch_wfs(layer_name=layers[0])
-
-                # Ensure the newly saved file does not exceed file size limits
-                if (
-                    os.path.getsize(self.file_path)
-                    > MaxFileSizeType[FileUploadType.gpkg.value].value
-                ):
-                    raise HTTPException(
-                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                        detail=f"File size too large. Max file size is {round(MaxFileSizeType[FileUploadType.gpkg.value].value / 1048576, 2)} MB",
+                await fetch_layer_external_service.fetch_wfs(layer_name=layers[0])
+            elif self.source.data_type == FeatureDataType.mvt:
+                # Ensure a single MVT layer, the extent and zoom level are specified
+                other_properties = self.source.other_properties
+                if not other_properties.layers or len(other_properties.layers) != 1:
+                    raise ValueError(
+                        "MVT: A single layer must be specified under the 'layers' key of other_properties."
                     )
-            elif self.data_type == FeatureDataType.mvt:
-                # TODO: Implement MVT fetching
-                pass
+                if other_properties.bbox is None or other_properties.zoom is None:
+                    raise ValueError(
+                        "MVT: An extent must be specified under the 'bbox' key and a zoom level under the 'zoom' key of other_properties."
+                    )
+
+                # Fetch the tiles covering the extent
+                await fetch_layer_external_service.fetch_mvt(
+                    layer_name=other_properties.layers[0],
+                    bbox=other_properties.bbox,
+                    zoom=other_properties.zoom,
+                )
+
+            # Ensure the newly saved file does not exceed file size limits
+            if (
+                os.path.getsize(self.file_path)
+                > MaxFileSizeType[FileUploadType.gpkg.value].value
+            ):
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"File size too large. Max file size is {round(MaxFileSizeType[FileUploadType.gpkg.value].value / 1048576, 2)} MB",
+                )
 
     async def save_file(self):
         """Save file to disk for later operations."""
@@ -248,6 +345,8 @@ class FileUpload:
 
         # Fetch and save file
         await self._fetch_and_write()
+        if self.content_hash is None:
+            self.content_hash = await asyncio.to_thread(hash_file, self.file_path)
 
         return self.file_path
 
@@ -266,8 +365,29 @@ class FetchLayerExternalService:
         # Output driver to be used
         self.output_driver_type = OgrDriverType.geojson.value
 
-    def fetch_wfs(self, layer_name: str):
-        """Fetch data from WFS service and save to disk."""
+    async def fetch_wfs(self, layer_name: str):
+        """Fetch data from WFS service in pages of GeoJSON and save to disk."""
+
+        try:
+            await WFSFetcher(
+                url=str(self.url),
+                layer_name=layer_name,
+                max_feature_cnt=self.MAX_FEATURE_COUNT,
+            ).fetch(self.output_file)
+            return
+        except WFSFormatError as e:
+            print_warning(f"{e} Falling back to QGIS and OGR.")
+        except aiohttp.ClientResponseError as e:
+            # E.g. the service rejects the GeoJSON output format or paging parameters
+            print_warning(
+                f"WFS service at {self.url} returned {e.status} for GeoJSON pages. Falling back to QGIS and OGR."
+            )
+
+        # Fetch services without GeoJSON paging in a thread to not block the event loop
+        await asyncio.to_thread(self.fetch_wfs_fallback, layer_name)
+
+    def fetch_wfs_fallback(self, layer_name: str):
+        """Fetch data from WFS service using QGIS or OGR and save to disk."""
 
         # First, attempt to fetch data using QGIS
         try:
@@ -385,10 +505,20 @@ class FetchLayerExternalService:
 
         ogr.DontUseExceptions()
 
-    async def fetch_mvt(self):
-        """Fetch data from MVT service and save to disk."""
-        # TODO: Implement MVT fetching
-        pass
+    async def fetch_mvt(self, layer_name: str, bbox: list[float], zoom: int):
+        """Fetch data from MVT service within an extent and save to disk."""
+
+        async def report_progress(tile_cnt: int, total_tile_cnt: int):
+            if tile_cnt % 100 == 0 or tile_cnt == total_tile_cnt:
+                print_info(f"MVT: {tile_cnt} of {total_tile_cnt} tiles fetched.")
+
+        await MVTFetcher(
+            url=str(self.url),
+            layer_name=layer_name,
+            bbox=bbox,
+            zoom=zoom,
+            on_progress=report_progress,
+        ).fetch(self.output_file)
 
 
 class OGRFileHandling:
@@ -406,11 +536,10 @@ class OGRFileHandling:
             FileUploadType.gpkg.value: self.validate_gpkg,
             FileUploadType.geojson.value: self.validate_geojson,
             FileUploadType.kml.value: self.validate_kml,
+            FileUploadType.parquet.value: self.validate_parquet,
+            FileUploadType.fgb.value: self.validate_flatgeobuf,
         }
-        if self.file_ending == FileUploadType.csv.value:
-            self.driver_name = OgrDriverType[FileUploadType.xlsx.value].value
-        else:
-            self.driver_name = OgrDriverType[self.file_ending].value
+        self.driver_name = OgrDriverType[self.file_ending].value
 
     def validate_ogr(self, file_path: str):
         """Validate using ogr and get valid attributes."""
@@ -450,67 +579,63 @@ class OGRFileHandling:
                     "status": JobStatusType.failed.value,
                 }
 
-        field_type_res = self.check_field_types(layer)
+        # Profile the layer once, the profile is reused by all later steps
+        profile = build_ogr_profile(data_source, layer)
+        field_type_res = self.check_field_types(profile)
 
         # Close the datasource
         data_source = None
 
-        return {"file_path": file_path, **field_type_res}
-
-    def get_layer_extent(self, layer) -> str:
-        """Get layer extent in EPSG:4326."""
-        # Get the original extent
-        minX, maxX, minY, maxY = layer.GetExtent()
+        return {"file_path": file_path, "profile": profile.dict(), **field_type_res}
 
-        # Define the source SRS
-        source_srs = layer.GetSpatialRef()
+    def assign_field_type(self, field_types: dict, field_name: str, field_type: str):
+        """Label a field as valid, unvalid or overflow based on its OGR field type."""
 
-        # Define the target SRS (EPSG:4326)
-        target_srs = osr.SpatialReference()
-        target_srs.ImportFromEPSG(4326)
-
-        # Create a coordinate transformation
-        transform = osr.CoordinateTransformation(source_srs, target_srs)
-
-        # Transform the coordinates
-        min_point = ogr.Geometry(ogr.wkbPoint)
-        min_point.AddPoint(minX, minY)
-        min_point.Transform(transform)
+        # Get field type from OgrPostgresType enum if exists
+        field_type_pg = (
+            OgrPostgresType[field_type].value
+            if field_type in OgrPostgresType.__members__
+            else None
+        )
 
-        max_point = ogr.Geometry(ogr.wkbPoint)
-        max_point.AddPoint(maxX, maxY)
-        max_point.Transform(transform)
+        # Check if field type is defined
+        if field_type_pg is None:
+            field_types["unvalid"][field_name] = field_type
+            return
+        # Create array for field names of respective type if not already existing
+        if field_type_pg not in field_types["valid"].keys():
+            field_types["valid"][field_type_pg] = []
 
-        # Get the transformed coordinates
-        minY_transformed, minX_transformed, _ = min_point.GetPoint()
-        maxY_transformed, maxX_transformed, _ = max_point.GetPoint()
+        # Check if number of specified field excesses the maximum specified number
+        if (
+            NumberColumnsPerType[field_type_pg].value
+            > len(field_types["valid"][field_type_pg])
+            and field_name not in field_types["valid"][field_type_pg]
+        ):
+            field_types["valid"][field_type_pg].append(field_name)
 
-        # Create a Multipolygon from the extent
-        multipolygon_wkt = f"MULTIPOLYGON((({minX_transformed} {minY_transformed}, {minX_transformed} {maxY_transformed}, {maxX_transformed} {maxY_transformed}, {maxX_transformed} {minY_transformed}, {minX_transformed} {minY_transformed})))"
-        return multipolygon_wkt
+        # Place fields that are exceeding the maximum number of columns or if the column name was already specified.
+        elif (
+            NumberColumnsPerType[field_type_pg]
+            <= len(field_types["valid"][field_type_pg])
+            or field_name in field_types["valid"][field_type_pg]
+        ):
+            field_types["overflow"][field_type_pg] = field_name
 
-    def check_field_types(self, layer):
+    def check_field_types(self, profile: DatasetProfile):
         """Check if field types are valid and label if too many columns where specified."""
 
         field_types = {"valid": {}, "unvalid": {}, "overflow": {}, "geometry": {}}
-        layer_def = layer.GetLayerDefn()
 
-        if layer_def.GetGeomFieldCount() == 1:
+        if profile.geometry_column is not None:
             # Get geometry type of layer to upload to specify target table
-            if layer_def.GetGeomType() != ogr.wkbUnknown:
-                geometry_type = layer_def.GetGeomType()
-            else:
-                first_feature = layer.GetNextFeature()
-                if first_feature:
-                    geometry_type = first_feature.GetGeometryRef().GetGeometryType()
-                else:
-                    raise Exception(
-                        "Could not determine geometry type for layer, no features exist."
-                    )
-            geometry_type = ogr.GeometryTypeToName(geometry_type).replace(" ", "_")
+            if profile.geometry_type is None:
+                raise Exception(
+                    "Could not determine geometry type for layer, no features exist."
+                )
 
             # Strip the "Measured " from beginning of the the geometry type name
-            geometry_type = geometry_type.replace("Measured_", "")
+            geometry_type = profile.geometry_type.replace("Measured_", "")
             # Strip "Z", "M", "ZM" or "25D" from the end of the geometry type name
             geometry_type = re.sub(r"(Z|M|ZM|25D)$", "", geometry_type)
             if geometry_type not in SupportedOgrGeomType.__members__:
@@ -520,54 +645,13 @@ class OGRFileHandling:
                 }
 
             # Save geometry type and geometry column name
-            if layer_def.GetGeomFieldDefn(0).GetName() == "":
-                field_types["geometry"]["column_name"] = "wkb_geometry"
-            else:
-                field_types["geometry"]["column_name"] = layer_def.GetGeomFieldDefn(
-                    0
-                ).GetName()
+            field_types["geometry"]["column_name"] = profile.geometry_column
             field_types["geometry"]["type"] = geometry_type
-            field_types["geometry"]["extent"] = self.get_layer_extent(layer)
-            field_types["geometry"][
-                "srs"
-            ] = "EPSG:" + layer.GetSpatialRef().GetAuthorityCode(None)
-
-        for i in range(layer_def.GetFieldCount()):
-            field_def = layer_def.GetFieldDefn(i)
-            field_name = field_def.GetName().lower()
-            field_type_code = field_def.GetType()
-            field_type = field_def.GetFieldTypeName(field_type_code)
-
-            # Get field type from OgrPostgresType enum if exists
-            field_type_pg = (
-                OgrPostgresType[field_type].value
-                if field_type in OgrPostgresType.__members__
-                else None
-            )
+            field_types["geometry"]["extent"] = profile.extent
+            field_types["geometry"]["srs"] = profile.srs
 
-            # Check if field type is defined
-            if field_type_pg is None:
-                field_types["unvalid"][field_name] = field_type
-                continue
-            # Create array for field names of respective type if not already existing
-            if field_type_pg not in field_types["valid"].keys():
-                field_types["valid"][field_type_pg] = []
-
-            # Check if number of specified field excesses the maximum specified number
-            if (
-                NumberColumnsPerType[field_type_pg].value
-                > len(field_types["valid"][field_type_pg])
-                and field_name not in field_types["valid"][field_type_pg]
-            ):
-                field_types["valid"][field_type_pg].append(field_name)
-
-            # Place fields that are exceeding the maximum number of columns or if the column name was already specified.
-            elif (
-                NumberColumnsPerType[field_type_pg]
-                <= len(field_types["valid"][field_type_pg])
-                or field_name in field_types["valid"][field_type_pg]
-            ):
-                field_types["overflow"][field_type_pg] = field_name
+        for field in profile.fields:
+            self.assign_field_type(field_types, field.name.lower(), field.type)
 
         return {"data_types": field_types}
 
@@ -598,11 +682,20 @@ class OGRFileHandling:
                     "status": JobStatusType.failed.value,
                 }
 
-        # Load in df to get data types
-        df = pd.read_csv(self.file_path)
-        # Save in XLSX to keep data types
-        df.to_excel(self.file_path + ".xlsx", index=False)
-        return self.validate_ogr(self.file_path + ".xlsx")
+        # Infer the data types while streaming through the file
+        try:
+            profile = CSVProfiler(self.file_path).profile()
+        except (ValueError, UnicodeDecodeError) as e:
+            return {
+                "msg": f"CSV is not well-formed: {e}",
+                "status": JobStatusType.failed.value,
+            }
+
+        return {
+            "file_path": self.file_path,
+            "profile": profile.dict(),
+            **self.check_field_types(profile),
+        }
 
     def validate_xlsx(self):
         """Validate if XLSX is well-formed."""
@@ -627,45 +720,78 @@ class OGRFileHandling:
 
         return self.validate_ogr(self.file_path)
 
-    def validate_shapefile(self):
-        """Validate if ZIP contains a valid shapefile."""
+    def find_shapefile(self) -> str:
+        """Find the shapefile inside the ZIP, which may be placed in a nested folder.
+
+        Raises a ValueError if the ZIP doesn't contain exactly one shapefile with all
+        main components.
+        """
+
         with zipfile.ZipFile(self.file_path) as zip_ref:
             # List all file names in the zip file
             file_names = zip_ref.namelist()
-            # Remove directories from the list of file names
-            file_names = [f for f in file_names if not f.endswith("/")]
-
-            # Check for required shapefile components
-            extensions = [".shp", ".shx", ".dbf", ".prj"]
-            valid_files = []
-            for ext in extensions:
-                matching_files = [f for f in file_names if f.endswith(ext)]
-                if len(matching_files) != 1:
-                    return {
-                        "msg": f"ZIP must contain exactly one {ext} file.",
-                        "status": JobStatusType.failed.value,
-                    }
-                valid_files.append(matching_files[0])
-
-            # Check if the main shapefile components share the same base name
-            base_name = os.path.splitext(valid_files[0])[0]
-            if any(f"{base_name}{ext}" not in valid_files for ext in extensions):
-                return {
-                    "msg": "All main shapefile components (.shp, .shx, .dbf, .prj) must share the same base name.",
-                    "status": JobStatusType.failed.value,
-                }
 
-        # Unzip file in temporary directory
-        zip_dir = os.path.join(
-            os.path.dirname(self.file_path),
-            os.path.basename(self.file_path).split(".")[0],
-        )
+        # Remove directories and metadata added by macOS from the list of file names
+        file_names = [
+            f
+            for f in file_names
+            if not f.endswith("/")
+            and not f.startswith("__MACOSX/")
+            and not os.path.basename(f).startswith("._")
+        ]
 
-        # Extra zip file to zip_dir
-        with zipfile.ZipFile(self.file_path) as zip_ref:
-            zip_ref.extractall(zip_dir)
+        # Group the files by base name to find the components of each shapefile
+        extensions = [".shp", ".shx", ".dbf", ".prj"]
+        components = {}
+        shp_files = {}
+        for f in file_names:
+            base_name, ext = os.path.splitext(f)
+            components.setdefault(base_name, set()).add(ext.lower())
+            if ext.lower() == ".shp":
+                shp_files[base_name] = f
+
+        if not shp_files:
+            raise ValueError("ZIP must contain a .shp file.")
+
+        # Check if the main shapefile components share the same base name
+        complete = [
+            base_name
+            for base_name in shp_files
+            if all(ext in components[base_name] for ext in extensions)
+        ]
+        if not complete:
+            raise ValueError(
+                "All main shapefile components (.shp, .shx, .dbf, .prj) must share the same base name."
+            )
+        if len(complete) > 1:
+            raise ValueError(
+                f"ZIP must contain exactly one shapefile, found: {', '.join(shp_files[base_name] for base_name in complete)}."
+            )
+        return shp_files[complete[0]]
+
+    def get_source_path(self) -> str:
+        """Get the path OGR reads the data from. Shapefiles are read from within the ZIP."""
+
+        if self.file_ending == FileUploadType.zip.value:
+            return f"/vsizip/{self.file_path}/{self.find_shapefile()}"
+        return self.file_path
+
+    def validate_shapefile(self):
+        """Validate if ZIP contains a valid shapefile."""
+
+        try:
+            source_path = self.get_source_path()
+        except (ValueError, zipfile.BadZipFile) as e:
+            return {
+                "msg": str(e),
+                "status": JobStatusType.failed.value,
+            }
 
-        return self.validate_ogr(os.path.join(zip_dir, base_name + ".shp"))
+        # Read the shapefile in place without extracting the ZIP
+        result = self.validate_ogr(source_path)
+        if "file_path" in result:
+            result["file_path"] = self.file_path
+        return result
 
     def validate_gpkg(self):
         """Validate geopackage."""
@@ -679,11 +805,32 @@ class OGRFileHandling:
         """Validate kml."""
         return self.validate_ogr(self.file_path)
 
+    def validate_parquet(self):
+        """Validate GeoParquet using the metadata in the footer of the file."""
+
+        try:
+            profile = build_parquet_profile(self.file_path)
+        except (ValueError, OSError, KeyError) as e:
+            return {
+                "msg": f"Parquet is not well-formed: {e}",
+                "status": JobStatusType.failed.value,
+            }
+
+        return {
+            "file_path": self.file_path,
+            "profile": profile.dict(),
+            **self.check_field_types(profile),
+        }
+
+    def validate_flatgeobuf(self):
+        """Validate FlatGeobuf."""
+        return self.validate_ogr(self.file_path)
+
     async def validate(self):
         """Validate file before uploading."""
 
-        # Run validation
-        result = self.method_match_validate[self.file_ending]()
+        # Run validation in a thread as reading the file blocks
+        result = await asyncio.to_thread(self.method_match_validate[self.file_ending])
 
         if result.get("status") == JobStatusType.failed.value:
             return result
@@ -713,69 +860,290 @@ class OGRFileHandling:
         """Delete folder if validation fails."""
         await async_delete_dir(folder_path)
 
-    @job_log(job_step_name="upload")
-    async def upload_ogr2ogr(self, temp_table_name: str, job_id: UUID):
-        """Upload file to database."""
+    def get_target_table(self, data_types: dict) -> str:
+        """Get the user data table the file is imported into."""
 
-        # Initialize OGR
-        ogr.RegisterAll()
+        # Check if table has a geometry if not it is just a normal table
+        if data_types["geometry"].get("column_name") is None:
+            return f"{settings.USER_DATA_SCHEMA}.no_geometry_{str(self.user_id).replace('-', '')}"
 
-        # Setup the input GeoJSON data source
-        driver = ogr.GetDriverByName(self.driver_name)
-        data_source = driver.Open(self.file_path, 0)
-        layer = data_source.GetLayer(0)
-        layer_def = layer.GetLayerDefn()
+        geometry_type = data_types["geometry"]["type"]
+        return f"{settings.USER_DATA_SCHEMA}.{SupportedOgrGeomType[geometry_type].value}_{str(self.user_id).replace('-', '')}"
+
+    async def copy_reader(
+        self,
+        reader: ArrowBatchReader | CsvBatchReader | OgrFeatureBatchReader,
+        table_name: str,
+        on_progress=None,
+    ) -> dict:
+        """Copy all records of a reader into the table within one transaction."""
 
-        # Get geometry type of layer to force multipolygon if any polygon type
-        geometry_type = ogr.GeometryTypeToName(layer_def.GetGeomType()).replace(
-            " ", "_"
+        connection = await get_bulk_load_connection()
+        try:
+            await asyncio.to_thread(reader.open)
+            async with connection.transaction():
+                return await copy_batches(
+                    connection=connection,
+                    table_name=table_name,
+                    columns=reader.columns,
+                    read_batch=reader.read_batch,
+                    on_progress=on_progress,
+                )
+        finally:
+            reader.close()
+            await connection.close()
+
+    async def find_loaded_layer(
+        self, content_hash: str, table_name: str, attribute_mapping: dict
+    ) -> UUID | None:
+        """Find an unchanged layer of the user that was loaded from the same file."""
+
+        upload_cache = UploadCache()
+        entry = await asyncio.to_thread(
+            upload_cache.get_loaded_layer, self.user_id, content_hash
         )
-        if "polygon" in geometry_type.lower():
-            geometry_type = "-nlt MULTIPOLYGON"
-        else:
-            geometry_type = ""
+        if (
+            entry is None
+            or entry["table_name"] != table_name
+            or entry["attribute_mapping"] != attribute_mapping
+        ):
+            return None
 
-        # Prepare the ogr2ogr command
-        if self.file_ending == FileUploadType.gpkg.value:
-            layer_name = layer.GetName()
-        else:
-            layer_name = None
+        # Rows that were edited or deleted since the import can't be reused
+        result = await self.async_session.execute(
+            text(
+                f"""SELECT COUNT(*), MAX(updated_at)
+                FROM {table_name}
+                WHERE layer_id = :layer_id"""
+            ),
+            {"layer_id": entry["layer_id"]},
+        )
+        row_cnt, updated_at = result.fetchone()
+        if row_cnt != entry["row_cnt"] or str(updated_at) != entry["updated_at"]:
+            await asyncio.to_thread(
+                upload_cache.delete_loaded_layer, self.user_id, content_hash
+            )
+            return None
+        return UUID(entry["layer_id"])
 
-        # Build CMD command
-        cmd = (
-            f'ogr2ogr -f "PostgreSQL" "PG:host={settings.POSTGRES_SERVER} dbname={settings.POSTGRES_DB} '
-            f'user={settings.POSTGRES_USER} password={settings.POSTGRES_PASSWORD} port={settings.POSTGRES_PORT}" '
-            f'"{self.file_path}" '
+    async def copy_loaded_layer(
+        self,
+        source_layer_id: UUID,
+        layer_id: UUID,
+        table_name: str,
+        columns: list[str],
+    ) -> dict:
+        """Copy the rows of a layer loaded from the same file within the database."""
+
+        start = time.monotonic()
+        column_names = ", ".join(columns)
+        result = await self.async_session.execute(
+            text(
+                f"""INSERT INTO {table_name} ({column_names}, layer_id)
+                SELECT {column_names}, :layer_id
+                FROM {table_name}
+                WHERE layer_id = :source_layer_id"""
+            ),
+            {"layer_id": layer_id, "source_layer_id": source_layer_id},
         )
-        if layer_name:
-            cmd += f"{layer_name} "
-        cmd += f'-nln {temp_table_name} -t_srs "EPSG:4326" -progress -dim XY {geometry_type} -unsetFieldWidth'
+        await self.async_session.commit()
+        duration = time.monotonic() - start
+        return {
+            "row_cnt": result.rowcount,
+            "duration": duration,
+            "rows_per_second": round(result.rowcount / duration)
+            if duration > 0
+            else result.rowcount,
+        }
+
+    async def register_loaded_layer(
+        self, validation_result: dict, attribute_mapping: dict, layer_id: UUID
+    ):
+        """Remember the layer the file was loaded into to reuse its rows on re-import."""
+
+        content_hash = validation_result.get("content_hash")
+        if content_hash is None:
+            return
+
+        table_name = self.get_target_table(validation_result["data_types"])
+        result = await self.async_session.execute(
+            text(
+                f"""SELECT COUNT(*), MAX(updated_at)
+                FROM {table_name}
+                WHERE layer_id = :layer_id"""
+            ),
+            {"layer_id": layer_id},
+        )
+        row_cnt, updated_at = result.fetchone()
+        if row_cnt == 0:
+            return
+        await asyncio.to_thread(
+            UploadCache().put_loaded_layer,
+            self.user_id,
+            content_hash,
+            {
+                "layer_id": str(layer_id),
+                "table_name": table_name,
+                "attribute_mapping": attribute_mapping,
+                "row_cnt": row_cnt,
+                "updated_at": str(updated_at),
+            },
+        )
+
+    async def copy_file(
+        self,
+        validation_result: dict,
+        attribute_mapping: dict,
+        layer_id: UUID,
+        on_progress=None,
+        worker_cnt: int | None = None,
+    ) -> dict:
+        """Copy the file into the target table and return the import rate.
+
+        Large files are loaded in parallel chunks by up to `worker_cnt` processes, each
+        with its own connection. Raises a DataImportError if the file can't be loaded.
+        """
+
+        worker_cnt = settings.IMPORT_WORKER_CNT if worker_cnt is None else worker_cnt
+        data_types = validation_result["data_types"]
+        geometry_type = None
+        if data_types["geometry"].get("column_name") is not None:
+            geometry_type = SupportedOgrGeomType[data_types["geometry"]["type"]].value
+
+        feature_cnt = None
+        if validation_result.get("profile"):
+            feature_cnt = validation_result["profile"]["feature_cnt"]
+
+        table_name = self.get_target_table(data_types)
         try:
-            # Run as async task
-            task = asyncio.create_task(async_run_command(cmd))
-            await task
+            # Copy the rows of an earlier import of the same file instead of reading it
+            source_layer_id = None
+            if validation_result.get("content_hash"):
+                source_layer_id = await self.find_loaded_layer(
+                    content_hash=validation_result["content_hash"],
+                    table_name=table_name,
+                    attribute_mapping=attribute_mapping,
+                )
+
+            if source_layer_id is not None:
+                result = await self.copy_loaded_layer(
+                    source_layer_id=source_layer_id,
+                    layer_id=layer_id,
+                    table_name=table_name,
+                    columns=list(attribute_mapping.keys())
+                    + (["geom"] + H3_COLUMNS if geometry_type else []),
+                )
+            elif self.file_ending == FileUploadType.csv.value:
+                reader = CsvBatchReader(
+                    file_path=self.file_path,
+                    attribute_mapping=attribute_mapping,
+                    layer_id=layer_id,
+                )
+                result = await self.copy_reader(reader, table_name, on_progress)
+            elif self.file_ending in (
+                FileUploadType.parquet.value,
+                FileUploadType.fgb.value,
+            ):
+                # Load columnar formats in Arrow record batches
+                reader = ArrowBatchReader(
+                    file_path=self.file_path,
+                    driver_name=self.driver_name,
+                    attribute_mapping=attribute_mapping,
+                    layer_id=layer_id,
+                    geometry_type=geometry_type,
+                    geometry_column=data_types["geometry"].get("column_name"),
+                )
+                result = await self.copy_reader(reader, table_name, on_progress)
+            else:
+                source_path = await asyncio.to_thread(self.get_source_path)
+                reader_kwargs = {
+                    "file_path": source_path,
+                    "driver_name": self.driver_name,
+                    "attribute_mapping": attribute_mapping,
+                    "layer_id": layer_id,
+                    "geometry_type": geometry_type,
+                }
+                # Split large files into chunks that are loaded in parallel
+                chunks = []
+                if worker_cnt > 1 and (
+                    feature_cnt is None
+                    or feature_cnt >= settings.IMPORT_PARALLEL_MIN_FEATURES
+                ):
+                    chunks = await asyncio.to_thread(
+                        plan_feature_chunks,
+                        source_path,
+                        self.driver_name,
+                        worker_cnt * 2,
+                        settings.IMPORT_PARALLEL_MIN_FEATURES,
+                        feature_cnt,
+                    )
+                if len(chunks) > 1:
+                    result = await copy_chunks_parallel(
+                        reader_kwargs=reader_kwargs,
+                        chunks=chunks,
+                        table_name=table_name,
+                        worker_cnt=worker_cnt,
+                        on_progress=on_progress,
+                    )
+                else:
+                    reader = OgrFeatureBatchReader(**reader_kwargs)
+                    result = await self.copy_reader(reader, table_name, on_progress)
         except Exception as e:
-            raise Ogr2OgrError(sanitize_error_message(str(e)))
+            raise DataImportError(sanitize_error_message(str(e)))
+        return result
 
-        # Close data source
-        data_source = None
+    @job_log(job_step_name="upload", report_msg=True)
+    async def upload_copy(
+        self,
+        validation_result: dict,
+        attribute_mapping: dict,
+        layer_id: UUID,
+        job_id: UUID,
+    ):
+        """Stream the file into the target table using binary COPY."""
+
+        # Use the feature count of the dataset profile to report the progress
+        feature_cnt = None
+        if validation_result.get("profile"):
+            feature_cnt = validation_result["profile"]["feature_cnt"]
+
+        # Report the import rate while the file is loaded
+        async def report_progress(row_cnt: int, duration: float):
+            progress = f"{row_cnt} of {feature_cnt}" if feature_cnt else str(row_cnt)
+            await crud_job.update_step_msg(
+                async_session=self.async_session,
+                job_id=job_id,
+                job_step_name="upload",
+                msg_text=f"{progress} rows imported ({round(row_cnt / duration)} rows/s).",
+            )
 
-        # Build object for job step status
-        msg = Msg(type=MsgType.info, text="File uploaded.")
+        result = await self.copy_file(
+            validation_result=validation_result,
+            attribute_mapping=attribute_mapping,
+            layer_id=layer_id,
+            on_progress=report_progress,
+        )
 
-        # Delete folder with file
-        await async_delete_dir(self.folder_path)
+        # Build object for job step status
+        msg = Msg(
+            type=MsgType.info,
+            text=f"File uploaded. {result['row_cnt']} rows imported ({result['rows_per_second']} rows/s).",
+        )
         return {
             "msg": msg,
             "status": JobStatusType.finished.value,
+            **result,
         }
 
-    async def upload_ogr2ogr_fail(self, temp_table_name: str):
-        """Delete folder if ogr2ogr upload fails."""
+    async def upload_copy_fail(self, validation_result: dict, layer_id: UUID):
+        """Delete folder and imported rows if the upload fails."""
+
         await self.validate_fail(self.folder_path)
+        target_table = self.get_target_table(validation_result["data_types"])
         await self.async_session.execute(
-            text(f"DROP TABLE IF EXISTS {temp_table_name}")
+            text(f"DELETE FROM {target_table} WHERE layer_id = '{str(layer_id)}'")
         )
+        await crud_layer_statistics.delete_layer(self.async_session, layer_id=layer_id)
         await self.async_session.commit()
 
     async def export_ogr2ogr(
@@ -808,34 +1176,33 @@ class OGRFileHandling:
         )
         await aos.mkdir(self.folder_path)
 
+        return await self.run_ogr2ogr(
+            layer=layer, file_type=file_type, sql_query=sql_query, crs=crs
+        )
+
+    async def run_ogr2ogr(
+        self,
+        layer: Layer,
+        file_type: TableLayerExportType | FeatureLayerExportType,
+        sql_query: str,
+        crs: str,
+        layer_name: str | None = None,
+    ):
+        """Write the result of a query into the file with ogr2ogr.
+
+        The folder of the file has to exist.
+        """
+
         if layer.type == LayerType.feature.value:
-            # Define target CRS
-            target_crs = CRS(crs)
-
-            # Get the layer's extent
-            minx, miny, maxx, maxy = wkb.loads(layer.extent.desc, hex=True).bounds
-
-            # Check if the layer's extent falls within the bounds of the target CRS
-            if not (
-                target_crs.area_of_use.west
-                <= minx
-                <= maxx
-                <= target_crs.area_of_use.east
-                and target_crs.area_of_use.south
-                <= miny
-                <= maxy
-                <= target_crs.area_of_use.north
-            ):
-                raise DataOutCRSBoundsError(
-                    "The data is outside the bounds of the provided CRS."
-                )
+            check_crs_bounds(layer=layer, crs=crs)
             to_crs_flag = f"""-t_srs "{crs}" """
         else:
             to_crs_flag = ""
 
         # Build CMD command
         sql_query = sql_query.replace('"', '\\"')
-        cmd = f"""ogr2ogr -f "{OgrDriverType[file_type.value].value}" "{self.file_path}" PG:"host={settings.POSTGRES_SERVER} dbname={settings.POSTGRES_DB} user={settings.POSTGRES_USER} password={settings.POSTGRES_PASSWORD} port={settings.POSTGRES_PORT}" -sql "{sql_query}" -nln "{layer.name}" {to_crs_flag} -progress"""
+        layer_name = (layer_name or layer.name).replace('"', '\\"')
+        cmd = f"""ogr2ogr -f "{OgrDriverType[file_type.value].value}" "{self.file_path}" PG:"host={settings.POSTGRES_SERVER} dbname={settings.POSTGRES_DB} user={settings.POSTGRES_USER} password={settings.POSTGRES_PASSWORD} port={settings.POSTGRES_PORT}" -sql "{sql_query}" -nln "{layer_name}" {to_crs_flag} -progress"""
         try:
             # Run as async task
             task = asyncio.create_task(async_run_command(cmd))
@@ -845,57 +1212,76 @@ class OGRFileHandling:
 
         return self.file_path
 
+    async def check_h3_cells(self, table_name: str, layer_id: UUID):
+        """Check a sample of the H3 cells computed on import against the h3 trigger.
+
+        If any cell differs, the cells of the whole layer are recomputed by the trigger.
+        """
+
+        h3_cell_sql = f"""
+            h3_3 IS DISTINCT FROM basic.to_short_h3_3(h3_lat_lng_to_cell(ST_CENTROID(geom)::point, 3)::bigint)
+            OR h3_group IS DISTINCT FROM h3_lat_lng_to_cell(ST_CENTROID(geom)::point, {H3_GROUP_RESOLUTION})
+        """
+        result = await self.async_session.execute(
+            text(
+                f"""SELECT COUNT(*)
+                FROM (
+                    SELECT h3_3, h3_group, geom
+                    FROM {table_name}
+                    WHERE layer_id = :layer_id
+                    LIMIT :sample_size
+                ) sample
+                WHERE {h3_cell_sql}"""
+            ),
+            {
+                "layer_id": layer_id,
+                "sample_size": settings.IMPORT_H3_CHECK_SAMPLE_SIZE,
+            },
+        )
+        mismatch_cnt = result.scalar()
+        if mismatch_cnt:
+            print_warning(
+                f"{mismatch_cnt} H3 cells of layer {layer_id} differ from the trigger. Recomputing the cells."
+            )
+            # The trigger computes the cells of updated rows
+            await self.async_session.execute(
+                text(
+                    f"UPDATE {table_name} SET h3_group = NULL WHERE layer_id = :layer_id"
+                ),
+                {"layer_id": layer_id},
+            )
+            await self.async_session.commit()
+
+    async def finalize_target_table(self, validation_result: dict, layer_id: UUID):
+        """Check the imported rows, update the table statistics and delete the file."""
+
+        # The rows are already copied into the target table. Update the planner statistics as the table grew in bulk.
+        target_table = self.get_target_table(validation_result["data_types"])
+        if (
+            settings.IMPORT_COMPUTE_H3
+            and validation_result["data_types"]["geometry"].get("column_name")
+            is not None
+        ):
+            await self.check_h3_cells(target_table, layer_id)
+        await self.async_session.execute(text(f"ANALYZE {target_table}"))
+        await self.async_session.commit()
+
+        # Delete folder with file
+        await async_delete_dir(self.folder_path)
+
     # @timeout(120)
     @job_log(job_step_name="migration")
     async def migrate_target_table(
         self,
         validation_result: dict,
-        attribute_mapping: dict,
-        temp_table_name: str,
         layer_id: UUID,
         job_id: UUID,
     ):
-        """Migrate data from temporary table to target table."""
+        """Finalize the import into the target table."""
 
-        data_types = validation_result["data_types"]
-        geom_column = data_types["geometry"].get("column_name")
-
-        # Check if table has a geometry if not it is just a normal table
-        if geom_column is None:
-            target_table = f"{settings.USER_DATA_SCHEMA}.no_geometry_{str(self.user_id).replace('-', '')}"
-            select_geom = ""
-            insert_geom = ""
-            filter_null_geom = ""
-        else:
-            geometry_type = data_types["geometry"]["type"]
-            target_table = f"{settings.USER_DATA_SCHEMA}.{SupportedOgrGeomType[geometry_type].value}_{str(self.user_id).replace('-', '')}"
-            select_geom = f"{geom_column} as geom, "
-            insert_geom = "geom, "
-            filter_null_geom = f"WHERE ST_IsEmpty({geom_column}) IS FALSE"
-        select_statement = ""
-        insert_statement = ""
-
-        # Build select and insert statement
-        for i in attribute_mapping:
-            data_type = i.split("_")[0]
-            select_statement += f""""{attribute_mapping[i]}"::{data_type} as {i}, """
-            insert_statement += f"{i}, "
-        select_statement = f"""SELECT {select_statement} {select_geom} '{str(layer_id)}' FROM {temp_table_name} {filter_null_geom}"""
-
-        # Insert data in target table
-        await self.async_session.execute(
-            text(
-                f"INSERT INTO {target_table}({insert_statement} {insert_geom} layer_id) {select_statement}"
-            )
-        )
-        await self.async_session.commit()
-
-        # Delete temporary table
-        await self.async_session.execute(
-            text(f"DROP TABLE IF EXISTS {temp_table_name}")
+        await self.finalize_target_table(
+            validation_result=validation_result, layer_id=layer_id
         )
-        await self.async_session.commit()
-
         return {
             "msg": Msg(type=MsgType.info, text="Data migrated."),
             "status": JobStatusType.finished.value,
@@ -904,28 +1290,23 @@ class OGRFileHandling:
     async def migrate_target_table_fail(
         self,
         validation_result: dict,
-        attribute_mapping: dict,
-        temp_table_name: str,
         layer_id: UUID,
     ):
-        """Delete folder if ogr2ogr upload fails."""
+        """Delete folder and imported rows if the migration fails."""
 
-        # Delete data from user table if already inserted
-        data_types = validation_result["data_types"]
-        geom_column = data_types["geometry"].get("column_name")
+        await self.upload_copy_fail(
+            validation_result=validation_result, layer_id=layer_id
+        )
 
-        # Check if table has a geometry if not it is just a normal table
-        if geom_column is None:
-            target_table = f"{settings.USER_DATA_SCHEMA}.no_geometry_{str(self.user_id).replace('-', '')}"
-        else:
-            geometry_type = data_types["geometry"]["type"]
-            target_table = f"{settings.USER_DATA_SCHEMA}.{SupportedOgrGeomType[geometry_type].value}_{str(self.user_id).replace('-', '')}"
 
-        await self.upload_ogr2ogr_fail(temp_table_name)
-        await self.async_session.execute(
-            text(f"DELETE FROM {target_table} WHERE layer_id = '{str(layer_id)}'")
-        )
-        await self.async_session.commit()
+def validate_dataset(user_id: UUID, file_path: str) -> dict:
+    """Validate a dataset file in a worker process."""
+
+    return asyncio.run(
+        OGRFileHandling(
+            async_session=None, user_id=user_id, file_path=file_path
+        ).validate()
+    )
 
 
 async def delete_layer_data(async_session: AsyncSession, layer: Layer):
@@ -935,4 +1316,9 @@ async def delete_layer_data(async_session: AsyncSession, layer: Layer):
     await async_session.execute(
         text(f"DELETE FROM {layer.table_name} WHERE layer_id = '{layer.id}'")
     )
+    # The stored row count and statistics describe the deleted data
+    await crud_layer_statistics.delete_layer(async_session, layer_id=layer.id)
     await async_session.commit()
+
+    # Delete the results computed from the data
+    invalidate_layer(layer.id)
@@ -0,0 +1,211 @@
+# Standard library imports
+import asyncio
+import json
+import math
+from typing import Awaitable, Callable, List, Tuple
+from uuid import uuid4
+
+# Third party imports
+import aiofiles
+import aiohttp
+from osgeo import gdal, ogr, osr
+from shapely.geometry import mapping, shape
+from shapely.ops import linemerge, unary_union
+
+# Local application imports
+from src.core.config import settings
+
+MVT_ID_FIELD = "mvt_id"
+MAX_LATITUDE = 85.0511287798066
+
+
+class MVTTileLimitError(ValueError):
+    """Raised if the requested extent covers more tiles than allowed."""
+
+    pass
+
+
+def lonlat_to_tile(lon: float, lat: float, zoom: int) -> Tuple[int, int]:
+    """Get the x and y of the Web Mercator tile containing a coordinate."""
+
+    lat = max(min(lat, MAX_LATITUDE), -MAX_LATITUDE)
+    tile_cnt = 2**zoom
+    x = int((lon + 180) / 360 * tile_cnt)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * tile_cnt)
+    return min(max(x, 0), tile_cnt - 1), min(max(y, 0), tile_cnt - 1)
+
+
+def get_tiles(bbox: List[float], zoom: int) -> List[Tuple[int, int, int]]:
+    """Get the tiles covering a bounding box of west, south, east, north in EPSG:4326."""
+
+    west, south, east, north = bbox
+    min_x, min_y = lonlat_to_tile(west, north, zoom)
+    max_x, max_y = lonlat_to_tile(east, south, zoom)
+    return [
+        (zoom, x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)
+    ]
+
+
+def decode_tile(data: bytes, z: int, x: int, y: int, layer_name: str) -> list:
+    """Decode the features of a layer in a tile to GeoJSON in EPSG:4326.
+
+    Features are returned as tuples of their MVT id, properties and geometry. The
+    geometries are clipped to the tile, so features with an id may continue in
+    neighbouring tiles.
+    """
+
+    file_path = f"/vsimem/{uuid4().hex}.pbf"
+    gdal.FileFromMemBuffer(file_path, data)
+    try:
+        data_source = gdal.OpenEx(
+            file_path,
+            gdal.OF_VECTOR,
+            allowed_drivers=["MVT"],
+            open_options=[f"Z={z}", f"X={x}", f"Y={y}"],
+        )
+        if data_source is None:
+            raise ValueError(f"Could not decode tile {z}/{x}/{y}.")
+
+        # Layers without features in the tile are left out of it
+        layer = data_source.GetLayerByName(layer_name)
+        if layer is None:
+            return []
+
+        target_srs = osr.SpatialReference()
+        target_srs.ImportFromEPSG(4326)
+        target_srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        transform = osr.CoordinateTransformation(layer.GetSpatialRef(), target_srs)
+        has_id = layer.GetLayerDefn().GetFieldIndex(MVT_ID_FIELD) != -1
+
+        features = []
+        for feature in layer:
+            geometry = feature.GetGeometryRef()
+            if geometry is None or geometry.IsEmpty():
+                continue
+            geometry.Transform(transform)
+            properties = feature.items()
+            feature_id = properties.pop(MVT_ID_FIELD, None) if has_id else None
+            features.append(
+                (feature_id, properties, json.loads(geometry.ExportToJson()))
+            )
+        return features
+    finally:
+        data_source = None
+        gdal.Unlink(file_path)
+
+
+def merge_geometries(geometries: list) -> dict:
+    """Merge the parts of a feature split at the tile boundaries."""
+
+    if len(geometries) == 1:
+        return geometries[0]
+    merged = unary_union([shape(geometry) for geometry in geometries])
+    if merged.geom_type == "MultiLineString":
+        merged = linemerge(merged)
+    return mapping(merged)
+
+
+class MVTFetcher:
+    """Fetch the features of a vector tile layer within an extent into a GeoJSON file.
+
+    The tiles covering the extent at the zoom level are requested concurrently and
+    decoded as they arrive. Features without an id are written right away. Features
+    with an id are collected across tiles and written once all tiles are fetched,
+    with their parts merged into one geometry.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        layer_name: str,
+        bbox: List[float],
+        zoom: int,
+        max_tile_cnt: int | None = None,
+        concurrency: int | None = None,
+        on_progress: Callable[[int, int], Awaitable[None]] | None = None,
+    ):
+        self.url = url
+        self.layer_name = layer_name
+        self.tiles = get_tiles(bbox, zoom)
+        self.max_tile_cnt = max_tile_cnt or settings.MVT_MAX_TILE_CNT
+        self.concurrency = concurrency or settings.MVT_CONCURRENCY
+        self.on_progress = on_progress
+
+    def get_tile_url(self, z: int, x: int, y: int) -> str:
+        return (
+            self.url.replace("{z}", str(z))
+            .replace("{x}", str(x))
+            .replace("{y}", str(y))
+        )
+
+    async def get_tile(
+        self, session: aiohttp.ClientSession, z: int, x: int, y: int
+    ) -> list:
+        """Get the decoded features of a tile."""
+
+        async with session.get(self.get_tile_url(z, x, y)) as response:
+            # Tile servers skip tiles without data
+            if response.status in (204, 404):
+                return []
+            response.raise_for_status()
+            data = await response.read()
+        if not data:
+            return []
+        return await asyncio.to_thread(decode_tile, data, z, x, y, self.layer_name)
+
+    async def fetch(self, output_file: str) -> int:
+        """Write the features into a GeoJSON file and return their count."""
+
+        if len(self.tiles) > self.max_tile_cnt:
+            raise MVTTileLimitError(
+                f"The extent covers too many tiles ({len(self.tiles)}). Max tile count is {self.max_tile_cnt}."
+            )
+
+        timeout = aiohttp.ClientTimeout(
+            total=None,
+            connect=settings.ASYNC_CLIENT_DEFAULT_TIMEOUT,
+            sock_read=settings.ASYNC_CLIENT_READ_TIMEOUT,
+        )
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        feature_cnt = 0
+        split_features = {}
+        async with aiohttp.ClientSession(
+            timeout=timeout, connector=connector
+        ) as session, aiofiles.open(output_file, "w") as f:
+            await f.write('{"type": "FeatureCollection", "features": [\n')
+
+            async def write_feature(properties: dict, geometry: dict):
+                nonlocal feature_cnt
+                feature = {
+                    "type": "Feature",
+                    "properties": properties,
+                    "geometry": geometry,
+                }
+                await f.write((",\n" if feature_cnt else "") + json.dumps(feature))
+                feature_cnt += 1
+
+            tasks = [
+                asyncio.create_task(self.get_tile(session, *tile))
+                for tile in self.tiles
+            ]
+            try:
+                for tile_cnt, task in enumerate(asyncio.as_completed(tasks), 1):
+                    for feature_id, properties, geometry in await task:
+                        if feature_id is None:
+                            await write_feature(properties, geometry)
+                        elif feature_id in split_features:
+                            split_features[feature_id][1].append(geometry)
+                        else:
+                            split_features[feature_id] = (properties, [geometry])
+                    if self.on_progress is not None:
+                        await self.on_progress(tile_cnt, len(self.tiles))
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+            # Stitch the features split at the tile boundaries
+            for properties, geometries in split_features.values():
+                await write_feature(properties, merge_geometries(geometries))
+            await f.write("\n]}\n")
+        return feature_cnt
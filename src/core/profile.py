@@ -0,0 +1,447 @@
+# Standard library imports
+import csv
+import json
+import re
+from typing import List
+
+# Third party imports
+import pyarrow as pa
+import pyarrow.parquet as pq
+from osgeo import ogr, osr
+
+# Local application imports
+from src.core.config import settings
+from src.schemas.layer import DatasetProfile, FieldProfile
+
+INTEGER_PATTERN = re.compile(r"^[+-]?\d+$")
+REAL_PATTERN = re.compile(r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$")
+INTEGER_MAX = 2**31 - 1
+INTEGER64_MAX = 2**63 - 1
+
+# OGR field types that can be inferred from CSV values ordered from narrow to wide
+CSV_FIELD_TYPES = ["Integer", "Integer64", "Real", "String"]
+
+# OGR field types for which the min and max values are collected
+OGR_INTEGER_FIELD_TYPES = {ogr.OFTInteger, ogr.OFTInteger64}
+OGR_TEMPORAL_FIELD_TYPES = {ogr.OFTDate, ogr.OFTTime, ogr.OFTDateTime}
+OGR_MIN_MAX_FIELD_TYPES = (
+    OGR_INTEGER_FIELD_TYPES | {ogr.OFTReal} | OGR_TEMPORAL_FIELD_TYPES
+)
+
+# GeoParquet files without a CRS use longitude/latitude on WGS84
+GEOPARQUET_DEFAULT_SRS = "EPSG:4326"
+# Geometry type names of GeoParquet mapped to the names used by OGR
+GEOPARQUET_GEOMETRY_TYPES = {
+    "Point": "Point",
+    "LineString": "Line_String",
+    "Polygon": "Polygon",
+    "MultiPoint": "Multi_Point",
+    "MultiLineString": "Multi_Line_String",
+    "MultiPolygon": "Multi_Polygon",
+    "GeometryCollection": "Geometry_Collection",
+}
+
+
+def infer_csv_value_type(value: str) -> str:
+    """Infer the OGR field type of a single CSV value."""
+
+    value = value.strip()
+    if INTEGER_PATTERN.match(value):
+        number = abs(int(value))
+        if number <= INTEGER_MAX:
+            return "Integer"
+        elif number <= INTEGER64_MAX:
+            return "Integer64"
+        return "Real"
+    if REAL_PATTERN.match(value):
+        return "Real"
+    return "String"
+
+
+def widen_field_type(field_type: str | None, value_type: str) -> str:
+    """Get the narrowest field type that can hold values of both types."""
+
+    if field_type is None:
+        return value_type
+    return max(field_type, value_type, key=CSV_FIELD_TYPES.index)
+
+
+def get_extent_wkt(
+    min_x: float,
+    max_x: float,
+    min_y: float,
+    max_y: float,
+    source_srs: osr.SpatialReference,
+) -> str:
+    """Get an extent as multipolygon in EPSG:4326."""
+
+    # Define the target SRS (EPSG:4326)
+    target_srs = osr.SpatialReference()
+    target_srs.ImportFromEPSG(4326)
+
+    # Create a coordinate transformation
+    transform = osr.CoordinateTransformation(source_srs, target_srs)
+
+    # Transform the coordinates
+    min_point = ogr.Geometry(ogr.wkbPoint)
+    min_point.AddPoint(min_x, min_y)
+    min_point.Transform(transform)
+
+    max_point = ogr.Geometry(ogr.wkbPoint)
+    max_point.AddPoint(max_x, max_y)
+    max_point.Transform(transform)
+
+    # Get the transformed coordinates, EPSG:4326 uses the latitude/longitude order
+    min_y, min_x, _ = min_point.GetPoint()
+    max_y, max_x, _ = max_point.GetPoint()
+
+    return f"MULTIPOLYGON((({min_x} {min_y}, {min_x} {max_y}, {max_x} {max_y}, {max_x} {min_y}, {min_x} {min_y})))"
+
+
+def build_ogr_profile(data_source: ogr.DataSource, layer: ogr.Layer) -> DatasetProfile:
+    """Profile an OGR layer without reading its features in Python.
+
+    The feature count and the extent are taken from the driver, which reads them from
+    the header or index if the format stores them. The null ratio and min/max values of
+    the fields are aggregated in one SQL query run by the driver. The geometry type is
+    taken from the first geometry if the layer doesn't declare one.
+    """
+
+    layer_def = layer.GetLayerDefn()
+    layer_name = layer.GetName()
+    has_geometry = layer_def.GetGeomFieldCount() == 1
+    geometry_type = layer_def.GetGeomType() if has_geometry else None
+    field_defs = [layer_def.GetFieldDefn(i) for i in range(layer_def.GetFieldCount())]
+
+    # A negative count means the driver would have to scan the layer to count it
+    feature_cnt = layer.GetFeatureCount(force=0)
+    summaries = [] if feature_cnt >= 0 else ["COUNT(*)"]
+    for field_def in field_defs:
+        summaries.append(f'COUNT("{field_def.GetName()}")')
+        if field_def.GetType() in OGR_MIN_MAX_FIELD_TYPES:
+            summaries.append(f'MIN("{field_def.GetName()}")')
+            summaries.append(f'MAX("{field_def.GetName()}")')
+
+    summary_values = []
+    if summaries:
+        result = data_source.ExecuteSQL(
+            f'SELECT {", ".join(summaries)} FROM "{layer_name}"'
+        )
+        if result is None:
+            raise ValueError(f"Could not aggregate the fields of layer {layer_name}.")
+        feature = result.GetNextFeature()
+        summary_values = [
+            feature.GetFieldAsString(i) if feature.IsFieldSetAndNotNull(i) else None
+            for i in range(feature.GetFieldCount())
+        ]
+        data_source.ReleaseResultSet(result)
+    if feature_cnt < 0:
+        feature_cnt = int(summary_values.pop(0))
+
+    fields = []
+    for field_def in field_defs:
+        field_type_code = field_def.GetType()
+        null_cnt = feature_cnt - int(summary_values.pop(0) or 0)
+        min_value, max_value = None, None
+        if field_type_code in OGR_MIN_MAX_FIELD_TYPES:
+            min_value, max_value = summary_values.pop(0), summary_values.pop(0)
+            if min_value is not None and field_type_code in OGR_INTEGER_FIELD_TYPES:
+                # Integers can be returned as real values by the aggregation
+                min_value, max_value = int(float(min_value)), int(float(max_value))
+            elif min_value is not None and field_type_code == ogr.OFTReal:
+                min_value, max_value = float(min_value), float(max_value)
+        fields.append(
+            FieldProfile(
+                name=field_def.GetName(),
+                type=field_def.GetFieldTypeName(field_type_code),
+                null_ratio=null_cnt / feature_cnt if feature_cnt else 0,
+                min=min_value,
+                max=max_value,
+            )
+        )
+
+    profile = DatasetProfile(feature_cnt=feature_cnt, fields=fields)
+    if has_geometry:
+        geometry_column = layer_def.GetGeomFieldDefn(0).GetName()
+        profile.geometry_column = geometry_column or "wkb_geometry"
+        if geometry_type == ogr.wkbUnknown:
+            layer.ResetReading()
+            for feature in layer:
+                geometry = feature.GetGeometryRef()
+                if geometry is not None and not geometry.IsEmpty():
+                    geometry_type = geometry.GetGeometryType()
+                    break
+            layer.ResetReading()
+        if geometry_type != ogr.wkbUnknown:
+            profile.geometry_type = ogr.GeometryTypeToName(geometry_type).replace(
+                " ", "_"
+            )
+        spatial_ref = layer.GetSpatialRef()
+        if spatial_ref is not None:
+            profile.srs = "EPSG:" + str(spatial_ref.GetAuthorityCode(None))
+            extent = layer.GetExtent(can_return_null=True)
+            if extent is not None:
+                min_x, max_x, min_y, max_y = extent
+                profile.extent = get_extent_wkt(min_x, max_x, min_y, max_y, spatial_ref)
+    return profile
+
+
+def get_arrow_field_type(data_type: pa.DataType) -> str:
+    """Get the OGR field type name matching an Arrow data type."""
+
+    if (
+        pa.types.is_boolean(data_type)
+        or pa.types.is_int8(data_type)
+        or pa.types.is_int16(data_type)
+        or pa.types.is_int32(data_type)
+        or pa.types.is_uint8(data_type)
+        or pa.types.is_uint16(data_type)
+    ):
+        return "Integer"
+    if pa.types.is_integer(data_type):
+        return "Integer64"
+    if pa.types.is_floating(data_type) or pa.types.is_decimal(data_type):
+        return "Real"
+    if pa.types.is_string(data_type) or pa.types.is_large_string(data_type):
+        return "String"
+    if pa.types.is_date(data_type):
+        return "Date"
+    if pa.types.is_time(data_type):
+        return "Time"
+    if pa.types.is_timestamp(data_type):
+        return "DateTime"
+    # Types without a matching column type e.g. lists or structs
+    return str(data_type)
+
+
+def get_geoparquet_metadata(parquet_file: pq.ParquetFile) -> dict | None:
+    """Get the metadata of the primary geometry column of a GeoParquet file."""
+
+    metadata = parquet_file.schema_arrow.metadata or {}
+    if b"geo" not in metadata:
+        return None
+    geo = json.loads(metadata[b"geo"])
+    primary_column = geo["primary_column"]
+    return {"column_name": primary_column, **geo["columns"][primary_column]}
+
+
+def get_geoparquet_srs(geo: dict) -> osr.SpatialReference:
+    """Get the spatial reference of a GeoParquet geometry column."""
+
+    srs = osr.SpatialReference()
+    srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+    if geo.get("crs") is None:
+        srs.SetFromUserInput(GEOPARQUET_DEFAULT_SRS)
+    else:
+        # The CRS is stored as PROJJSON
+        srs.SetFromUserInput(json.dumps(geo["crs"]))
+    return srs
+
+
+def get_geoparquet_geometry_type(
+    parquet_file: pq.ParquetFile, geo: dict
+) -> str | None:
+    """Get the OGR geometry type name of a GeoParquet file.
+
+    The type is taken from the metadata. If the metadata lists several or no types, the
+    first geometry is read instead, as it is done for OGR layers without a type.
+    """
+
+    geometry_types = {
+        GEOPARQUET_GEOMETRY_TYPES.get(geometry_type.split(" ")[0])
+        for geometry_type in geo.get("geometry_types", [])
+    }
+    if len(geometry_types) == 1:
+        return geometry_types.pop()
+    # Single and multi geometries of the same type are stored alike
+    if len(geometry_types) == 2 and None not in geometry_types:
+        single_types = {
+            geometry_type.replace("Multi_", "") for geometry_type in geometry_types
+        }
+        if len(single_types) == 1:
+            return "Multi_" + single_types.pop()
+
+    for batch in parquet_file.iter_batches(
+        batch_size=1000, columns=[geo["column_name"]]
+    ):
+        for wkb in batch.column(0).to_pylist():
+            if wkb is not None:
+                geometry = ogr.CreateGeometryFromWkb(wkb)
+                return ogr.GeometryTypeToName(
+                    ogr.GT_Flatten(geometry.GetGeometryType())
+                ).replace(" ", "_")
+    return None
+
+
+def build_parquet_profile(file_path: str) -> DatasetProfile:
+    """Profile a (Geo)Parquet file from its footer without scanning the data.
+
+    The null ratio and min/max values are aggregated from the statistics of the row
+    groups and the extent from the bounding box of the GeoParquet metadata.
+    """
+
+    parquet_file = pq.ParquetFile(file_path)
+    metadata = parquet_file.metadata
+    schema = parquet_file.schema_arrow
+    geo = get_geoparquet_metadata(parquet_file)
+    feature_cnt = metadata.num_rows
+
+    # Statistics are stored per leaf column, which differ from the fields for nested types
+    column_index = {
+        metadata.schema.column(i).path: i for i in range(metadata.num_columns)
+    }
+
+    fields = []
+    for field in schema:
+        if geo is not None and field.name == geo["column_name"]:
+            continue
+        field_type = get_arrow_field_type(field.type)
+        null_cnt, min_value, max_value = 0, None, None
+        collect_min_max = field_type in (
+            "Integer",
+            "Integer64",
+            "Real",
+        ) and not pa.types.is_boolean(field.type)
+        column_idx = column_index.get(field.name)
+        for row_group in range(metadata.num_row_groups):
+            if column_idx is None:
+                break
+            statistics = metadata.row_group(row_group).column(column_idx).statistics
+            if statistics is None:
+                collect_min_max = False
+                continue
+            if statistics.has_null_count:
+                null_cnt += statistics.null_count
+            if collect_min_max and statistics.has_min_max:
+                if min_value is None or statistics.min < min_value:
+                    min_value = statistics.min
+                if max_value is None or statistics.max > max_value:
+                    max_value = statistics.max
+        if field_type == "Real" and min_value is not None:
+            min_value, max_value = float(min_value), float(max_value)
+        fields.append(
+            FieldProfile(
+                name=field.name,
+                type=field_type,
+                null_ratio=null_cnt / feature_cnt if feature_cnt else 0,
+                min=min_value if collect_min_max else None,
+                max=max_value if collect_min_max else None,
+            )
+        )
+
+    profile = DatasetProfile(feature_cnt=feature_cnt, fields=fields)
+    if geo is not None:
+        srs = get_geoparquet_srs(geo)
+        profile.geometry_column = geo["column_name"]
+        profile.geometry_type = get_geoparquet_geometry_type(parquet_file, geo)
+        profile.srs = "EPSG:" + str(srs.GetAuthorityCode(None))
+        bbox = geo.get("bbox")
+        if bbox:
+            # The bounding box has six values if it includes the z-coordinate
+            if len(bbox) == 6:
+                min_x, min_y, _, max_x, max_y, _ = bbox
+            else:
+                min_x, min_y, max_x, max_y = bbox
+            profile.extent = get_extent_wkt(min_x, max_x, min_y, max_y, srs)
+    return profile
+
+
+class CSVProfiler:
+    """Infer the field types of a CSV file while streaming through it.
+
+    The types are inferred from a bounded sample of the first rows. The remaining rows
+    are validated against these types in a full pass, widening a type if a value does
+    not fit (e.g. Integer to Real). Only one row is held in memory at a time.
+    """
+
+    def __init__(
+        self, file_path: str, sample_size: int = settings.CSV_PROFILE_SAMPLE_SIZE
+    ):
+        self.file_path = file_path
+        self.sample_size = sample_size
+
+    def profile(self) -> DatasetProfile:
+        """Profile the CSV file. Raises a ValueError if the file is not well-formed."""
+
+        with open(self.file_path, "r", newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            try:
+                header = next(reader)
+            except StopIteration:
+                raise ValueError("File is empty.")
+
+            field_types: List[str | None] = [None] * len(header)
+            null_cnt = [0] * len(header)
+            min_values: List[int | float | None] = [None] * len(header)
+            max_values: List[int | float | None] = [None] * len(header)
+            row_cnt = 0
+            for row in reader:
+                # Skip blank lines
+                if not row:
+                    continue
+                if len(row) != len(header):
+                    raise ValueError(
+                        f"Row {row_cnt + 2} has {len(row)} values but the header has {len(header)} columns."
+                    )
+                row_cnt += 1
+
+                for i, value in enumerate(row):
+                    if value == "":
+                        null_cnt[i] += 1
+                        continue
+
+                    field_type = field_types[i]
+                    if field_type == "String":
+                        continue
+
+                    # Infer the types on the sample and only validate them afterwards
+                    if (
+                        row_cnt <= self.sample_size
+                        or field_type is None
+                        or not self.conforms(value, field_type)
+                    ):
+                        field_type = widen_field_type(
+                            field_type, infer_csv_value_type(value)
+                        )
+                        field_types[i] = field_type
+                        if field_type == "String":
+                            continue
+
+                    value = value.strip()
+                    number = int(value) if INTEGER_PATTERN.match(value) else float(value)
+                    if min_values[i] is None or number < min_values[i]:
+                        min_values[i] = number
+                    if max_values[i] is None or number > max_values[i]:
+                        max_values[i] = number
+
+        fields = []
+        for i, name in enumerate(header):
+            # Columns without any values are saved as text
+            field_type = field_types[i] or "String"
+            min_value, max_value = None, None
+            if field_type == "Real":
+                min_value, max_value = float(min_values[i]), float(max_values[i])
+            elif field_type != "String":
+                min_value, max_value = min_values[i], max_values[i]
+            fields.append(
+                FieldProfile(
+                    name=name,
+                    type=field_type,
+                    null_ratio=null_cnt[i] / row_cnt if row_cnt else 0,
+                    min=min_value,
+                    max=max_value,
+                )
+            )
+        return DatasetProfile(feature_cnt=row_cnt, fields=fields)
+
+    @staticmethod
+    def conforms(value: str, field_type: str) -> bool:
+        """Check if a value can be stored in a field of the given type."""
+
+        value = value.strip()
+        if field_type == "Real":
+            return REAL_PATTERN.match(value) is not None
+        if not INTEGER_PATTERN.match(value):
+            return False
+        max_value = INTEGER_MAX if field_type == "Integer" else INTEGER64_MAX
+        return abs(int(value)) <= max_value
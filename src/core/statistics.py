@@ -1,10 +1,17 @@
+import math
+
+import numpy as np
 from pydantic import BaseModel
 
+from src.core.cache import MemoryCache
+from src.core.config import settings
+from src.db.models.layer_statistics import LayerColumnStatistics
 from src.schemas.error import (
     ColumnTypeError,
     GeometryTypeError,
 )
 from src.schemas.layer import (
+    ComputeBreakOperation,
     FeatureGeometryType,
     OgrPostgresType,
 )
@@ -13,6 +20,31 @@ from src.schemas.toolbox_base import (
 )
 from src.utils import search_value
 
+# Class breaks of all operations by layer, column and filter
+class_breaks_cache = MemoryCache(
+    "class_breaks",
+    max_entries=settings.CLASS_BREAKS_CACHE_SIZE,
+    max_age=settings.CLASS_BREAKS_CACHE_MAX_AGE,
+)
+# Most frequent values and the number of unique values by layer, column and filter
+unique_values_cache = MemoryCache(
+    "unique_values",
+    max_entries=settings.UNIQUE_VALUES_CACHE_SIZE,
+    max_age=settings.UNIQUE_VALUES_CACHE_MAX_AGE,
+)
+# Filtered feature counts by layer and filter
+feature_count_cache = MemoryCache(
+    "feature_count",
+    max_entries=settings.FEATURE_COUNT_CACHE_SIZE,
+    max_age=settings.FEATURE_COUNT_CACHE_MAX_AGE,
+)
+# Aggregations of layer projects by layer and query
+statistic_aggregation_cache = MemoryCache(
+    "statistic_aggregation",
+    max_entries=settings.STATISTIC_AGGREGATION_CACHE_SIZE,
+    max_age=settings.STATISTIC_AGGREGATION_CACHE_MAX_AGE,
+)
+
 
 class StatisticsBase:
     """Helper functions that support statistical operations for endpoints."""
@@ -108,3 +140,376 @@ class StatisticsBase:
             raise ColumnTypeError(
                 f"Field has to be {OgrPostgresType.Integer}, {OgrPostgresType.Real}, {OgrPostgresType.Integer64}."
             )
+
+
+# Integers beyond this magnitude aren't represented exactly by the stored floats
+MAX_EXACT_FLOAT_INTEGER = 2**53
+
+
+def has_exact_statistics(statistics: LayerColumnStatistics) -> bool:
+    """Check if the stored number statistics represent the values of a column exactly.
+
+    Bigint values beyond 2^53 are rounded by the floats the statistics are stored as.
+    """
+
+    if (
+        statistics.column_name.split("_")[0] != OgrPostgresType.Integer64
+        or statistics.min is None
+    ):
+        return True
+    return max(abs(statistics.min), abs(statistics.max)) < MAX_EXACT_FLOAT_INTEGER
+
+
+def get_unique_values_from_statistics(
+    statistics: LayerColumnStatistics, order: str, page: int, size: int
+) -> tuple[list[dict], int] | None:
+    """Get a page of the unique values of a column ordered by their count.
+
+    Returns None if the page isn't within the most frequent values of the statistics.
+    Values with the same count are ordered by value as the stored values are.
+    """
+
+    if statistics.top_values is None or statistics.distinct_cnt is None:
+        return None
+    is_complete = statistics.distinct_cnt <= len(statistics.top_values)
+    start = (page - 1) * size
+    if order == "descendent":
+        if not is_complete and start + size > len(statistics.top_values):
+            return None
+        values = sorted(
+            statistics.top_values, key=lambda value: value["count"], reverse=True
+        )
+    else:
+        # The least frequent values are only known if all values are stored
+        if not is_complete:
+            return None
+        values = sorted(statistics.top_values, key=lambda value: value["count"])
+    return values[start : start + size], statistics.distinct_cnt
+
+
+def get_unique_values_page(
+    values: list[dict],
+    total: int,
+    page: int,
+    size: int,
+    after_count: int | None = None,
+    after_value: str | None = None,
+) -> list[dict] | None:
+    """Get a page of the first unique values of a column ordered by their count.
+
+    The page starts after the value of the cursor if passed, else at the page number.
+    Returns None if the page isn't within the values.
+    """
+
+    if after_count is None:
+        start = (page - 1) * size
+    else:
+        start = next(
+            (
+                index + 1
+                for index, value in enumerate(values)
+                if value["count"] == after_count and str(value["value"]) == after_value
+            ),
+            None,
+        )
+        if start is None:
+            return None
+    if len(values) < total and start + size > len(values):
+        return None
+    return values[start : start + size]
+
+
+def get_class_breaks_from_statistics(
+    statistics: LayerColumnStatistics,
+    operation: ComputeBreakOperation,
+    breaks: int | None,
+    stripe_zeros: bool | None,
+) -> dict | None:
+    """Get the class breaks of a number column from its statistics.
+
+    Returns None if the breaks can't be derived from the statistics. Quantile breaks are
+    read from the stored quantiles, which are exact if breaks + 1 divides their number.
+    """
+
+    if (
+        not statistics.quantiles
+        or statistics.row_cnt == statistics.null_cnt
+        or not has_exact_statistics(statistics)
+    ):
+        return None
+    # The statistics include the zeros
+    if stripe_zeros and statistics.zero_cnt:
+        return None
+
+    if operation == ComputeBreakOperation.quantile and breaks:
+        quantile_cnt = len(statistics.quantiles) - 1
+        computed_breaks = [
+            statistics.quantiles[round(i * quantile_cnt / (breaks + 1))]
+            for i in range(1, breaks + 1)
+        ]
+    elif operation == ComputeBreakOperation.equal_interval and breaks:
+        interval_size = (statistics.max - statistics.min) / (breaks + 1)
+        computed_breaks = [
+            statistics.min + i * interval_size for i in range(1, breaks + 1)
+        ]
+    elif (
+        operation == ComputeBreakOperation.standard_deviation
+        and statistics.stddev is not None
+    ):
+        computed_breaks = [
+            statistics.mean - statistics.stddev * 0.5,
+            statistics.mean + statistics.stddev * 0.5,
+            statistics.mean + statistics.stddev * 1.5,
+            statistics.mean + statistics.stddev * 2.5,
+        ]
+    else:
+        # Heads and tails breaks need the mean of the values above each break
+        return None
+
+    return {
+        "mean": statistics.mean,
+        "min": statistics.min,
+        "max": statistics.max,
+        "breaks": computed_breaks,
+    }
+
+
+def get_statistic_aggregation_from_statistics(
+    layer_statistics: list[LayerColumnStatistics],
+    column_mapped: str | None,
+    group_by_column_mapped: str | None,
+    operation: ColumnStatisticsOperation,
+    size: int,
+    order: str,
+) -> dict | None:
+    """Get an aggregation of a layer from the statistics of its columns.
+
+    Supported are the count, min and max of a column and the number of rows grouped by a
+    column of which all values are stored. Returns None for all other aggregations.
+    """
+
+    statistics = {column.column_name: column for column in layer_statistics}
+    if not statistics or (column_mapped and column_mapped not in statistics):
+        return None
+    # The number of rows is stored with every column
+    row_cnt = next(iter(statistics.values())).row_cnt
+
+    if not group_by_column_mapped:
+        column = statistics.get(column_mapped)
+        total_count = column.count if column else row_cnt
+        if operation == ColumnStatisticsOperation.count:
+            value = total_count
+        elif (
+            column
+            and operation
+            in (
+                ColumnStatisticsOperation.min,
+                ColumnStatisticsOperation.max,
+            )
+            and has_exact_statistics(column)
+        ):
+            value = getattr(column, operation.value)
+            # The statistics store floats, the aggregation returns the column type
+            if value is not None and column_mapped.split("_")[0] in (
+                OgrPostgresType.Integer,
+                OgrPostgresType.Integer64,
+            ):
+                value = int(value)
+        else:
+            return None
+        return {
+            "items": [{"operation_value": value, "grouped_value": None}][:size],
+            "total_items": 1,
+            "total_count": total_count,
+        }
+
+    # The row counts of the groups are known if all values of the column are stored
+    group_by_column = statistics.get(group_by_column_mapped)
+    if (
+        column_mapped
+        or operation != ColumnStatisticsOperation.count
+        or group_by_column is None
+        or group_by_column.top_values is None
+        or group_by_column.distinct_cnt is None
+        or group_by_column.distinct_cnt > len(group_by_column.top_values)
+    ):
+        return None
+    groups = [
+        {"operation_value": value["count"], "grouped_value": value["value"]}
+        for value in group_by_column.top_values
+    ]
+    if group_by_column.null_cnt:
+        groups.append(
+            {"operation_value": group_by_column.null_cnt, "grouped_value": None}
+        )
+    groups.sort(
+        key=lambda group: group["operation_value"], reverse=order == "descendent"
+    )
+    return {
+        "items": groups[:size],
+        "total_items": len(groups),
+        "total_count": row_cnt,
+    }
+
+
+def get_jenks_breaks(sorted_values: np.ndarray, breaks: int) -> list[float]:
+    """Get the natural breaks of sorted values with the Fisher-Jenks algorithm.
+
+    The breaks minimize the sum of squared deviations within the classes. Every class
+    is found with one pass over the matrix of the deviations of all value ranges, so
+    the values should be a bounded sample. Returns the upper bounds of all classes but
+    the last.
+    """
+
+    n = len(sorted_values)
+    class_cnt = min(breaks + 1, n)
+    if class_cnt < 2:
+        return []
+
+    # Sum of squared deviations of the values [start, end) from their mean
+    sums = np.concatenate(([0.0], np.cumsum(sorted_values)))
+    square_sums = np.concatenate(([0.0], np.cumsum(sorted_values**2)))
+    start = np.arange(n + 1)[:, None]
+    end = np.arange(n + 1)[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        deviations = (square_sums[end] - square_sums[start]) - (
+            sums[end] - sums[start]
+        ) ** 2 / (end - start)
+    deviations[end <= start] = np.inf
+
+    # Lowest deviations of the first values in a number of classes and where the last
+    # class starts
+    costs = deviations[0]
+    class_starts = []
+    for _ in range(1, class_cnt):
+        total_costs = costs[:, None] + deviations
+        class_starts.append(np.argmin(total_costs, axis=0))
+        costs = total_costs[class_starts[-1], np.arange(n + 1)]
+
+    # Trace the starts of the classes back from the end of the values
+    bounds = []
+    end_index = n
+    for starts in reversed(class_starts):
+        end_index = starts[end_index]
+        bounds.append(float(sorted_values[end_index - 1]))
+    return bounds[::-1]
+
+
+def get_class_breaks_from_values(
+    values: np.ndarray, breaks: int | None, jenks_sample_size: int
+) -> dict[ComputeBreakOperation, dict]:
+    """Get the class breaks of all operations from the values of a column.
+
+    The results match the SQL functions of the operations, the natural breaks are
+    computed on an evenly spaced sample of the sorted values.
+    """
+
+    breaks = breaks or 0
+    if not len(values):
+        return {
+            operation: {"mean": None, "min": None, "max": None, "breaks": []}
+            for operation in ComputeBreakOperation
+        }
+
+    sorted_values = np.sort(values)
+    n = len(sorted_values)
+    mean, min_val, max_val = (
+        float(sorted_values.mean()),
+        float(sorted_values[0]),
+        float(sorted_values[-1]),
+    )
+    stddev = float(sorted_values.std(ddof=1)) if n > 1 else None
+
+    # Discrete percentiles as of percentile_disc
+    quantile_indices = [
+        max(math.ceil(i / (breaks + 1) * n) - 1, 0) for i in range(1, breaks + 1)
+    ]
+    interval_size = (max_val - min_val) / (breaks + 1)
+
+    # Means of the values above the previous mean until no values are left
+    heads_and_tails = [mean]
+    head = sorted_values
+    while len(heads_and_tails) < breaks:
+        head = head[head > heads_and_tails[-1]]
+        if not len(head):
+            heads_and_tails += [max_val] * (breaks - len(heads_and_tails))
+            break
+        heads_and_tails.append(float(head.mean()))
+
+    sample_indices = np.linspace(0, n - 1, min(n, jenks_sample_size)).round()
+    computed_breaks = {
+        ComputeBreakOperation.quantile: [
+            float(sorted_values[i]) for i in quantile_indices
+        ],
+        ComputeBreakOperation.equal_interval: [
+            min_val + i * interval_size for i in range(1, breaks + 1)
+        ],
+        ComputeBreakOperation.standard_deviation: [
+            mean + stddev * factor if stddev is not None else None
+            for factor in (-0.5, 0.5, 1.5, 2.5)
+        ],
+        ComputeBreakOperation.heads_and_tails: heads_and_tails,
+        ComputeBreakOperation.natural_breaks: get_jenks_breaks(
+            sorted_values[sample_indices.astype(int)], breaks
+        ),
+    }
+    return {
+        operation: {
+            "mean": mean,
+            "min": min_val,
+            "max": max_val,
+            "breaks": operation_breaks,
+        }
+        for operation, operation_breaks in computed_breaks.items()
+    }
+
+
+# Quantile of the standard normal distribution for 95 % confidence intervals
+CONFIDENCE_LEVEL = 0.95
+CONFIDENCE_Z = 1.959964
+
+
+def estimate_from_sample(
+    operation: str,
+    sample_cnt: int,
+    sample_sum: float | None,
+    sample_square_sum: float | None,
+    sample_min: float | None,
+    sample_max: float | None,
+    sample_fraction: float,
+) -> dict:
+    """Estimate a statistic of non-negative values from a Bernoulli sample.
+
+    The sum is scaled by the sample fraction with the variance of the Horvitz-Thompson
+    estimator. The sampled units are rows or, for block samples, the blocks of a table,
+    of which the square sum is taken over the sums of the blocks. The minimum and
+    maximum of the sample only bound the true values from one side, the other bound of
+    their interval is None.
+    """
+
+    if not sample_cnt:
+        return {
+            "value": None,
+            "confidence_interval": [None, None],
+        }
+
+    if operation == "sum":
+        value = sample_sum / sample_fraction
+        standard_error = (
+            math.sqrt((1 - sample_fraction) * sample_square_sum) / sample_fraction
+        )
+        # The values of the sample are part of the sum
+        confidence_interval = [
+            max(value - CONFIDENCE_Z * standard_error, sample_sum),
+            value + CONFIDENCE_Z * standard_error,
+        ]
+    elif operation == "min":
+        value = sample_min
+        confidence_interval = [None, sample_min]
+    elif operation == "max":
+        value = sample_max
+        confidence_interval = [sample_max, None]
+    else:
+        raise ValueError(f"Unsupported operation {operation}")
+
+    return {"value": value, "confidence_interval": confidence_interval}
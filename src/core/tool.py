@@ -14,6 +14,9 @@ from src.core.statistics import StatisticsBase
 from src.crud.crud_job import job as crud_job
 from src.crud.crud_layer import layer as crud_layer
 from src.crud.crud_layer_project import layer_project as crud_layer_project
+from src.crud.crud_layer_statistics import (
+    layer_column_statistics as crud_layer_statistics,
+)
 from src.crud.crud_project import project as crud_project
 from src.db.models.layer import FeatureType, Layer, LayerType, ToolType
 from src.schemas.common import CQLQueryObject, OrderEnum
@@ -307,6 +310,8 @@ class CRUDToolBase(StatisticsBase, CRUDFailedJob):
             async_session=self.async_session,
             layer=layer,
         )
+        # Compute the statistics of the columns, which the styling below reads
+        await crud_layer_statistics.compute(self.async_session, layer)
 
         # Create style for layer
         # Request scale breaks in case of color_scale
@@ -0,0 +1,496 @@
+# Standard library imports
+import asyncio
+import csv
+import fcntl
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import time
+import zipfile
+from typing import AsyncIterable
+from uuid import UUID
+
+# Third party imports
+import aiofiles
+from fastapi import HTTPException, status
+
+# Local application imports
+from src.core.cache import evict_lru
+from src.core.config import settings
+from src.db.models.layer import FileUploadType
+from src.schemas.layer import MaxFileSizeType
+
+UPLOAD_STATE_FILE = "upload.json"
+UPLOAD_CACHE_VALIDATION_DIR = "validation"
+UPLOAD_CACHE_LAYER_DIR = "layer"
+UPLOAD_LOCK_FILE = "upload.lock"
+CONTENT_RANGE_PATTERN = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+SHAPEFILE_EXTENSIONS = [".shp", ".shx", ".dbf", ".prj", ".cpg", ".qix", ".sbn", ".sbx"]
+FIRST_CHUNK_VALIDATION_SIZE = 1048576
+MAX_FILE_HASHERS = 1000
+
+# Running SHA-256 of the uploads received by this process with the offset they cover,
+# keyed on the upload ID. Uploads of which another worker received chunks are hashed
+# from the file when they are finalized.
+FILE_HASHERS = {}
+
+# Leading bytes of the binary file types to reject wrong files with the first chunk
+FILE_SIGNATURES = {
+    FileUploadType.zip.value: b"PK\x03\x04",
+    FileUploadType.xlsx.value: b"PK\x03\x04",
+    FileUploadType.gpkg.value: b"SQLite format 3\x00",
+    FileUploadType.parquet.value: b"PAR1",
+    FileUploadType.fgb.value: b"fgb\x03",
+}
+
+
+def parse_content_range(content_range: str) -> tuple[int, int, int]:
+    """Parse a Content-Range header of the form "bytes start-end/total"."""
+
+    match = CONTENT_RANGE_PATTERN.match(content_range or "")
+    if match is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Content-Range must be of the form 'bytes start-end/total'.",
+        )
+    start, end, total = (int(value) for value in match.groups())
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Content-Range end must not be before its start.",
+        )
+    return start, end, total
+
+
+def hash_file(file_path: str, chunk_size: int = 1048576) -> str:
+    """Get the hex encoded SHA-256 of the file content."""
+
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def validate_first_chunk(file_ending: str, data: bytes) -> str | None:
+    """Check the beginning of a file to reject it before the remaining chunks arrive.
+
+    Returns an error message if the chunk doesn't match the file type.
+    """
+
+    signature = FILE_SIGNATURES.get(file_ending)
+    if signature is not None:
+        if not data.startswith(signature[: len(data)]):
+            return f"File content does not match the file type {file_ending}."
+        return None
+
+    if file_ending == FileUploadType.csv.value:
+        # The header must be complete within the first chunk
+        lines = data.decode("utf-8-sig", errors="ignore").splitlines()
+        if len(lines) < 2:
+            return None
+        header = next(csv.reader(io.StringIO(lines[0])))
+        if any(not col for col in header):
+            return "CSV is not well-formed: Header contains empty values."
+    return None
+
+
+class ChunkedUpload:
+    """Resumable upload of a file sent in byte ranges.
+
+    The chunks are written into the file of the dataset folder in `DATA_DIR`, so the
+    assembled file can be validated as if it was uploaded at once. The upload state is
+    kept next to the file, which allows any API worker to receive the next chunk.
+    Chunks must be sent in order. A client resumes an interrupted upload by querying
+    the offset and sending the remaining bytes from there.
+    """
+
+    def __init__(self, user_id: UUID, upload_id: UUID):
+        self.user_id = user_id
+        self.upload_id = upload_id
+        self.user_folder_path = os.path.join(settings.DATA_DIR, str(user_id))
+        self.folder_path = os.path.join(self.user_folder_path, str(upload_id))
+        self.state_path = os.path.join(self.folder_path, UPLOAD_STATE_FILE)
+        self.lock_path = os.path.join(self.folder_path, UPLOAD_LOCK_FILE)
+
+    def read_state(self) -> dict:
+        """Read the state of the upload."""
+
+        if not os.path.exists(self.state_path):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload not found or not owned by user.",
+            )
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def write_state(self, state: dict):
+        """Write the state of the upload atomically."""
+
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+        # Keep the folders from being deleted as old files while the upload is active
+        os.utime(self.user_folder_path)
+
+    def lock(self):
+        """Lock the upload so that concurrent requests can't modify it at the same time.
+
+        A separate lock file is used as the state file is replaced on every write.
+        """
+
+        self.read_state()
+        lock_file = open(self.lock_path, "a")
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    def get_file_path(self, state: dict) -> str:
+        """Get the path of the file the chunks are written into."""
+
+        return os.path.join(self.folder_path, "file." + state["file_ending"])
+
+    def get_file_hasher(self, offset: int):
+        """Get a copy of the running hash of the file up to the offset if known."""
+
+        if offset == 0:
+            return hashlib.sha256()
+        entry = FILE_HASHERS.get(str(self.upload_id))
+        if entry is None or entry[0] != offset:
+            return None
+        return entry[1].copy()
+
+    def put_file_hasher(self, offset: int, file_hasher):
+        """Keep the running hash of the file up to the offset."""
+
+        FILE_HASHERS.pop(str(self.upload_id), None)
+        if file_hasher is None:
+            return
+        FILE_HASHERS[str(self.upload_id)] = (offset, file_hasher)
+        # Drop the hashes of the oldest uploads, which are hashed on finalize instead
+        while len(FILE_HASHERS) > MAX_FILE_HASHERS:
+            FILE_HASHERS.pop(next(iter(FILE_HASHERS)))
+
+    def create(self, file_name: str, file_size: int) -> dict:
+        """Create the upload session and an empty file."""
+
+        file_ending = os.path.splitext(file_name)[-1][1:]
+        if file_ending not in FileUploadType.__members__:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"File type not allowed. Allowed file types are: {', '.join(FileUploadType.__members__.keys())}",
+            )
+        if file_size > MaxFileSizeType[file_ending].value:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File size too large. Max file size is {round(MaxFileSizeType[file_ending].value / 1048576, 2)} MB",
+            )
+
+        os.makedirs(self.folder_path, exist_ok=True)
+        state = {
+            "upload_id": str(self.upload_id),
+            "file_name": file_name,
+            "file_ending": file_ending,
+            "file_size": file_size,
+            "offset": 0,
+            "chunk_size": settings.UPLOAD_CHUNK_SIZE,
+            "finalized": False,
+            "created_at": time.time(),
+        }
+        open(self.get_file_path(state), "wb").close()
+        self.write_state(state)
+        return state
+
+    def check_chunk(
+        self, content_range: str, content_length: int | None
+    ) -> tuple[int, int, int]:
+        """Check the range and size of a chunk before its body is read."""
+
+        start, end, total = parse_content_range(content_range)
+        if end - start + 1 > settings.UPLOAD_MAX_CHUNK_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Chunk size too large. Max chunk size is {round(settings.UPLOAD_MAX_CHUNK_SIZE / 1048576, 2)} MB",
+            )
+        if content_length is not None and content_length != end - start + 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Size of the chunk does not match the Content-Range.",
+            )
+        return start, end, total
+
+    async def write_chunk(
+        self,
+        content_range: str,
+        checksum: str,
+        chunks: AsyncIterable[bytes],
+        content_length: int | None = None,
+    ) -> dict:
+        """Stream a chunk into the file and verify it.
+
+        The checksum is the hex encoded SHA-256 of the chunk. A chunk that doesn't
+        start at the current offset is rejected with the offset to resume from. The
+        file is truncated back to the offset if the chunk doesn't match its size or
+        checksum.
+        """
+
+        start, end, total = self.check_chunk(content_range, content_length)
+
+        lock_file = await asyncio.to_thread(self.lock)
+        try:
+            state = self.read_state()
+            if state["finalized"]:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Upload is already finalized.",
+                )
+            if total != state["file_size"] or end >= state["file_size"]:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Content-Range does not match the size of the file.",
+                )
+            if start != state["offset"]:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Chunk must start at offset {state['offset']}.",
+                )
+
+            # Hash the chunk and the file while the chunk is written
+            chunk_hasher = hashlib.sha256()
+            file_hasher = self.get_file_hasher(start)
+            chunk_size = end - start + 1
+            size = 0
+            async with aiofiles.open(self.get_file_path(state), "r+b") as f:
+                await f.seek(start)
+                try:
+                    async for data in chunks:
+                        size += len(data)
+                        if size > chunk_size:
+                            break
+                        chunk_hasher.update(data)
+                        if file_hasher is not None:
+                            file_hasher.update(data)
+                        await f.write(data)
+
+                    if size != chunk_size:
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Size of the chunk does not match the Content-Range.",
+                        )
+                    if chunk_hasher.hexdigest() != (checksum or "").lower():
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Checksum of the chunk does not match.",
+                        )
+                    if start == 0:
+                        await f.seek(0)
+                        msg = validate_first_chunk(
+                            state["file_ending"],
+                            await f.read(FIRST_CHUNK_VALIDATION_SIZE),
+                        )
+                        if msg is not None:
+                            raise HTTPException(
+                                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                detail=msg,
+                            )
+                except BaseException:
+                    await f.truncate(start)
+                    raise
+                await f.flush()
+                await asyncio.to_thread(os.fsync, f.fileno())
+
+            state["offset"] = end + 1
+            self.write_state(state)
+            self.put_file_hasher(state["offset"], file_hasher)
+        finally:
+            lock_file.close()
+        return state
+
+    def finalize(self) -> dict:
+        """Mark the upload as finalized once all bytes are received."""
+
+        with self.lock():
+            state = self.read_state()
+            if state["finalized"]:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Upload is already finalized.",
+                )
+            if state["offset"] != state["file_size"]:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Upload is incomplete. {state['offset']} of {state['file_size']} bytes received.",
+                )
+            # Use the running hash if all chunks were received by this process
+            entry = FILE_HASHERS.pop(str(self.upload_id), None)
+            if entry is not None and entry[0] == state["file_size"]:
+                state["content_hash"] = entry[1].hexdigest()
+            else:
+                state["content_hash"] = hash_file(self.get_file_path(state))
+            state["finalized"] = True
+            self.write_state(state)
+        return state
+
+
+class UploadCache:
+    """Cache of upload results keyed on the SHA-256 of the file content.
+
+    Validation results only depend on the content and are shared between users. Per
+    user the cache remembers the layer a file was last loaded into, so importing the
+    same file again copies the rows within the database instead of reading the file.
+    Entries are evicted when unused for `UPLOAD_CACHE_MAX_AGE` seconds and, oldest
+    first, when the cache exceeds `UPLOAD_CACHE_MAX_SIZE` bytes.
+    """
+
+    def __init__(self, cache_dir: str | None = None):
+        self.cache_dir = cache_dir or settings.UPLOAD_CACHE_DIR
+
+    def get_validation_path(self, content_hash: str, file_ending: str) -> str:
+        return os.path.join(
+            self.cache_dir,
+            UPLOAD_CACHE_VALIDATION_DIR,
+            f"{content_hash}.{file_ending}.json",
+        )
+
+    def get_layer_path(self, user_id: UUID, content_hash: str) -> str:
+        return os.path.join(
+            self.cache_dir, UPLOAD_CACHE_LAYER_DIR, str(user_id), f"{content_hash}.json"
+        )
+
+    def read_entry(self, path: str) -> dict | None:
+        """Read an entry and mark it as used."""
+
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            # Drop entries left incomplete
+            self.delete_entry(path)
+            return None
+        return entry
+
+    def write_entry(self, path: str, entry: dict):
+        """Write an entry atomically and evict old entries."""
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def delete_entry(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def get_validation(self, content_hash: str, file_ending: str) -> dict | None:
+        return self.read_entry(self.get_validation_path(content_hash, file_ending))
+
+    def put_validation(self, content_hash: str, file_ending: str, entry: dict):
+        self.write_entry(self.get_validation_path(content_hash, file_ending), entry)
+
+    def get_loaded_layer(self, user_id: UUID, content_hash: str) -> dict | None:
+        return self.read_entry(self.get_layer_path(user_id, content_hash))
+
+    def put_loaded_layer(self, user_id: UUID, content_hash: str, entry: dict):
+        self.write_entry(self.get_layer_path(user_id, content_hash), entry)
+
+    def delete_loaded_layer(self, user_id: UUID, content_hash: str):
+        self.delete_entry(self.get_layer_path(user_id, content_hash))
+
+    def evict(self, max_age: int | None = None, max_size: int | None = None):
+        """Delete entries unused for longer than max_age, then the least recently used
+        entries until the cache fits into max_size bytes."""
+
+        max_age = settings.UPLOAD_CACHE_MAX_AGE if max_age is None else max_age
+        max_size = settings.UPLOAD_CACHE_MAX_SIZE if max_size is None else max_size
+        evict_lru(self.cache_dir, max_size=max_size, max_age=max_age)
+
+
+def list_archive_datasets(zip_path: str) -> dict[str, list[str]]:
+    """Group the files of a ZIP into the datasets they form.
+
+    Each file of a supported type is a dataset. The components of a shapefile are
+    grouped by their base name into one dataset, which is keyed by its .shp file.
+    Other files are ignored. Raises a ValueError if a file exceeds the file size
+    limit of its type.
+    """
+
+    with zipfile.ZipFile(zip_path) as zip_ref:
+        # Remove directories and metadata added by macOS
+        members = [
+            info
+            for info in zip_ref.infolist()
+            if not info.is_dir()
+            and not info.filename.startswith("__MACOSX/")
+            and not os.path.basename(info.filename).startswith("._")
+        ]
+
+    datasets = {}
+    shapefile_components = {}
+    for info in members:
+        base_name, ext = os.path.splitext(info.filename)
+        ext = ext.lower()
+        if ext in SHAPEFILE_EXTENSIONS:
+            shapefile_components.setdefault(base_name, []).append(info)
+            continue
+        file_ending = ext[1:]
+        if file_ending not in FileUploadType.__members__ or (
+            file_ending == FileUploadType.zip.value
+        ):
+            continue
+        if info.file_size > MaxFileSizeType[file_ending].value:
+            raise ValueError(f"File {info.filename} exceeds the max file size.")
+        datasets[info.filename] = [info.filename]
+
+    for components in shapefile_components.values():
+        shp_files = [c for c in components if c.filename.lower().endswith(".shp")]
+        if not shp_files:
+            continue
+        if (
+            sum(c.file_size for c in components)
+            > MaxFileSizeType[FileUploadType.zip.value].value
+        ):
+            raise ValueError(f"File {shp_files[0].filename} exceeds the max file size.")
+        datasets[shp_files[0].filename] = sorted(c.filename for c in components)
+    return datasets
+
+
+def is_shapefile_archive(datasets: dict[str, list[str]]) -> bool:
+    """Check if the datasets of a ZIP are a single shapefile."""
+
+    return len(datasets) == 1 and next(iter(datasets)).lower().endswith(".shp")
+
+
+def extract_archive_dataset(zip_path: str, members: list[str], folder_path: str) -> str:
+    """Extract a dataset of a ZIP into the dataset folder and return its file path.
+
+    The components of a shapefile are packed into a ZIP of their own.
+    """
+
+    os.makedirs(folder_path, exist_ok=True)
+    with zipfile.ZipFile(zip_path) as zip_ref:
+        if not any(member.lower().endswith(".shp") for member in members):
+            file_ending = os.path.splitext(members[0])[-1][1:].lower()
+            file_path = os.path.join(folder_path, "file." + file_ending)
+            with zip_ref.open(members[0]) as source, open(file_path, "wb") as target:
+                shutil.copyfileobj(source, target, 1048576)
+            return file_path
+
+        file_path = os.path.join(folder_path, "file." + FileUploadType.zip.value)
+        with zipfile.ZipFile(file_path, "w", zipfile.ZIP_DEFLATED) as target_zip:
+            for member in members:
+                with zip_ref.open(member) as source, target_zip.open(
+                    os.path.basename(member), "w"
+                ) as target:
+                    shutil.copyfileobj(source, target, 1048576)
+        return file_path
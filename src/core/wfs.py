@@ -0,0 +1,194 @@
+# Standard library imports
+import asyncio
+import json
+import re
+from collections import deque
+
+# Third party imports
+import aiofiles
+import aiohttp
+
+# Local application imports
+from src.core.config import settings
+
+WFS_VERSION = "2.0.0"
+WFS_OUTPUT_FORMAT = "application/json"
+WFS_SRS_NAME = "EPSG:4326"
+NUMBER_MATCHED_PATTERN = re.compile(rb'numberMatched="(\d+)"')
+
+
+class WFSFormatError(Exception):
+    """Raised if the WFS doesn't return pages of features as GeoJSON."""
+
+    pass
+
+
+class WFSFeatureLimitError(ValueError):
+    """Raised if the WFS layer contains more features than allowed."""
+
+    pass
+
+
+class WFSFetcher:
+    """Fetch a WFS layer in pages of GeoJSON features and write them into a file.
+
+    Pages are requested with `startIndex` and `count`, several at a time. They are
+    written in order as soon as they arrive, so at most `concurrency` pages are held
+    in memory. The fetch stops once more than `max_feature_cnt` features are received.
+
+    Services may return fewer features per page than requested (e.g. `maxFeatures` of
+    GeoServer or MapServer). If the number of features is known, a short page lowers
+    the page size to the returned count and the following pages are requested from
+    the end of the short page. Otherwise a short page is the last one.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        layer_name: str,
+        max_feature_cnt: int,
+        page_size: int | None = None,
+        concurrency: int | None = None,
+    ):
+        self.url = url
+        self.layer_name = layer_name
+        self.max_feature_cnt = max_feature_cnt
+        self.page_size = page_size or settings.WFS_PAGE_SIZE
+        self.concurrency = concurrency or settings.WFS_CONCURRENCY
+
+    def get_params(self, **params) -> dict:
+        return {
+            "service": "WFS",
+            "version": WFS_VERSION,
+            "request": "GetFeature",
+            "typeNames": self.layer_name,
+            **params,
+        }
+
+    async def get_feature_cnt(self, session: aiohttp.ClientSession) -> int | None:
+        """Get the number of features of the layer if the service reports it."""
+
+        async with session.get(
+            self.url, params=self.get_params(resultType="hits")
+        ) as response:
+            if response.status != 200:
+                return None
+            match = NUMBER_MATCHED_PATTERN.search(await response.read())
+        return int(match.group(1)) if match else None
+
+    async def get_page(
+        self, session: aiohttp.ClientSession, start_index: int, count: int
+    ) -> list:
+        """Get the features of a page."""
+
+        async with session.get(
+            self.url,
+            params=self.get_params(
+                startIndex=start_index,
+                count=count,
+                outputFormat=WFS_OUTPUT_FORMAT,
+                srsName=WFS_SRS_NAME,
+            ),
+        ) as response:
+            response.raise_for_status()
+            try:
+                page = json.loads(await response.read())
+            except ValueError:
+                raise WFSFormatError(
+                    f"WFS service at {self.url} does not return GeoJSON."
+                )
+        if not isinstance(page, dict) or "features" not in page:
+            raise WFSFormatError(f"WFS service at {self.url} does not return GeoJSON.")
+        if len(page["features"]) > count:
+            raise WFSFormatError(f"WFS service at {self.url} does not support paging.")
+        return page["features"]
+
+    def check_feature_cnt(self, feature_cnt: int):
+        if feature_cnt > self.max_feature_cnt:
+            raise WFSFeatureLimitError(
+                f"Layer {self.layer_name} contains too many features ({feature_cnt})."
+            )
+
+    async def fetch(self, output_file: str) -> int:
+        """Write the features of the layer into a GeoJSON file and return their count."""
+
+        timeout = aiohttp.ClientTimeout(
+            total=None,
+            connect=settings.ASYNC_CLIENT_DEFAULT_TIMEOUT,
+            sock_read=settings.ASYNC_CLIENT_READ_TIMEOUT,
+        )
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            # Stop before fetching any page if the service reports too many features
+            total_cnt = await self.get_feature_cnt(session)
+            if total_cnt is not None:
+                self.check_feature_cnt(total_cnt)
+
+            feature_cnt = 0
+            # Start index, count and task of the pages in flight
+            pages = deque()
+            next_index = 0
+            last_page_fetched = False
+
+            async def cancel_pages():
+                for _start_index, _count, task in pages:
+                    task.cancel()
+                await asyncio.gather(
+                    *[task for _start_index, _count, task in pages],
+                    return_exceptions=True,
+                )
+                pages.clear()
+
+            async with aiofiles.open(output_file, "w") as f:
+                await f.write('{"type": "FeatureCollection", "features": [\n')
+                try:
+                    while True:
+                        # Keep a bounded number of pages in flight
+                        while not last_page_fetched and len(pages) < self.concurrency:
+                            if total_cnt is not None and next_index >= total_cnt:
+                                last_page_fetched = True
+                                break
+                            pages.append(
+                                (
+                                    next_index,
+                                    self.page_size,
+                                    asyncio.create_task(
+                                        self.get_page(
+                                            session, next_index, self.page_size
+                                        )
+                                    ),
+                                )
+                            )
+                            next_index += self.page_size
+                        if not pages:
+                            break
+
+                        start_index, count, task = pages.popleft()
+                        features = await task
+                        end_index = start_index + len(features)
+                        if len(features) < count:
+                            await cancel_pages()
+                            if (
+                                total_cnt is not None
+                                and features
+                                and end_index < total_cnt
+                            ):
+                                # The service caps the page size, continue after
+                                # the returned features with the capped size
+                                self.page_size = len(features)
+                                next_index = end_index
+                            else:
+                                # A short page is the last one if the count is
+                                # unknown or the service returns no more features
+                                last_page_fetched = True
+
+                        feature_cnt += len(features)
+                        self.check_feature_cnt(feature_cnt)
+                        if features:
+                            await f.write(
+                                (",\n" if feature_cnt > len(features) else "")
+                                + ",\n".join(json.dumps(feature) for feature in features)
+                            )
+                finally:
+                    await cancel_pages()
+                await f.write("\n]}\n")
+        return feature_cnt
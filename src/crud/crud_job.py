@@ -119,6 +119,44 @@ class CRUDJob(CRUDBase):
         job = await self.update(db=async_session, db_obj=job)
         return job
 
+    async def update_step_msg(
+        self,
+        async_session: AsyncSession,
+        job_id: UUID,
+        job_step_name: str,
+        msg_text: str,
+        msg_type: MsgType = MsgType.info,
+    ):
+        """Update the message of a job step without changing its status e.g. to report progress."""
+
+        job = await self.get(db=async_session, id=job_id)
+        async_session.expire(job)
+        job = await self.get(db=async_session, id=job_id)
+
+        job.status[job_step_name]["msg"] = {
+            "type": msg_type.value,
+            "text": sanitize_error_message(msg_text),
+        }
+        flag_modified(job, "status")
+
+        job = await self.update(db=async_session, db_obj=job)
+        return job
+
+    async def update_payload(
+        self,
+        async_session: AsyncSession,
+        job_id: UUID,
+        payload: dict,
+    ):
+        """Merge data into the payload of a job e.g. to share it between job steps."""
+
+        job = await self.get(db=async_session, id=job_id)
+        job.payload = {**(job.payload or {}), **payload}
+        flag_modified(job, "payload")
+
+        job = await self.update(db=async_session, db_obj=job)
+        return job
+
     async def get_by_date(
         self,
         async_session: AsyncSession,
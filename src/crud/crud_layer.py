@@ -1,39 +1,92 @@
 # Standard library imports
 import asyncio
+import hashlib
 import json
+import multiprocessing
 import os
+import time
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor
 from datetime import datetime
+from typing import AsyncIterator
 from uuid import UUID, uuid4
 
 # Third party imports
+import aiofiles
+import numpy as np
 from fastapi import HTTPException, status
 from fastapi_pagination import Page
 from fastapi_pagination import Params as PaginationParams
 from geoalchemy2.shape import WKTElement
 from pydantic import BaseModel
-from sqlalchemy import and_, func, or_, select, text
+from pyproj import CRS
+from sqlalchemy import and_, func, or_, select, text, true
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import SQLModel
 from starlette.datastructures import UploadFile
 
 # Local application imports
+from src.core.cache import MemoryCache
 from src.core.config import settings
 from src.core.content import build_shared_with_object, create_query_shared_content
+from src.core.export import (
+    ARROW_EXPORT_TYPES,
+    OGR_EXPORT_TYPES,
+    STREAM_EXPORT_TYPES,
+    ExportCache,
+    encode_arrow,
+    encode_csv,
+    encode_geojson,
+    encode_ogr,
+    fetch_batches,
+    get_geometry_select,
+    get_unique_file_names,
+    iterate_content,
+    iterate_file,
+    stream_zip,
+)
 from src.core.job import CRUDFailedJob, job_init, job_log, run_background_or_immediately
 from src.core.layer import (
     CRUDLayerBase,
     FileUpload,
     OGRFileHandling,
+    check_crs_bounds,
     delete_layer_data,
     delete_old_files,
+    get_attribute_mapping,
+    validate_dataset,
+)
+from src.core.statistics import (
+    CONFIDENCE_LEVEL,
+    class_breaks_cache,
+    estimate_from_sample,
+    get_class_breaks_from_statistics,
+    get_class_breaks_from_values,
+    get_unique_values_from_statistics,
+    get_unique_values_page,
+    unique_values_cache,
+)
+from src.core.upload import (
+    UploadCache,
+    extract_archive_dataset,
+    hash_file,
+    is_shapefile_archive,
+    list_archive_datasets,
 )
 from src.crud.base import CRUDBase
+from src.crud.crud_job import job as crud_job
 from src.crud.crud_layer_project import layer_project as crud_layer_project
+from src.crud.crud_layer_statistics import STATISTICS_COLUMN_TYPES
+from src.crud.crud_layer_statistics import (
+    layer_column_statistics as crud_layer_statistics,
+)
 from src.db.models import (
     Layer,
     LayerOrganizationLink,
+    LayerProjectLink,
     LayerTeamLink,
     Organization,
+    Project,
     Role,
     Team,
 )
@@ -44,9 +97,15 @@ from src.schemas.error import (
     OperationNotSupportedError,
     UnsupportedLayerTypeError,
 )
-from src.schemas.job import JobStatusType
+from src.db.models.layer import (
+    FeatureLayerExportType,
+    FileUploadType,
+    TableLayerExportType,
+    TableUploadType,
+)
+from src.db.session import session_manager
+from src.schemas.job import JobStatusType, Msg, MsgType
 from src.schemas.layer import (
-    ComputeBreakOperation,
     FeatureType,
     ICatalogLayerGet,
     IFeatureStandardCreateAdditionalAttributes,
@@ -67,6 +126,7 @@ from src.schemas.layer import (
     get_layer_schema,
     layer_update_class,
 )
+from src.schemas.project import IProjectExport
 from src.schemas.style import get_base_style
 from src.schemas.toolbox_base import ColumnStatisticsOperation, MaxFeatureCnt
 from src.utils import (
@@ -74,12 +134,26 @@ from src.utils import (
     async_zip_directory,
     build_where,
     build_where_clause,
+    sanitize_error_message,
+)
+
+# Layer counts of the metadata values of the catalog by user and filter
+metadata_aggregate_cache = MemoryCache(
+    "metadata_aggregate",
+    max_entries=settings.METADATA_AGGREGATE_CACHE_SIZE,
+    max_age=settings.METADATA_AGGREGATE_CACHE_MAX_AGE,
 )
 
 
 class CRUDLayer(CRUDLayerBase):
     """CRUD class for Layer."""
 
+    async def create(self, db: AsyncSession, *, obj_in: BaseModel) -> Layer:
+        layer = await super().create(db, obj_in=obj_in)
+        # The metadata aggregates count the layers
+        metadata_aggregate_cache.clear()
+        return layer
+
     async def label_cluster_keep(self, async_session: AsyncSession, layer: Layer):
         """Label the rows that should be kept in case of vector tile clustering. Based on the logic to priotize features close to the centroid of an h3 grid of resolution 8."""
 
@@ -141,6 +215,7 @@ class CRUDLayer(CRUDLayerBase):
         layer = await CRUDBase(Layer).update(
             async_session, db_obj=layer, obj_in=layer_in
         )
+        metadata_aggregate_cache.clear()
 
         return layer
 
@@ -163,6 +238,7 @@ class CRUDLayer(CRUDLayerBase):
             db=async_session,
             id=id,
         )
+        metadata_aggregate_cache.clear()
 
         # Delete layer thumbnail
         if (
@@ -216,57 +292,122 @@ class CRUDLayer(CRUDLayerBase):
                 detail=str(e),
             )
 
-        # Initialize OGRFileHandling
-        ogr_file_handling = OGRFileHandling(
+        # Get file size in bytes
+        if isinstance(source, UploadFile):
+            original_position = source.file.tell()
+            source.file.seek(0, 2)
+            file_size = source.file.tell()
+            source.file.seek(original_position)
+        else:
+            file_size = os.path.getsize(file_path)
+
+        return await self.validate_file(
             async_session=async_session,
             user_id=user_id,
+            dataset_id=dataset_id,
             file_path=file_path,
+            file_ending=os.path.splitext(
+                source.filename if isinstance(source, UploadFile) else file_path
+            )[-1][1:],
+            file_size=file_size,
+            layer_type=layer_type,
+            content_hash=file_upload.content_hash,
         )
 
-        # Validate file before uploading
-        try:
-            validation_result = await asyncio.wait_for(
-                ogr_file_handling.validate(),
-                timeout,
-            )
-        except asyncio.TimeoutError:
-            raise HTTPException(
-                status_code=status.HTTP_408_REQUEST_TIMEOUT,
-                detail=f"File validation timed out after {timeout} seconds.",
+    async def validate_file(
+        self,
+        async_session: AsyncSession,
+        user_id: UUID,
+        dataset_id: UUID,
+        file_path: str,
+        file_ending: str,
+        file_size: int,
+        layer_type: LayerType,
+        content_hash: str | None = None,
+        executor: Executor | None = None,
+    ):
+        """Validate a file saved in the dataset folder and save its metadata.
+
+        The validation result of a file with the same content is reused from the upload cache.
+        If an executor is passed, the file is validated in it instead of the event loop. A
+        validation timing out in the executor can't be cancelled, so the timeout is only
+        raised once the worker is free again.
+        """
+
+        timeout = 120
+        folder_path = os.path.join(settings.DATA_DIR, str(user_id), str(dataset_id))
+        upload_cache = UploadCache()
+
+        validation_result = None
+        if content_hash is not None:
+            cached_result = await asyncio.to_thread(
+                upload_cache.get_validation, content_hash, file_ending
             )
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=str(e),
+            if cached_result is not None:
+                validation_result = {**cached_result, "file_path": file_path}
+
+        if validation_result is None:
+            # Initialize OGRFileHandling
+            ogr_file_handling = OGRFileHandling(
+                async_session=async_session,
+                user_id=user_id,
+                file_path=file_path,
             )
 
-        if validation_result.get("status") == "failed":
-            # Run failure function if exists
-            await file_upload.save_file_fail()
-            # Update job status simple to failed
-            raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail=validation_result["msg"],
-            )
+            # Validate file before uploading
+            if executor is None:
+                validation = ogr_file_handling.validate()
+            else:
+                validation = asyncio.get_running_loop().run_in_executor(
+                    executor, validate_dataset, user_id, file_path
+                )
+            try:
+                validation_result = await asyncio.wait_for(
+                    validation if executor is None else asyncio.shield(validation),
+                    timeout,
+                )
+            except asyncio.TimeoutError:
+                if executor is not None:
+                    await asyncio.gather(validation, return_exceptions=True)
+                raise HTTPException(
+                    status_code=status.HTTP_408_REQUEST_TIMEOUT,
+                    detail=f"File validation timed out after {timeout} seconds.",
+                )
+            except Exception as e:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=str(e),
+                )
 
-        # Get file size in bytes
-        if isinstance(source, UploadFile):
-            original_position = source.file.tell()
-            source.file.seek(0, 2)
-            file_size = source.file.tell()
-            source.file.seek(original_position)
-        else:
-            file_size = os.path.getsize(file_path)
+            if validation_result.get("status") == "failed":
+                # Delete the dataset folder
+                await async_delete_dir(folder_path)
+                # Update job status simple to failed
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=validation_result["msg"],
+                )
+
+            if content_hash is not None:
+                await asyncio.to_thread(
+                    upload_cache.put_validation,
+                    content_hash,
+                    file_ending,
+                    {
+                        "data_types": validation_result["data_types"],
+                        "profile": validation_result.get("profile"),
+                        "msg": validation_result["msg"].dict(),
+                    },
+                )
 
         # Define metadata object
         metadata = IFileUploadMetadata(
             **validation_result,
             dataset_id=dataset_id,
-            file_ending=os.path.splitext(
-                source.filename if isinstance(source, UploadFile) else file_path
-            )[-1][1:],
+            file_ending=file_ending,
             file_size=file_size,
             layer_type=layer_type,
+            content_hash=content_hash,
         )
 
         # Save metadata into user folder as json
@@ -280,6 +421,101 @@ class CRUDLayer(CRUDLayerBase):
         # Add layer_type and file_size to validation_result
         return metadata
 
+    async def upload_files(
+        self,
+        async_session: AsyncSession,
+        user_id: UUID,
+        files: list[UploadFile],
+    ) -> list[dict]:
+        """Save the files of a batch import and split ZIPs into the datasets they contain.
+
+        A ZIP containing a single shapefile is kept as one dataset. Returns the name,
+        ID, file path, size and content hash of each dataset.
+        """
+
+        datasets = []
+        try:
+            for file in files:
+                dataset_id = uuid4()
+                file_upload = FileUpload(
+                    async_session=async_session,
+                    user_id=user_id,
+                    dataset_id=dataset_id,
+                    source=file,
+                )
+                try:
+                    file_path = await file_upload.save_file()
+                except Exception as e:
+                    await file_upload.save_file_fail()
+                    raise HTTPException(
+                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        detail=str(e),
+                    )
+                dataset = {
+                    "name": os.path.splitext(os.path.basename(file.filename))[0],
+                    "dataset_id": dataset_id,
+                    "file_path": file_path,
+                    "content_hash": file_upload.content_hash,
+                }
+                datasets.append(dataset)
+                if file_upload.file_ending != FileUploadType.zip.value:
+                    continue
+
+                try:
+                    archive_datasets = await asyncio.to_thread(
+                        list_archive_datasets, file_path
+                    )
+                except (ValueError, zipfile.BadZipFile) as e:
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail=f"{file.filename}: {e}",
+                    )
+                if not archive_datasets:
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail=f"{file.filename} does not contain any supported files.",
+                    )
+                if is_shapefile_archive(archive_datasets):
+                    continue
+
+                # Extract each dataset of the ZIP into its own dataset folder
+                datasets.pop()
+                for main_file, members in archive_datasets.items():
+                    member_dataset_id = uuid4()
+                    member_file_path = await asyncio.to_thread(
+                        extract_archive_dataset,
+                        file_path,
+                        members,
+                        os.path.join(
+                            settings.DATA_DIR, str(user_id), str(member_dataset_id)
+                        ),
+                    )
+                    datasets.append(
+                        {
+                            "name": os.path.splitext(os.path.basename(main_file))[0],
+                            "dataset_id": member_dataset_id,
+                            "file_path": member_file_path,
+                            "content_hash": await asyncio.to_thread(
+                                hash_file, member_file_path
+                            ),
+                        }
+                    )
+                await async_delete_dir(file_upload.folder_path)
+
+            if len(datasets) > settings.IMPORT_BATCH_MAX_FILE_CNT:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"A batch import can contain at most {settings.IMPORT_BATCH_MAX_FILE_CNT} datasets.",
+                )
+        except HTTPException:
+            for dataset in datasets:
+                await async_delete_dir(os.path.dirname(dataset["file_path"]))
+            raise
+
+        for dataset in datasets:
+            dataset["file_size"] = os.path.getsize(dataset["file_path"])
+        return datasets
+
     async def get_feature_layer_size(
         self, async_session: AsyncSession, layer: BaseModel | SQLModel
     ):
@@ -348,7 +584,18 @@ class CRUDLayer(CRUDLayerBase):
         order: str,
         query: str,
         page_params: PaginationParams,
+        after_count: int | None = None,
+        after_value: str | None = None,
     ):
+        """Get a page of the unique values of a column ordered by their count.
+
+        Pages beyond the first values kept in the cache are requested by the cursor of
+        the count and value of the last value of the previous page.
+        """
+
+        if (after_count is None) != (after_value is None):
+            raise ValueError("after_count and after_value must be passed together.")
+
         # Check if layer is suitable for stats
         res_check = await self.check_if_column_suitable_for_stats(
             async_session=async_session, id=id, column_name=column_name, query=query
@@ -356,51 +603,88 @@ class CRUDLayer(CRUDLayerBase):
         layer = res_check["layer"]
         column_mapped = res_check["column_mapped"]
         where_query = res_check["where_query"]
-        # Map order
-        order_mapped = {"descendent": "DESC", "ascendent": "ASC"}[order]
-
-        # Build count query
-        count_query = f"""
-            SELECT COUNT(*) AS total_count
-            FROM (
-                SELECT {column_mapped}
-                FROM {layer.table_name}
-                WHERE {where_query}
-                AND {column_mapped} IS NOT NULL
-                GROUP BY {column_mapped}
-            ) AS subquery
-        """
-
-        # Execute count query
-        count_result = await async_session.execute(text(count_query))
-        total_results = count_result.scalar_one()
-
-        # Build data query
-        data_query = f"""
-        SELECT *
-        FROM (
+        data_updated_at = await self.get_data_updated_at(
+            async_session, layer_id=layer.id
+        )
 
-            SELECT JSONB_BUILD_OBJECT(
-                'value', {column_mapped}, 'count', COUNT(*)
+        # Read the values of unfiltered requests from the statistics of the column
+        if not query and after_count is None:
+            statistics = await crud_layer_statistics.get_column(
+                async_session,
+                layer_id=layer.id,
+                column_name=column_mapped,
+                data_updated_at=data_updated_at,
             )
-            FROM {layer.table_name}
-            WHERE {where_query}
-            AND {column_mapped} IS NOT NULL
-            GROUP BY {column_mapped}
-            ORDER BY COUNT(*) {order_mapped}, {column_mapped}
-        ) AS subquery
-        LIMIT {page_params.size}
-        OFFSET {(page_params.page - 1) * page_params.size}
-        """
+            result = (
+                get_unique_values_from_statistics(
+                    statistics, order, page_params.page, page_params.size
+                )
+                if statistics
+                else None
+            )
+            if result is not None:
+                values, total_results = result
+                return Page(
+                    items=[IUniqueValue(**value) for value in values],
+                    total=total_results,
+                    page=page_params.page,
+                    size=page_params.size,
+                )
 
-        # Execute data query
-        data_result = await async_session.execute(text(data_query))
-        result = data_result.fetchall()
-        result = [IUniqueValue(**res[0]) for res in result]
+        # The values are aggregated once per filter, order and data version and paged
+        # from the cache
+        cache_key = (
+            layer.id,
+            column_mapped,
+            unique_values_cache.get_key(
+                where=where_query, order=order, data_updated_at=data_updated_at
+            ),
+        )
+        unique_values = unique_values_cache.get(cache_key)
+        if unique_values is None and after_count is None:
+            values, total_results = await self.query_unique_values(
+                async_session=async_session,
+                layer=layer,
+                column_mapped=column_mapped,
+                where_query=where_query,
+                order=order,
+                limit=settings.UNIQUE_VALUES_CACHE_MAX_VALUES,
+            )
+            unique_values = {"values": values, "total": total_results}
+            unique_values_cache.set(cache_key, unique_values)
+
+        values = None
+        if unique_values is not None:
+            values = get_unique_values_page(
+                unique_values["values"],
+                unique_values["total"],
+                page_params.page,
+                page_params.size,
+                after_count,
+                after_value,
+            )
+            total_results = unique_values["total"]
+        if values is None:
+            # Pages beyond the cached values of columns with many values are only
+            # requested by cursor, which doesn't sort and skip the preceding values
+            if after_count is None:
+                raise ValueError(
+                    f"Pages beyond the first {len(unique_values['values'])} unique values are requested with after_count and after_value of the last value of the previous page."
+                )
+            values, total_results = await self.query_unique_values(
+                async_session=async_session,
+                layer=layer,
+                column_mapped=column_mapped,
+                where_query=where_query,
+                order=order,
+                limit=page_params.size,
+                after_count=after_count,
+                after_value=after_value,
+            )
 
         # Create Page object
         page = Page(
-            items=result,
+            items=[IUniqueValue(**value) for value in values],
             total=total_results,
             page=page_params.page,
             size=page_params.size,
@@ -408,12 +692,73 @@ class CRUDLayer(CRUDLayerBase):
 
         return page
 
+    async def query_unique_values(
+        self,
+        async_session: AsyncSession,
+        layer: Layer,
+        column_mapped: str,
+        where_query: str,
+        order: str,
+        limit: int,
+        after_count: int | None = None,
+        after_value: str | None = None,
+    ) -> tuple[list[dict], int]:
+        """Get the values of a column ordered by their count after the cursor and the
+        number of unique values with one aggregation.
+
+        Values with the same count are ordered by value as the stored statistics are.
+        """
+
+        # Map order
+        order_mapped = {"descendent": "DESC", "ascendent": "ASC"}[order]
+
+        # Continue after the count and value of the cursor
+        keyset_query = ""
+        params = {"limit": limit}
+        if after_count is not None:
+            column_type = column_mapped.split("_attr")[0]
+            if column_type not in STATISTICS_COLUMN_TYPES:
+                raise ValueError(
+                    f"Pages of columns of type {column_type} can't be requested by cursor."
+                )
+            keyset_query = f"""WHERE value_cnt {'<' if order_mapped == 'DESC' else '>'} :after_count
+                OR (value_cnt = :after_count AND value > TO_JSONB(CAST(:after_value AS {column_type})))"""
+            params.update({"after_count": after_count, "after_value": after_value})
+
+        sql_query = f"""
+            WITH grouped AS (
+                SELECT TO_JSONB({column_mapped}) AS value, COUNT(*) AS value_cnt
+                FROM {layer.table_name}
+                WHERE {where_query}
+                AND {column_mapped} IS NOT NULL
+                GROUP BY {column_mapped}
+            )
+            SELECT total.cnt, page.value, page.value_cnt
+            FROM (SELECT COUNT(*) AS cnt FROM grouped) AS total
+            LEFT JOIN LATERAL (
+                SELECT value, value_cnt
+                FROM grouped
+                {keyset_query}
+                ORDER BY value_cnt {order_mapped}, value
+                LIMIT :limit
+            ) AS page ON TRUE
+            ORDER BY page.value_cnt {order_mapped}, page.value
+        """
+        result = (await async_session.execute(text(sql_query), params)).fetchall()
+        values = [
+            {"value": value, "count": count}
+            for _total, value, count in result
+            if count is not None
+        ]
+        return values, result[0][0]
+
     async def get_area_statistics(
         self,
         async_session: AsyncSession,
         id: UUID,
         operation: ColumnStatisticsOperation,
         query: str,
+        approximate: bool = False,
     ):
         # Check if layer is internal layer
         layer = await self.get_internal(async_session, id=id)
@@ -433,12 +778,39 @@ class CRUDLayer(CRUDLayerBase):
             )
 
         # Check if feature count is exceeding the defined limit
-        await crud_layer_project.check_exceed_feature_cnt(
-            async_session=async_session,
-            max_feature_cnt=MaxFeatureCnt.area_statistics.value,
-            layer=layer,
-            where_query=where_query,
-        )
+        if not approximate:
+            await crud_layer_project.check_exceed_feature_cnt(
+                async_session=async_session,
+                max_feature_cnt=MaxFeatureCnt.area_statistics.value,
+                layer=layer,
+                where_query=where_query,
+            )
+        else:
+            # The stored row count of the layer bounds the number of filtered features
+            # without counting them
+            row_count = (
+                await crud_layer_statistics.get_row_counts(
+                    async_session, layer_ids=[layer.id]
+                )
+            ).get(layer.id)
+            if row_count is not None:
+                row_cnt = row_count.row_cnt
+            else:
+                row_cnt = (
+                    await crud_layer_project.get_feature_cnt(
+                        async_session=async_session, layer_project=layer
+                    )
+                )["total_count"]
+            # Estimate the statistics of large layers from a sample
+            if row_cnt > MaxFeatureCnt.area_statistics.value:
+                return await self.estimate_area_statistics(
+                    async_session=async_session,
+                    layer=layer,
+                    operation=operation,
+                    where_query=where_query,
+                    row_cnt=row_cnt,
+                    is_filtered=bool(query),
+                )
         where_query = "WHERE " + where_query
 
         # Call SQL function
@@ -449,7 +821,78 @@ class CRUDLayer(CRUDLayerBase):
             sql_query,
         )
         res = res.fetchall()
-        return res[0][0] if res else None
+        if not res:
+            return None
+        return {**res[0][0], "is_estimate": False} if approximate else res[0][0]
+
+    async def estimate_area_statistics(
+        self,
+        async_session: AsyncSession,
+        layer: Layer,
+        operation: ColumnStatisticsOperation,
+        where_query: str,
+        row_cnt: int,
+        is_filtered: bool,
+    ) -> dict:
+        """Estimate the area statistics of a layer from a sample of its features with
+        a 95 % confidence interval.
+
+        The user data table is shared by the layers of a user. Rows of small tables are
+        sampled, blocks of large tables so that only the sampled pages are read. The
+        number of filtered features is estimated from the sample as well.
+        """
+
+        sample_fraction = min(
+            settings.APPROXIMATE_STATISTICS_SAMPLE_SIZE / row_cnt, 1.0
+        )
+        table_pages = (
+            await async_session.execute(
+                text(
+                    "SELECT relpages FROM pg_class WHERE oid = CAST(:table AS regclass)"
+                ),
+                {"table": layer.table_name},
+            )
+        ).scalar_one()
+        if table_pages >= settings.APPROXIMATE_STATISTICS_BLOCK_SAMPLE_MIN_PAGES:
+            sample_method, sample_unit = "SYSTEM", "(ctid::text::point)[0]"
+        else:
+            sample_method, sample_unit = "BERNOULLI", "ctid::text"
+
+        # The sample is repeatable, so the estimates of unchanged layers are stable
+        sql_query = f"""
+            WITH units AS (
+                SELECT COUNT(*) AS cnt, SUM(area) AS area, MIN(area) AS min_area,
+                    MAX(area) AS max_area
+                FROM (
+                    SELECT {sample_unit} AS unit, ST_AREA(geom::geography) AS area
+                    FROM {layer.table_name}
+                    TABLESAMPLE {sample_method} (:percent) REPEATABLE (0)
+                    WHERE {where_query}
+                ) sample
+                GROUP BY unit
+            )
+            SELECT COALESCE(SUM(cnt), 0), SUM(area), SUM(area * area), MIN(min_area),
+                MAX(max_area)
+            FROM units
+        """
+        result = (
+            await async_session.execute(
+                text(sql_query), {"percent": sample_fraction * 100}
+            )
+        ).fetchone()
+        estimate = estimate_from_sample(
+            operation.value, *result, sample_fraction=sample_fraction
+        )
+        return {
+            operation.value: estimate["value"],
+            "is_estimate": True,
+            "confidence_interval": estimate["confidence_interval"],
+            "confidence_level": CONFIDENCE_LEVEL,
+            "sample_size": result[0],
+            "feature_count": (
+                round(result[0] / sample_fraction) if is_filtered else row_cnt
+            ),
+        }
 
     async def get_class_breaks(
         self,
@@ -465,43 +908,63 @@ class CRUDLayer(CRUDLayerBase):
         res = await self.check_if_column_suitable_for_stats(
             async_session=async_session, id=id, column_name=column_name, query=query
         )
+        data_updated_at = await self.get_data_updated_at(
+            async_session, layer_id=res["layer"].id
+        )
 
-        args = res
-        where_clause = res["where_query"]
-        args["table_name"] = args["layer"].table_name
-        # del layer from args
-        del args["layer"]
+        # Read the breaks of unfiltered requests from the statistics of the column
+        if not query:
+            statistics = await crud_layer_statistics.get_column(
+                async_session,
+                layer_id=res["layer"].id,
+                column_name=res["column_mapped"],
+                data_updated_at=data_updated_at,
+            )
+            if statistics:
+                class_breaks = get_class_breaks_from_statistics(
+                    statistics, operation, breaks, stripe_zeros
+                )
+                if class_breaks is not None:
+                    return class_breaks
 
-        # Extend where clause
+        layer = res["layer"]
         column_mapped = res["column_mapped"]
+        where_query = res["where_query"]
         if stripe_zeros:
-            where_extension = (
-                f" AND {column_mapped} != 0"
-                if where_clause
-                else f"{column_mapped} != 0"
+            where_query += f" AND {column_mapped} != 0"
+
+        # The breaks of all operations are computed at once as users toggle them
+        cache_key = (
+            layer.id,
+            column_mapped,
+            class_breaks_cache.get_key(
+                where=where_query, breaks=breaks, data_updated_at=data_updated_at
+            ),
+        )
+        class_breaks = class_breaks_cache.get(cache_key)
+        if class_breaks is None:
+            # Fetch the values as an array of big-endian doubles
+            sql_query = f"""
+                SELECT STRING_AGG(FLOAT8SEND({column_mapped}::float8), ''::bytea)
+                FROM {layer.table_name}
+                WHERE {where_query}
+                AND {column_mapped} IS NOT NULL
+            """
+            data = (await async_session.execute(text(sql_query))).scalar_one()
+            values = np.frombuffer(data or b"", dtype=">f8").astype(np.float64)
+            class_breaks = await asyncio.to_thread(
+                get_class_breaks_from_values,
+                values,
+                breaks,
+                settings.CLASS_BREAKS_JENKS_SAMPLE_SIZE,
             )
-            args["where"] = where_clause + where_extension
-
-        # Define additional arguments
-        if breaks:
-            args["breaks"] = breaks
-
-        # Choose the SQL query based on operation
-        if operation == ComputeBreakOperation.quantile:
-            sql_query = "SELECT * FROM basic.quantile_breaks(:table_name, :column_mapped, :where, :breaks)"
-        elif operation == ComputeBreakOperation.equal_interval:
-            sql_query = "SELECT * FROM basic.equal_interval_breaks(:table_name, :column_mapped, :where, :breaks)"
-        elif operation == ComputeBreakOperation.standard_deviation:
-            sql_query = "SELECT * FROM basic.standard_deviation_breaks(:table_name, :column_mapped, :where)"
-        elif operation == ComputeBreakOperation.heads_and_tails:
-            sql_query = "SELECT * FROM basic.heads_and_tails_breaks(:table_name, :column_mapped, :where, :breaks)"
-        else:
-            raise OperationNotSupportedError("Operation not supported")
+            class_breaks_cache.set(cache_key, class_breaks)
 
-        # Execute the query
-        res = await async_session.execute(sql_query, args)
-        res = res.fetchall()
-        return res[0][0] if res else None
+        if operation not in class_breaks:
+            raise OperationNotSupportedError("Operation not supported")
+        # Callers adjust the breaks of the result
+        result = class_breaks[operation]
+        return {**result, "breaks": list(result["breaks"])}
 
     async def get_last_data_updated_at(
         self, async_session: AsyncSession, id: UUID, query: str
@@ -674,6 +1137,50 @@ class CRUDLayer(CRUDLayerBase):
         layers.items = layers_arr
         return layers
 
+    async def get_metadata_aggregate_query(
+        self,
+        user_id: UUID,
+        params: IMetadataAggregate | ILayerGet,
+    ):
+        """Get the query counting the layers of all metadata values at once.
+
+        Each metadata attribute is a grouping set. Its counts are filtered by the
+        filters of the other attributes, so the values of an attribute don't exclude
+        each other.
+        """
+
+        attributes = list(IMetadataAggregateRead.__fields__)
+        filters = await self.get_base_filter(
+            user_id=user_id, params=params, attributes_to_exclude=attributes
+        )
+        attribute_filters = {}
+        for key in attributes:
+            value = getattr(params, key, None)
+            if value is not None:
+                if not isinstance(value, list):
+                    value = [value]
+                attribute_filters[key] = getattr(Layer, key).in_(value)
+
+        columns = [getattr(Layer, key) for key in attributes]
+        counts = [
+            func.count(Layer.id).filter(
+                and_(
+                    true(),
+                    *[
+                        attribute_filter
+                        for other_key, attribute_filter in attribute_filters.items()
+                        if other_key != key
+                    ],
+                )
+            )
+            for key in attributes
+        ]
+        return (
+            select([*[func.grouping(column) for column in columns], *columns, *counts])
+            .where(and_(*filters))
+            .group_by(func.grouping_sets(*columns))
+        )
+
     async def metadata_aggregate(
         self,
         async_session: AsyncSession,
@@ -685,35 +1192,36 @@ class CRUDLayer(CRUDLayerBase):
         if params is None:
             params = ILayerGet()
 
-        # Loop through all attributes
-        result = {}
-        for attribute in params:
-            key = attribute[0]
-            if key in ("search", "spatial_search", "folder_id"):
-                continue
+        cache_key = (
+            user_id,
+            metadata_aggregate_cache.get_key(
+                params_type=type(params).__name__, params=params.dict()
+            ),
+        )
+        result = metadata_aggregate_cache.get(cache_key)
+        if result is not None:
+            return result
 
-            # Build filter for respective group
-            filters = await self.get_base_filter(
-                user_id=user_id, params=params, attributes_to_exclude=[key]
-            )
-            # Get attribute from layer
-            group_by = getattr(Layer, key)
-            sql_query = (
-                select([group_by, func.count(Layer.id).label("count")])
-                .where(and_(*filters))
-                .group_by(group_by)
-            )
-            res = await async_session.execute(sql_query)
-            res = res.fetchall()
-            # Create metadata object
-            metadata = [
-                MetadataGroupAttributes(value=str(r[0]), count=r[1])
-                for r in res
-                if r[0] is not None
-            ]
-            result[key] = metadata
+        sql_query = await self.get_metadata_aggregate_query(
+            user_id=user_id, params=params
+        )
+        res = await async_session.execute(sql_query)
+
+        # Each row is a value of the attribute of its grouping set
+        attributes = list(IMetadataAggregateRead.__fields__)
+        attributes_cnt = len(attributes)
+        result = {key: [] for key in attributes}
+        for r in res.fetchall():
+            index = list(r[:attributes_cnt]).index(0)
+            value = r[attributes_cnt + index]
+            count = r[2 * attributes_cnt + index]
+            if value is not None and count:
+                result[attributes[index]].append(
+                    MetadataGroupAttributes(value=str(value), count=count)
+                )
 
         result = IMetadataAggregateRead(**result)
+        metadata_aggregate_cache.set(cache_key, result)
         return result
 
 
@@ -725,9 +1233,6 @@ class CRUDLayerImport(CRUDFailedJob):
 
     def __init__(self, job_id, background_tasks, async_session, user_id):
         super().__init__(job_id, background_tasks, async_session, user_id)
-        self.temp_table_name = (
-            f'{settings.USER_DATA_SCHEMA}."{str(self.job_id).replace("-", "")}"'
-        )
 
     async def create_internal(
         self,
@@ -797,6 +1302,9 @@ class CRUDLayerImport(CRUDFailedJob):
         if layer.type == LayerType.feature:
             await CRUDLayer(Layer).label_cluster_keep(self.async_session, layer)
 
+        # Compute the statistics of the columns
+        await crud_layer_statistics.compute(self.async_session, layer)
+
         if project_id:
             # Add layer to project
             await crud_layer_project.create(
@@ -813,7 +1321,7 @@ class CRUDLayerImport(CRUDFailedJob):
         layer_in: ILayerFromDatasetCreate,
         project_id: UUID = None,
     ):
-        """Import file using ogr2ogr."""
+        """Import file using binary COPY."""
 
         # Initialize OGRFileHandling
         ogr_file_upload = OGRFileHandling(
@@ -823,29 +1331,18 @@ class CRUDLayerImport(CRUDFailedJob):
         )
 
         # Create attribute mapping out of valid attributes
-        attribute_mapping = {}
-        for field_type, field_names in file_metadata["data_types"]["valid"].items():
-            cnt = 1
-            for field_name in field_names:
-                if field_name == "id":
-                    continue
-                # Replace hyphens with an underscore as ogr2ogr also does this while importing the layer
-                # TODO: Find a more robust way to sync changes made by ogr2ogr to field names and this attribute mapping
-                attribute_mapping[field_type + "_attr" + str(cnt)] = field_name.replace(
-                    "-", "_"
-                )
-                cnt += 1
+        attribute_mapping = get_attribute_mapping(file_metadata["data_types"])
 
-        # Upload file to temporary table using ogr2ogr
-        result = await ogr_file_upload.upload_ogr2ogr(
-            temp_table_name=self.temp_table_name,
+        # Stream file into the target table
+        result = await ogr_file_upload.upload_copy(
+            validation_result=file_metadata,
+            attribute_mapping=attribute_mapping,
+            layer_id=layer_in.id,
             job_id=self.job_id,
         )
-        # Migrate temporary table to target table
+        # Finalize the data in the target table
         result = await ogr_file_upload.migrate_target_table(
             validation_result=file_metadata,
-            attribute_mapping=attribute_mapping,
-            temp_table_name=self.temp_table_name,
             layer_id=layer_in.id,
             job_id=self.job_id,
         )
@@ -856,6 +1353,12 @@ class CRUDLayerImport(CRUDFailedJob):
             attribute_mapping=attribute_mapping,
             project_id=project_id,
         )
+        # Remember the loaded rows so that a repeated import of the file can copy them
+        await ogr_file_upload.register_loaded_layer(
+            validation_result=file_metadata,
+            attribute_mapping=attribute_mapping,
+            layer_id=layer_id,
+        )
 
         return result, layer_id
 
@@ -877,6 +1380,237 @@ class CRUDLayerImport(CRUDFailedJob):
         return result
 
 
+class CRUDLayerImportBatch(CRUDFailedJob):
+    """CRUD class for importing many datasets in one job.
+
+    The progress of each dataset is reported in the `files` list of the job payload.
+    A dataset that fails to validate or load doesn't fail the other datasets.
+    """
+
+    def __init__(self, job_id, background_tasks, async_session, user_id):
+        super().__init__(job_id, background_tasks, async_session, user_id)
+        self.files = []
+        self.file_metadata = {}
+        self.files_lock = asyncio.Lock()
+
+    async def update_file_status(self, index: int, **file_status):
+        """Update the status of a dataset in the job payload."""
+
+        async with self.files_lock:
+            self.files[index].update(file_status)
+            await crud_job.update_payload(
+                async_session=self.async_session,
+                job_id=self.job_id,
+                payload={"files": self.files},
+            )
+
+    @job_log(job_step_name="validation", timeout=settings.IMPORT_BATCH_TIMEOUT)
+    async def validate_files(self, datasets: list[dict]):
+        """Validate the datasets in parallel worker processes.
+
+        At most one validation per worker is in flight, so the validation timeout
+        doesn't run out for datasets waiting for a worker.
+        """
+
+        async def validate(
+            index: int, dataset: dict, executor: Executor, semaphore: asyncio.Semaphore
+        ):
+            file_ending = os.path.splitext(dataset["file_path"])[-1][1:]
+            try:
+                async with semaphore:
+                    metadata = await CRUDLayer(Layer).validate_file(
+                        async_session=self.async_session,
+                        user_id=self.user_id,
+                        dataset_id=dataset["dataset_id"],
+                        file_path=dataset["file_path"],
+                        file_ending=file_ending,
+                        file_size=dataset["file_size"],
+                        layer_type=LayerType.table
+                        if file_ending in TableUploadType.__members__
+                        else LayerType.feature,
+                        content_hash=dataset["content_hash"],
+                        executor=executor,
+                    )
+            except HTTPException as e:
+                await async_delete_dir(os.path.dirname(dataset["file_path"]))
+                await self.update_file_status(
+                    index,
+                    status=JobStatusType.failed.value,
+                    msg=Msg(type=MsgType.error, text=str(e.detail)).dict(),
+                )
+                return
+            self.file_metadata[index] = json.loads(metadata.json())
+            await self.update_file_status(index, msg=metadata.msg.dict())
+
+        # Spawn the workers as forking would copy the event loop and open connections
+        pool = ProcessPoolExecutor(
+            max_workers=settings.IMPORT_BATCH_VALIDATION_WORKER_CNT,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        semaphore = asyncio.Semaphore(settings.IMPORT_BATCH_VALIDATION_WORKER_CNT)
+        try:
+            await asyncio.gather(
+                *[
+                    validate(index, dataset, pool, semaphore)
+                    for index, dataset in enumerate(datasets)
+                ]
+            )
+        finally:
+            await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+
+        msg_text = f"{len(self.file_metadata)} of {len(datasets)} datasets are valid."
+        if not self.file_metadata:
+            return {"msg": msg_text, "status": JobStatusType.failed.value}
+        return {
+            "msg": Msg(type=MsgType.info, text=msg_text),
+            "status": JobStatusType.finished.value,
+        }
+
+    async def import_dataset(
+        self,
+        index: int,
+        folder_id: UUID,
+        project_id: UUID | None,
+        semaphore: asyncio.Semaphore,
+    ) -> bool:
+        """Load a validated dataset into a new layer over its own connections."""
+
+        file_metadata = self.file_metadata[index]
+        layer_id = uuid4()
+        async with semaphore, session_manager.session() as async_session:
+            await self.update_file_status(index, status=JobStatusType.running.value)
+            ogr_file_upload = OGRFileHandling(
+                async_session=async_session,
+                user_id=self.user_id,
+                file_path=file_metadata["file_path"],
+            )
+            attribute_mapping = get_attribute_mapping(file_metadata["data_types"])
+
+            async def report_progress(row_cnt: int, duration: float):
+                await self.update_file_status(index, row_cnt=row_cnt)
+
+            try:
+                # Load the file over a single bulk load connection to stay within the connection budget
+                result = await ogr_file_upload.copy_file(
+                    validation_result=file_metadata,
+                    attribute_mapping=attribute_mapping,
+                    layer_id=layer_id,
+                    on_progress=report_progress,
+                    worker_cnt=1,
+                )
+                await ogr_file_upload.finalize_target_table(
+                    validation_result=file_metadata, layer_id=layer_id
+                )
+                await CRUDLayerImport(
+                    job_id=self.job_id,
+                    background_tasks=self.background_tasks,
+                    async_session=async_session,
+                    user_id=self.user_id,
+                ).create_internal(
+                    layer_in=ILayerFromDatasetCreate(
+                        id=layer_id,
+                        name=self.files[index]["name"],
+                        folder_id=folder_id,
+                        dataset_id=file_metadata["dataset_id"],
+                    ),
+                    file_metadata=file_metadata,
+                    attribute_mapping=attribute_mapping,
+                    project_id=project_id,
+                )
+                await ogr_file_upload.register_loaded_layer(
+                    validation_result=file_metadata,
+                    attribute_mapping=attribute_mapping,
+                    layer_id=layer_id,
+                )
+            except Exception as e:
+                await async_session.rollback()
+                await ogr_file_upload.upload_copy_fail(
+                    validation_result=file_metadata, layer_id=layer_id
+                )
+                await async_session.execute(
+                    text(
+                        f"DELETE FROM {settings.CUSTOMER_SCHEMA}.layer WHERE id = :layer_id"
+                    ),
+                    {"layer_id": layer_id},
+                )
+                await async_session.commit()
+                await self.update_file_status(
+                    index,
+                    status=JobStatusType.failed.value,
+                    msg=Msg(
+                        type=MsgType.error, text=sanitize_error_message(str(e))
+                    ).dict(),
+                )
+                return False
+
+        await self.update_file_status(
+            index,
+            status=JobStatusType.finished.value,
+            layer_id=str(layer_id),
+            row_cnt=result["row_cnt"],
+        )
+        return True
+
+    @job_log(
+        job_step_name="upload", timeout=settings.IMPORT_BATCH_TIMEOUT, report_msg=True
+    )
+    async def import_files(self, folder_id: UUID, project_id: UUID | None = None):
+        """Load the valid datasets, a bounded number at a time."""
+
+        # Each dataset is loaded over a session and a bulk load connection
+        concurrency = max(
+            1,
+            min(
+                settings.IMPORT_BATCH_CONCURRENCY,
+                settings.IMPORT_BATCH_MAX_CONNECTIONS // 2,
+            ),
+        )
+        semaphore = asyncio.Semaphore(concurrency)
+        results = await asyncio.gather(
+            *[
+                self.import_dataset(index, folder_id, project_id, semaphore)
+                for index in sorted(self.file_metadata)
+            ]
+        )
+
+        msg_text = f"{sum(results)} of {len(self.files)} datasets imported."
+        if not any(results):
+            return {"msg": msg_text, "status": JobStatusType.failed.value}
+        return {
+            "msg": Msg(type=MsgType.info, text=msg_text),
+            "status": JobStatusType.finished.value,
+        }
+
+    @run_background_or_immediately(settings)
+    @job_init()
+    async def import_files_job(
+        self,
+        datasets: list[dict],
+        folder_id: UUID,
+        project_id: UUID = None,
+    ):
+        """Create a layer from each dataset of a batch."""
+
+        self.files = [
+            {
+                "name": dataset["name"],
+                "dataset_id": str(dataset["dataset_id"]),
+                "status": JobStatusType.pending.value,
+            }
+            for dataset in datasets
+        ]
+        await crud_job.update_payload(
+            async_session=self.async_session,
+            job_id=self.job_id,
+            payload={"files": self.files},
+        )
+
+        result = await self.validate_files(datasets=datasets)
+        if result["status"] != JobStatusType.finished.value:
+            return result
+        return await self.import_files(folder_id=folder_id, project_id=project_id)
+
+
 class CRUDLayerExport:
     """CRUD class for Layer import."""
 
@@ -888,54 +1622,73 @@ class CRUDLayerExport:
             settings.DATA_DIR, str(self.user_id), str(self.id)
         )
 
-    async def create_metadata_file(self, layer: Layer, layer_in: ILayerExport):
-        last_data_updated_at = await CRUDLayer(Layer).get_last_data_updated_at(
-            async_session=self.async_session, id=self.id, query=layer_in.query
+    async def get_metadata_text(
+        self,
+        layer: Layer,
+        layer_in: ILayerExport,
+        last_data_updated_at: datetime | None = None,
+    ) -> str:
+        """Get the content of the metadata.txt file of an export."""
+
+        if last_data_updated_at is None:
+            last_data_updated_at = await CRUDLayer(Layer).get_last_data_updated_at(
+                async_session=self.async_session, id=self.id, query=layer_in.query
+            )
+        separator = "############################################################"
+        lines = [
+            # Write some heading
+            separator,
+            f"Metadata for layer {layer.name}",
+            separator,
+            f"Exported Coordinate Reference System: {layer_in.crs}",
+            f"Exported File Type: {OgrDriverType[layer_in.file_type.value].value}",
+            separator,
+            f"Last data update: {last_data_updated_at}",
+            f"Last metadata update: {layer.updated_at}",
+            f"Created at: {layer.created_at}",
+            f"Exported at: {datetime.now()}",
+            separator,
+            f"Name: {layer.name}",
+            f"Description: {layer.description}",
+        ]
+        if layer.tags:
+            lines.append(f"Tags: {', '.join(layer.tags)}")
+        lines += [
+            f"Lineage: {layer.lineage}",
+            f"Positional Accuracy: {layer.positional_accuracy}",
+            f"Attribute Accuracy: {layer.attribute_accuracy}",
+            f"Completeness: {layer.completeness}",
+            f"Upload Reference System: {layer.upload_reference_system}",
+            f"Upload File Type: {layer.upload_file_type}",
+            f"Geographical Code: {layer.geographical_code}",
+            f"Language Code: {layer.language_code}",
+            f"Distributor Name: {layer.distributor_name}",
+            f"Distributor Email: {layer.distributor_email}",
+            f"Distribution URL: {layer.distribution_url}",
+            f"License: {layer.license}",
+            f"Attribution: {layer.attribution}",
+            f"Data Reference Year: {layer.data_reference_year}",
+            f"Data Category: {layer.data_category}",
+        ]
+        return "\n".join(lines) + "\n" + separator
+
+    async def create_metadata_file(
+        self,
+        layer: Layer,
+        layer_in: ILayerExport,
+        last_data_updated_at: datetime | None = None,
+    ):
+        metadata_text = await self.get_metadata_text(
+            layer=layer, layer_in=layer_in, last_data_updated_at=last_data_updated_at
         )
         # Write metadata to metadata.txt file
         with open(
             os.path.join(self.folder_path, layer_in.file_name, "metadata.txt"), "w"
         ) as f:
-            # Write some heading
-            f.write("############################################################\n")
-            f.write(f"Metadata for layer {layer.name}\n")
-            f.write("############################################################\n")
-            f.write(f"Exported Coordinate Reference System: {layer_in.crs}\n")
-            f.write(
-                f"Exported File Type: {OgrDriverType[layer_in.file_type.value].value}\n"
-            )
-            f.write("############################################################\n")
-            f.write(f"Last data update: {last_data_updated_at}\n")
-            f.write(f"Last metadata update: {layer.updated_at}\n")
-            f.write(f"Created at: {layer.created_at}\n")
-            f.write(f"Exported at: {datetime.now()}\n")
-            f.write("############################################################\n")
-            f.write(f"Name: {layer.name}\n")
-            f.write(f"Description: {layer.description}\n")
-            if layer.tags:
-                f.write(f"Tags: {', '.join(layer.tags)}\n")
-            f.write(f"Lineage: {layer.lineage}\n")
-            f.write(f"Positional Accuracy: {layer.positional_accuracy}\n")
-            f.write(f"Attribute Accuracy: {layer.attribute_accuracy}\n")
-            f.write(f"Completeness: {layer.completeness}\n")
-            f.write(f"Upload Reference System: {layer.upload_reference_system}\n")
-            f.write(f"Upload File Type: {layer.upload_file_type}\n")
-            f.write(f"Geographical Code: {layer.geographical_code}\n")
-            f.write(f"Language Code: {layer.language_code}\n")
-            f.write(f"Distributor Name: {layer.distributor_name}\n")
-            f.write(f"Distributor Email: {layer.distributor_email}\n")
-            f.write(f"Distribution URL: {layer.distribution_url}\n")
-            f.write(f"License: {layer.license}\n")
-            f.write(f"Attribution: {layer.attribution}\n")
-            f.write(f"Data Reference Year: {layer.data_reference_year}\n")
-            f.write(f"Data Category: {layer.data_category}\n")
-            f.write("############################################################")
+            f.write(metadata_text)
 
-    async def export_file(
-        self,
-        layer_in: ILayerExport,
-    ):
-        """Export file using ogr2ogr."""
+    async def get_export_layer(self, layer_in: ILayerExport) -> Layer:
+        """Get the layer to export and check that it can be exported."""
 
         # Get layer
         layer = await CRUDLayer(Layer).get_internal(
@@ -954,8 +1707,54 @@ class CRUDLayerExport:
                 raise NoCRSError(
                     "CRS is required for feature layers. Please provide a CRS."
                 )
+        return layer
+
+    async def get_data_version(self, layer: Layer, layer_in: ILayerExport) -> dict:
+        """Get the last update and the count of the rows to export.
+
+        The count changes if rows are deleted, which doesn't change the last update.
+        """
+
+        where_query = build_where(
+            layer.id, layer.table_name, layer_in.query, layer.attribute_mapping
+        )
+        result = await self.async_session.execute(
+            text(
+                f"""SELECT MAX(updated_at), COUNT(*)
+                FROM {layer.table_name}
+                WHERE {where_query}"""
+            )
+        )
+        last_data_updated_at, row_cnt = result.fetchone()
+        return {"last_data_updated_at": last_data_updated_at, "row_cnt": row_cnt}
+
+    def get_cache_key(
+        self, layer: Layer, layer_in: ILayerExport, data_version: dict, stream: bool
+    ) -> str:
+        """Get the key of the export in the export cache."""
+
+        query_hash = None
+        if layer_in.query is not None:
+            query_hash = hashlib.sha256(
+                layer_in.query.json(sort_keys=True).encode()
+            ).hexdigest()
+        return ExportCache.get_key(
+            layer_id=layer.id,
+            **data_version,
+            # The metadata of the layer is part of the archive
+            layer_updated_at=layer.updated_at,
+            query_hash=query_hash,
+            crs=layer_in.crs,
+            file_type=layer_in.file_type.value,
+            file_name=layer_in.file_name,
+            stream=stream,
+        )
+
+    def get_export_query(
+        self, layer: Layer, layer_in: ILayerExport, geometry_select: str = "geom"
+    ) -> str:
+        """Build the SQL query selecting the rows to export with their original column names."""
 
-        # Build SQL query for export
         # Build select query based on attribute mapping
         select_query = ""
         for key, value in layer.attribute_mapping.items():
@@ -963,7 +1762,7 @@ class CRUDLayerExport:
 
         # Add id and geom
         if layer.type == LayerType.feature:
-            select_query = "id, " + select_query + "geom"
+            select_query = "id, " + select_query + geometry_select
         else:
             select_query = "id, " + select_query
             select_query = select_query[:-2]
@@ -973,11 +1772,33 @@ class CRUDLayerExport:
             layer.id, layer.table_name, layer_in.query, layer.attribute_mapping
         )
         query = build_where_clause([where_query])
-        sql_query = f"""
+        return f"""
             SELECT {select_query}
             FROM {layer.table_name}
             {query}
         """
+
+    async def export_file(
+        self,
+        layer_in: ILayerExport,
+    ):
+        """Export file using ogr2ogr."""
+
+        layer = await self.get_export_layer(layer_in=layer_in)
+
+        # Serve the archive of an export of the same data and options
+        data_version = await self.get_data_version(layer=layer, layer_in=layer_in)
+        cache_key = self.get_cache_key(
+            layer=layer, layer_in=layer_in, data_version=data_version, stream=False
+        )
+        export_cache = ExportCache()
+        cached_path = await asyncio.to_thread(export_cache.get, cache_key)
+        if cached_path is not None:
+            return cached_path
+
+        # Build SQL query for export
+        sql_query = self.get_export_query(layer=layer, layer_in=layer_in)
+
         # Build filepath
         file_path = os.path.join(
             self.folder_path,
@@ -988,22 +1809,33 @@ class CRUDLayerExport:
         # Delete files that are older then one hour
         await delete_old_files(3600)
 
-        # Initialize OGRFileHandling
-        ogr_file_handling = OGRFileHandling(
-            async_session=self.async_session,
-            user_id=self.user_id,
-            file_path=file_path,
-        )
-        file_path = await ogr_file_handling.export_ogr2ogr(
-            layer=layer,
-            file_type=layer_in.file_type,
-            file_name=layer_in.file_name,
-            sql_query=sql_query,
-            crs=layer_in.crs,
-        )
+        if layer_in.file_type.value in ARROW_EXPORT_TYPES:
+            await async_delete_dir(self.folder_path)
+            await asyncio.to_thread(os.makedirs, os.path.dirname(file_path))
+            file_path = await self.write_arrow_file(
+                layer=layer, layer_in=layer_in, file_path=file_path
+            )
+        else:
+            # Initialize OGRFileHandling
+            ogr_file_handling = OGRFileHandling(
+                async_session=self.async_session,
+                user_id=self.user_id,
+                file_path=file_path,
+            )
+            file_path = await ogr_file_handling.export_ogr2ogr(
+                layer=layer,
+                file_type=layer_in.file_type,
+                file_name=layer_in.file_name,
+                sql_query=sql_query,
+                crs=layer_in.crs,
+            )
 
         # Write data into metadata.txt file
-        await self.create_metadata_file(layer=layer, layer_in=layer_in)
+        await self.create_metadata_file(
+            layer=layer,
+            layer_in=layer_in,
+            last_data_updated_at=data_version["last_data_updated_at"],
+        )
 
         # Zip result folder
         result_dir = os.path.join(
@@ -1016,11 +1848,378 @@ class CRUDLayerExport:
         # Delete folder
         await async_delete_dir(self.folder_path)
 
+        await asyncio.to_thread(export_cache.put, cache_key, result_dir)
         return result_dir
 
     async def export_file_run(self, layer_in: ILayerExport):
         return await self.export_file(layer_in=layer_in)
 
+    def get_export_srid(self, layer: Layer, layer_in: ILayerExport) -> int | None:
+        """Get the EPSG code of the CRS the geometries are transformed to in the database."""
+
+        if layer.type != LayerType.feature:
+            return None
+        check_crs_bounds(layer=layer, crs=layer_in.crs)
+        srid = CRS(layer_in.crs).to_epsg()
+        if srid is None:
+            raise OperationNotSupportedError(
+                f"Exports as {layer_in.file_type.value} require a CRS with an EPSG code."
+            )
+        return srid
+
+    def encode_export(
+        self, layer: Layer, layer_in: ILayerExport, srid: int | None
+    ) -> AsyncIterator[bytes]:
+        """Encode the rows to export while they are read from a server-side cursor."""
+
+        file_type = layer_in.file_type.value
+        geometry_select = None
+        if srid is not None:
+            geometry_select = get_geometry_select(file_type, srid)
+        sql_query = self.get_export_query(
+            layer=layer, layer_in=layer_in, geometry_select=geometry_select
+        )
+        batches = fetch_batches(sql_query)
+        columns = [("id", "text")] + [
+            (value, key.split("_attr")[0])
+            for key, value in layer.attribute_mapping.items()
+        ]
+        column_names = [column for column, _column_type in columns]
+        if file_type == FeatureLayerExportType.geojson.value:
+            return encode_geojson(batches, column_names, layer.name, srid)
+        elif file_type == FeatureLayerExportType.csv.value:
+            return encode_csv(batches, column_names, srid is not None)
+        elif file_type in ARROW_EXPORT_TYPES:
+            return encode_arrow(batches, file_type, columns, srid)
+        return encode_ogr(
+            batches,
+            file_path=os.path.join(self.folder_path, f"{uuid4()}.{file_type}"),
+            file_type=file_type,
+            layer_name=layer.name,
+            columns=columns,
+            srid=srid,
+        )
+
+    async def write_arrow_file(
+        self, layer: Layer, layer_in: ILayerExport, file_path: str
+    ) -> str:
+        """Write the rows into a GeoParquet or Arrow IPC file.
+
+        The geometries are read as WKB over the binary protocol of asyncpg instead of
+        the text serialized rows read by ogr2ogr.
+        """
+
+        srid = self.get_export_srid(layer=layer, layer_in=layer_in)
+        content = self.encode_export(layer=layer, layer_in=layer_in, srid=srid)
+        async with aiofiles.open(file_path, "wb") as f:
+            async for data in content:
+                await f.write(data)
+        return file_path
+
+    async def export_file_stream(self, layer_in: ILayerExport) -> AsyncIterator[bytes]:
+        """Export file into a ZIP that is streamed while the rows are read from the database.
+
+        The layer, CRS and file type are checked before the stream is returned, so
+        errors are raised before the response starts.
+        """
+
+        file_type = layer_in.file_type.value
+        if file_type not in STREAM_EXPORT_TYPES:
+            raise OperationNotSupportedError(
+                f"Exports of file type {file_type} can't be streamed."
+            )
+        layer = await self.get_export_layer(layer_in=layer_in)
+
+        if layer.type != LayerType.feature and file_type not in [
+            TableLayerExportType.csv.value,
+            *ARROW_EXPORT_TYPES,
+        ]:
+            raise OperationNotSupportedError(
+                "Table layers can only be streamed as CSV, GeoParquet or Arrow."
+            )
+        srid = self.get_export_srid(layer=layer, layer_in=layer_in)
+
+        # Send the archive of an export of the same data and options
+        data_version = await self.get_data_version(layer=layer, layer_in=layer_in)
+        cache_key = self.get_cache_key(
+            layer=layer, layer_in=layer_in, data_version=data_version, stream=True
+        )
+        export_cache = ExportCache()
+        cached_path = await asyncio.to_thread(export_cache.get, cache_key)
+        if cached_path is not None:
+            try:
+                # Open the archive right away as it may be evicted while it is sent
+                return iterate_file(await aiofiles.open(cached_path, "rb"))
+            except FileNotFoundError:
+                pass
+
+        metadata_text = await self.get_metadata_text(
+            layer=layer,
+            layer_in=layer_in,
+            last_data_updated_at=data_version["last_data_updated_at"],
+        )
+        if file_type in OGR_EXPORT_TYPES:
+            await asyncio.to_thread(os.makedirs, self.folder_path, exist_ok=True)
+        content = self.encode_export(layer=layer, layer_in=layer_in, srid=srid)
+
+        # Add the archive to the cache while it is sent
+        return export_cache.tee(
+            cache_key,
+            stream_zip(
+                [
+                    (f"{layer_in.file_name}/{layer_in.file_name}.{file_type}", content),
+                    (
+                        f"{layer_in.file_name}/metadata.txt",
+                        iterate_content(metadata_text.encode()),
+                    ),
+                ]
+            ),
+        )
+
+
+class CRUDProjectExport(CRUDFailedJob):
+    """CRUD class for exporting the feature and table layers of a project into one archive.
+
+    A bounded number of layers is exported at a time, each by its own ogr2ogr process
+    and session. The state and wall time of each layer are reported in the `layers`
+    list of the job payload and in the manifest of the archive.
+    """
+
+    def __init__(self, job_id, background_tasks, async_session, user_id):
+        super().__init__(job_id, background_tasks, async_session, user_id)
+        self.layers = []
+        self.layers_lock = asyncio.Lock()
+        self.folder_path = os.path.join(
+            settings.DATA_DIR, str(self.user_id), str(self.job_id)
+        )
+
+    @staticmethod
+    def get_archive_path(user_id: UUID, job_id: UUID) -> str:
+        """Get the path of the archive of a project export job."""
+
+        return os.path.join(settings.DATA_DIR, str(user_id), f"{job_id}.zip")
+
+    async def update_layer_status(self, index: int, **layer_status):
+        """Update the status of a layer in the job payload."""
+
+        async with self.layers_lock:
+            self.layers[index].update(layer_status)
+            await crud_job.update_payload(
+                async_session=self.async_session,
+                job_id=self.job_id,
+                payload={"layers": self.layers},
+            )
+
+    async def get_layer_projects(
+        self, project_id: UUID, layer_project_ids: list[int] | None = None
+    ) -> list[tuple[LayerProjectLink, Layer]]:
+        """Get the feature and table layers of the project in the order of the project."""
+
+        query = select(LayerProjectLink, Layer).where(
+            LayerProjectLink.project_id == project_id,
+            Layer.id == LayerProjectLink.layer_id,
+            Layer.type.in_([LayerType.feature.value, LayerType.table.value]),
+        )
+        if layer_project_ids is not None:
+            query = query.where(LayerProjectLink.id.in_(layer_project_ids))
+        result = await self.async_session.execute(query)
+        layer_projects = result.all()
+
+        layer_order = await self.async_session.scalar(
+            select(Project.layer_order).where(Project.id == project_id)
+        )
+        layer_order = {id: index for index, id in enumerate(layer_order or [])}
+        return sorted(
+            layer_projects,
+            key=lambda row: (layer_order.get(row[0].id, len(layer_order)), row[0].id),
+        )
+
+    async def export_layer(
+        self,
+        index: int,
+        layer_project: LayerProjectLink,
+        project_in: IProjectExport,
+        bundle_path: str,
+        semaphore: asyncio.Semaphore,
+    ) -> bool:
+        """Export a layer with the filter of the project into its folder of the bundle."""
+
+        layer_status = self.layers[index]
+        async with semaphore, session_manager.session() as async_session:
+            start_time = time.monotonic()
+            await self.update_layer_status(index, status=JobStatusType.running.value)
+            try:
+                layer_in = ILayerExport(
+                    id=layer_project.layer_id,
+                    file_type=layer_status["file_type"],
+                    file_name=layer_status["file_name"],
+                    crs=project_in.crs
+                    if layer_status["type"] == LayerType.feature.value
+                    else None,
+                    query=layer_project.query,
+                )
+                crud_export = CRUDLayerExport(
+                    id=layer_project.layer_id,
+                    async_session=async_session,
+                    user_id=self.user_id,
+                )
+                layer = await crud_export.get_export_layer(layer_in=layer_in)
+                data_version = await crud_export.get_data_version(
+                    layer=layer, layer_in=layer_in
+                )
+
+                # Write the file and its metadata into the folder of the layer
+                layer_folder = os.path.join(bundle_path, layer_in.file_name)
+                await asyncio.to_thread(os.makedirs, layer_folder, exist_ok=True)
+                file_path = os.path.join(
+                    layer_folder, f"{layer_in.file_name}.{layer_in.file_type.value}"
+                )
+                if layer_in.file_type.value in ARROW_EXPORT_TYPES:
+                    await crud_export.write_arrow_file(
+                        layer=layer, layer_in=layer_in, file_path=file_path
+                    )
+                else:
+                    ogr_file_handling = OGRFileHandling(
+                        async_session=async_session,
+                        user_id=self.user_id,
+                        file_path=file_path,
+                    )
+                    await ogr_file_handling.run_ogr2ogr(
+                        layer=layer,
+                        file_type=layer_in.file_type,
+                        sql_query=crud_export.get_export_query(
+                            layer=layer, layer_in=layer_in
+                        ),
+                        crs=layer_in.crs,
+                        layer_name=layer_project.name,
+                    )
+                metadata_text = await crud_export.get_metadata_text(
+                    layer=layer,
+                    layer_in=layer_in,
+                    last_data_updated_at=data_version["last_data_updated_at"],
+                )
+                async with aiofiles.open(
+                    os.path.join(layer_folder, "metadata.txt"), "w"
+                ) as f:
+                    await f.write(metadata_text)
+            except Exception as e:
+                await self.update_layer_status(
+                    index,
+                    status=JobStatusType.failed.value,
+                    msg=Msg(
+                        type=MsgType.error, text=sanitize_error_message(str(e))
+                    ).dict(),
+                    duration=round(time.monotonic() - start_time, 3),
+                )
+                return False
+
+        await self.update_layer_status(
+            index,
+            status=JobStatusType.finished.value,
+            file=f"{layer_in.file_name}/{layer_in.file_name}.{layer_in.file_type.value}",
+            row_cnt=data_version["row_cnt"],
+            duration=round(time.monotonic() - start_time, 3),
+        )
+        return True
+
+    @job_log(job_step_name="export", timeout=settings.PROJECT_EXPORT_TIMEOUT)
+    async def export_layers(self, project_id: UUID, project_in: IProjectExport):
+        """Export the layers side by side and bundle them with a manifest into one archive."""
+
+        start_time = time.monotonic()
+        layer_projects = await self.get_layer_projects(
+            project_id=project_id, layer_project_ids=project_in.layer_project_ids
+        )
+        if not layer_projects:
+            return {
+                "msg": "The project has no feature or table layers to export.",
+                "status": JobStatusType.failed.value,
+            }
+
+        # Table layers are exported as CSV if the file type doesn't support tables
+        file_names = get_unique_file_names(
+            [layer_project.name for layer_project, _layer in layer_projects]
+        )
+        self.layers = []
+        for (layer_project, layer), file_name in zip(layer_projects, file_names):
+            file_type = project_in.file_type.value
+            if (
+                layer.type == LayerType.table.value
+                and file_type not in TableLayerExportType.__members__
+            ):
+                file_type = TableLayerExportType.csv.value
+            self.layers.append(
+                {
+                    "layer_project_id": layer_project.id,
+                    "layer_id": str(layer_project.layer_id),
+                    "name": layer_project.name,
+                    "type": layer.type,
+                    "file_type": file_type,
+                    "file_name": file_name,
+                    "query": layer_project.query,
+                    "status": JobStatusType.pending.value,
+                }
+            )
+        await crud_job.update_payload(
+            async_session=self.async_session,
+            job_id=self.job_id,
+            payload={"layers": self.layers},
+        )
+
+        bundle_name = get_unique_file_names([project_in.file_name])[0]
+        bundle_path = os.path.join(self.folder_path, bundle_name)
+        semaphore = asyncio.Semaphore(max(1, settings.PROJECT_EXPORT_CONCURRENCY))
+        results = await asyncio.gather(
+            *[
+                self.export_layer(
+                    index, layer_project, project_in, bundle_path, semaphore
+                )
+                for index, (layer_project, _layer) in enumerate(layer_projects)
+            ]
+        )
+        msg_text = f"{sum(results)} of {len(results)} layers exported."
+        if not any(results):
+            return {"msg": msg_text, "status": JobStatusType.failed.value}
+
+        # Describe the content of the archive including the layers that failed
+        duration = round(time.monotonic() - start_time, 3)
+        manifest = {
+            "project_id": str(project_id),
+            "exported_at": datetime.now().isoformat(),
+            "file_type": project_in.file_type.value,
+            "crs": project_in.crs,
+            "duration": duration,
+            "layers": self.layers,
+        }
+        async with aiofiles.open(os.path.join(bundle_path, "manifest.json"), "w") as f:
+            await f.write(json.dumps(manifest, indent=2, default=str))
+        await async_zip_directory(
+            self.get_archive_path(self.user_id, self.job_id), bundle_path
+        )
+        await async_delete_dir(self.folder_path)
+        await crud_job.update_payload(
+            async_session=self.async_session,
+            job_id=self.job_id,
+            payload={"file_name": f"{bundle_name}.zip", "duration": duration},
+        )
+        return {
+            "msg": Msg(type=MsgType.info, text=msg_text),
+            "status": JobStatusType.finished.value,
+        }
+
+    async def export_layers_fail(self):
+        await async_delete_dir(self.folder_path)
+        archive_path = self.get_archive_path(self.user_id, self.job_id)
+        if os.path.exists(archive_path):
+            os.remove(archive_path)
+
+    @run_background_or_immediately(settings)
+    @job_init()
+    async def export_project_job(self, project_id: UUID, project_in: IProjectExport):
+        """Export the layers of a project into one archive."""
+
+        return await self.export_layers(project_id=project_id, project_in=project_in)
+
 
 class CRUDDataDelete(CRUDFailedJob):
     """CRUD class for Layer import."""
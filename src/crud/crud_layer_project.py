@@ -1,28 +1,54 @@
 # Standard library imports
+import asyncio
+from datetime import datetime
 from typing import List, Union
 from uuid import UUID
 
 # Third party imports
+import numpy as np
 from fastapi import HTTPException, status
 from pydantic import BaseModel, ValidationError, parse_obj_as
 from sqlalchemy import select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import SQLModel
 
+from src.core.config import settings
 from src.core.layer import CRUDLayerBase
-from src.core.statistics import StatisticsBase
+from src.core.statistics import (
+    StatisticsBase,
+    feature_count_cache,
+    get_class_breaks_from_values,
+    get_statistic_aggregation_from_statistics,
+    has_exact_statistics,
+    statistic_aggregation_cache,
+)
+from src.crud.crud_layer_statistics import (
+    layer_column_statistics as crud_layer_statistics,
+)
 from src.db.models._link_model import LayerProjectLink
 from src.db.models.layer import Layer
+from src.db.models.layer_statistics import LayerRowCount
 from src.db.models.project import Project
-from src.schemas.error import LayerNotFoundError, UnsupportedLayerTypeError
+from src.schemas.error import (
+    LayerNotFoundError,
+    OperationNotSupportedError,
+    UnsupportedLayerTypeError,
+)
 from src.schemas.layer import (
     FeatureGeometryType,
     LayerType,
+    OgrPostgresType,
 )
 from src.schemas.project import (
     layer_type_mapping_read,
     layer_type_mapping_update,
 )
+from src.schemas.statistics import (
+    IStatisticAggregationMetric,
+    IStatisticClassBreaksMetric,
+    IStatisticHistogramMetric,
+    IStatisticMetric,
+)
 from src.schemas.toolbox_base import ColumnStatisticsOperation
 from src.utils import (
     build_where,
@@ -42,6 +68,14 @@ class CRUDLayerProject(CRUDLayerBase, StatisticsBase):
         """Convert layer projects to schemas."""
         layer_projects_schemas = []
 
+        # Get the stored row counts of all layers at once
+        row_counts = await crud_layer_statistics.get_row_counts(
+            async_session,
+            layer_ids=[
+                layer_project_tuple[0].id for layer_project_tuple in layers_project
+            ],
+        )
+
         # Loop through layer and layer projects
         for layer_project_tuple in layers_project:
             layer = layer_project_tuple[0]
@@ -63,7 +97,9 @@ class CRUDLayerProject(CRUDLayerBase, StatisticsBase):
             # Get feature cnt for all feature layers and tables
             if layer_project.type in [LayerType.feature.value, LayerType.table.value]:
                 feature_cnt = await self.get_feature_cnt(
-                    async_session=async_session, layer_project=layer_project
+                    async_session=async_session,
+                    layer_project=layer_project,
+                    row_count=row_counts.get(layer_project.layer_id),
                 )
                 layer_project.total_count = feature_cnt["total_count"]
                 layer_project.filtered_count = feature_cnt.get("filtered_count")
@@ -322,27 +358,74 @@ class CRUDLayerProject(CRUDLayerBase, StatisticsBase):
         async_session: AsyncSession,
         layer_project: SQLModel | BaseModel,
         where_query: str = None,
+        row_count: LayerRowCount | None = None,
     ):
-        """Get feature count for a layer or a layer project."""
+        """Get feature count for a layer or a layer project.
+
+        The total count is read from the row count stored with the layer if it isn't
+        passed. Counts queried from the user data table are cached per layer, filter and
+        the data version stored with the row count.
+        """
 
         # Get feature count total
         feature_cnt = {}
         table_name = layer_project.table_name
-        sql_query = f"SELECT COUNT(*) FROM {table_name} WHERE layer_id = '{str(layer_project.layer_id)}'"
-        result = await async_session.execute(text(sql_query))
-        feature_cnt["total_count"] = result.scalar_one()
+        if row_count is None:
+            row_count = (
+                await crud_layer_statistics.get_row_counts(
+                    async_session, layer_ids=[layer_project.layer_id]
+                )
+            ).get(layer_project.layer_id)
+        if row_count is not None:
+            total_count = row_count.row_cnt
+            data_updated_at = row_count.data_updated_at
+        else:
+            # Layers without a stored row count have no data version
+            data_updated_at = None
+            sql_query = f"SELECT COUNT(*) FROM {table_name} WHERE layer_id = '{str(layer_project.layer_id)}'"
+            total_count = await self.get_cached_feature_cnt(
+                async_session, layer_project.layer_id, sql_query, data_updated_at
+            )
+        feature_cnt["total_count"] = total_count
 
         # Get feature count filtered
         if not where_query:
+            # Layer projects without a filter contain all features
+            if not getattr(layer_project, "query", None):
+                feature_cnt["filtered_count"] = total_count
+                return feature_cnt
             where_query = build_where_clause([layer_project.where_query])
         else:
             where_query = build_where_clause([where_query])
         if where_query:
             sql_query = f"SELECT COUNT(*) FROM {table_name} {where_query}"
-            result = await async_session.execute(text(sql_query))
-            feature_cnt["filtered_count"] = result.scalar_one()
+            feature_cnt["filtered_count"] = await self.get_cached_feature_cnt(
+                async_session, layer_project.layer_id, sql_query, data_updated_at
+            )
         return feature_cnt
 
+    async def get_cached_feature_cnt(
+        self,
+        async_session: AsyncSession,
+        layer_id: UUID,
+        sql_query: str,
+        data_updated_at: datetime | None,
+    ) -> int:
+        """Get a feature count of a layer from the cache or the user data table.
+
+        Counts are cached per query and data version of the layer.
+        """
+
+        cache_key = (
+            layer_id,
+            feature_count_cache.get_key(sql=sql_query, data_updated_at=data_updated_at),
+        )
+        cnt = feature_count_cache.get(cache_key)
+        if cnt is None:
+            cnt = (await async_session.execute(text(sql_query))).scalar_one()
+            feature_count_cache.set(cache_key, cnt)
+        return cnt
+
     async def check_exceed_feature_cnt(
         self,
         async_session: AsyncSession,
@@ -453,6 +536,28 @@ class CRUDLayerProject(CRUDLayerBase, StatisticsBase):
                 operation=operation,
             )
 
+        data_updated_at = await self.get_data_updated_at(
+            async_session,
+            layer_id=layer_project.layer_id,
+        )
+
+        # Read aggregations of unfiltered layers from the statistics of the columns
+        if not expression and not layer_project.query and not query:
+            response = get_statistic_aggregation_from_statistics(
+                layer_statistics=await crud_layer_statistics.get_layer(
+                    async_session,
+                    layer_id=layer_project.layer_id,
+                    data_updated_at=data_updated_at,
+                ),
+                column_mapped=mapped_statistics_field,
+                group_by_column_mapped=mapped_group_by_field,
+                operation=operation,
+                size=size,
+                order=order,
+            )
+            if response is not None:
+                return response
+
         # Build where clause combining layer project and CQL query
         where_query = build_where_clause(
             [
@@ -467,29 +572,44 @@ class CRUDLayerProject(CRUDLayerBase, StatisticsBase):
             ],
         )
 
-        # Build count query
-        sql_count_query = f"""
-            SELECT COUNT({mapped_statistics_field if mapped_statistics_field else '*'})
-            FROM {layer_project.table_name}
-            {where_query};
-        """
-        total_count = (await async_session.execute(text(sql_count_query))).scalar_one()
-
-        # Build final statistics queries
+        # Build the statistics query returning the top groups, the number of groups and
+        # the number of counted rows at once
         group_by_clause = f"GROUP BY {mapped_group_by_field}" if mapped_group_by_field else ""
+        count_field = (
+            self.convert_geom_measurement_field(mapped_statistics_field)
+            if mapped_statistics_field
+            else "*"
+        )
         order_mapped = {"descendent": "DESC", "ascendent": "ASC"}[order]
-        sql_data_query = f"""
-            SELECT *
-            FROM (
-                SELECT {statistics_column_query} operation_value
-                    {f',{mapped_group_by_field}' if mapped_group_by_field else ''}
+        sql_query = f"""
+            WITH grouped AS (
+                SELECT {statistics_column_query} AS operation_value,
+                    {mapped_group_by_field if mapped_group_by_field else 'NULL'} AS grouped_value,
+                    COUNT({count_field}) AS row_count
                 FROM {layer_project.table_name}
                 {where_query}
                 {group_by_clause}
-            ) subquery
-            ORDER BY operation_value {order_mapped};
+            )
+            SELECT operation_value, grouped_value, COUNT(*) OVER (), SUM(row_count) OVER ()
+            FROM grouped
+            ORDER BY operation_value {order_mapped}, grouped_value
+            LIMIT :size;
         """
-        result = (await async_session.execute(text(sql_data_query))).fetchall()
+
+        # Dashboards repeat identical requests, which are cached per data version
+        cache_key = (
+            layer_project.layer_id,
+            statistic_aggregation_cache.get_key(
+                sql=sql_query, size=size, data_updated_at=data_updated_at
+            ),
+        )
+        response = statistic_aggregation_cache.get(cache_key)
+        if response is not None:
+            return response
+
+        result = (
+            await async_session.execute(text(sql_query), {"size": size})
+        ).fetchall()
 
         # Create a response object
         response = {
@@ -498,11 +618,12 @@ class CRUDLayerProject(CRUDLayerBase, StatisticsBase):
                     "operation_value": res[0],
                     "grouped_value": res[1] if mapped_group_by_field else None,
                 }
-                for res in result[:size]
+                for res in result
             ],
-            "total_items": len(result),
-            "total_count": total_count,
+            "total_items": result[0][2] if result else 0,
+            "total_count": int(result[0][3]) if result else 0,
         }
+        statistic_aggregation_cache.set(cache_key, response)
         return response
 
     async def get_statistic_histogram(
@@ -545,14 +666,39 @@ class CRUDLayerProject(CRUDLayerBase, StatisticsBase):
             ],
         )
 
-        # Build statistics column metadata query
-        sql_metadata_query = f"""
-            SELECT COUNT(*), MIN({mapped_statistics_field}), MAX({mapped_statistics_field})
-            FROM {layer_project.table_name}
-            {where_query};
-        """
-        result = (await async_session.execute(text(sql_metadata_query))).fetchone()
-        total_count, min_val, max_val = result[0], result[1], result[2]
+        # Read the count, min and max of unfiltered layers from the column statistics
+        statistics = None
+        if not layer_project.query and not query:
+            statistics = await crud_layer_statistics.get_column(
+                async_session,
+                layer_id=layer_project.layer_id,
+                column_name=mapped_statistics_field,
+                data_updated_at=await self.get_data_updated_at(
+                    async_session,
+                    layer_id=layer_project.layer_id,
+                ),
+            )
+        if statistics and has_exact_statistics(statistics):
+            total_count, min_val, max_val = (
+                statistics.row_cnt,
+                statistics.min,
+                statistics.max,
+            )
+            # The statistics store floats, the histogram bounds use the column type
+            if min_val is not None and mapped_statistics_field.split("_")[0] in (
+                OgrPostgresType.Integer,
+                OgrPostgresType.Integer64,
+            ):
+                min_val, max_val = int(min_val), int(max_val)
+        else:
+            # Build statistics column metadata query
+            sql_metadata_query = f"""
+                SELECT COUNT(*), MIN({mapped_statistics_field}), MAX({mapped_statistics_field})
+                FROM {layer_project.table_name}
+                {where_query};
+            """
+            result = (await async_session.execute(text(sql_metadata_query))).fetchone()
+            total_count, min_val, max_val = result[0], result[1], result[2]
 
         # Build final statistics queries
         order_mapped = {"descendent": "DESC", "ascendent": "ASC"}[order]
@@ -589,5 +735,240 @@ class CRUDLayerProject(CRUDLayerBase, StatisticsBase):
         }
         return response
 
+    async def get_statistics_batch(
+        self,
+        async_session: AsyncSession,
+        project_id: UUID,
+        layer_project_id: int,
+        metrics: List[IStatisticMetric],
+        query: str | None,
+    ) -> dict:
+        """Get several statistics of a layer project with one CQL-filter at once.
+
+        The filtered features are read in one scan into a materialized CTE, from which
+        each metric is aggregated by a subquery returning its result as JSON. Class breaks
+        are computed from the values of their column as the class breaks endpoint does.
+        """
+
+        # Get layer project data
+        layer_project = await self.get_internal(
+            async_session=async_session, project_id=project_id, id=layer_project_id
+        )
+
+        # Build the subqueries of the metrics and collect the columns they read
+        columns = {}
+        metric_queries = []
+        for metric in metrics:
+            metric_query, metric_columns = await self.get_statistics_metric_sql(
+                layer_project=layer_project, metric=metric
+            )
+            metric_queries.append(metric_query)
+            columns.update(dict.fromkeys(metric_columns))
+
+        # Build where clause combining layer project and CQL query
+        where_query = build_where_clause(
+            [
+                layer_project.where_query,  # Clause from the layer-project filter
+                build_where(
+                    id=layer_project.layer_id,
+                    table_name=layer_project.table_name,
+                    query=query,
+                    attribute_mapping=layer_project.attribute_mapping,
+                    return_basic_filter=False,
+                ),  # Clause from the supplied CQL query
+            ],
+        )
+        sql_query = f"""
+            WITH filtered AS MATERIALIZED (
+                SELECT {', '.join(columns)}
+                FROM {layer_project.table_name}
+                {where_query}
+            )
+            SELECT {', '.join(f'({metric_query})' for metric_query in metric_queries)};
+        """
+
+        # Dashboards repeat identical requests, which are cached per data version
+        data_updated_at = await self.get_data_updated_at(
+            async_session,
+            layer_id=layer_project.layer_id,
+        )
+        cache_key = (
+            layer_project.layer_id,
+            statistic_aggregation_cache.get_key(
+                sql=sql_query,
+                metrics=[metric.dict() for metric in metrics],
+                data_updated_at=data_updated_at,
+            ),
+        )
+        response = statistic_aggregation_cache.get(cache_key)
+        if response is not None:
+            return response
+
+        result = (await async_session.execute(text(sql_query))).fetchone()
+        results = []
+        for metric, value in zip(metrics, result):
+            if isinstance(metric, IStatisticClassBreaksMetric):
+                # Read the values as an array of big-endian doubles
+                values = np.frombuffer(value or b"", dtype=">f8").astype(np.float64)
+                class_breaks = await asyncio.to_thread(
+                    get_class_breaks_from_values,
+                    values,
+                    metric.breaks,
+                    settings.CLASS_BREAKS_JENKS_SAMPLE_SIZE,
+                )
+                if metric.operation not in class_breaks:
+                    raise OperationNotSupportedError("Operation not supported")
+                value = class_breaks[metric.operation]
+            results.append(value)
+
+        response = {"results": results}
+        statistic_aggregation_cache.set(cache_key, response)
+        return response
+
+    async def get_statistics_metric_sql(
+        self, layer_project: BaseModel, metric: IStatisticMetric
+    ) -> tuple[str, list[str]]:
+        """Get the subquery of a metric on the filtered features and the columns it reads."""
+
+        order_mapped = {"descendent": "DESC", "ascendent": "ASC"}[
+            getattr(metric, "order", "ascendent")
+        ]
+
+        if isinstance(metric, IStatisticAggregationMetric):
+            mapped_statistics_field = (
+                await self.check_column_statistics(
+                    layer_project=layer_project,
+                    column_name=metric.column_name,
+                    operation=metric.operation,
+                )
+            )["mapped_statistics_field"]
+            mapped_group_by_field = search_value(
+                layer_project.attribute_mapping, metric.group_by_column_name
+            )
+            statistics_column_query = self.get_statistics_sql(
+                field=mapped_statistics_field, operation=metric.operation
+            )
+            count_field = (
+                self.convert_geom_measurement_field(mapped_statistics_field)
+                if mapped_statistics_field
+                else "*"
+            )
+            sql_query = f"""
+                SELECT JSONB_BUILD_OBJECT(
+                    'items', COALESCE(
+                        JSONB_AGG(
+                            JSONB_BUILD_OBJECT('operation_value', operation_value, 'grouped_value', grouped_value)
+                            ORDER BY rank
+                        ) FILTER (WHERE rank <= {metric.size}),
+                        '[]'::jsonb
+                    ),
+                    'total_items', COUNT(*),
+                    'total_count', COALESCE(SUM(row_count), 0)
+                )
+                FROM (
+                    SELECT {statistics_column_query} AS operation_value,
+                        {mapped_group_by_field} AS grouped_value,
+                        COUNT({count_field}) AS row_count,
+                        ROW_NUMBER() OVER (
+                            ORDER BY {statistics_column_query} {order_mapped}, {mapped_group_by_field}
+                        ) AS rank
+                    FROM filtered
+                    GROUP BY {mapped_group_by_field}
+                ) grouped
+            """
+            columns = [mapped_group_by_field]
+            if mapped_statistics_field:
+                # Pseudo columns are measured on the geometries
+                columns.append(
+                    "geom"
+                    if mapped_statistics_field.startswith("$")
+                    else mapped_statistics_field
+                )
+            return sql_query, columns
+
+        if isinstance(metric, IStatisticHistogramMetric):
+            # Check if mapped statistics field is float, integer or biginteger
+            field = (
+                await self.check_column_statistics(
+                    layer_project=layer_project,
+                    column_name=metric.column_name,
+                    operation=ColumnStatisticsOperation.sum,
+                )
+            )["mapped_statistics_field"]
+            num_bins = metric.num_bins
+            sql_query = f"""
+                WITH bounds AS (
+                    SELECT COUNT(*) AS total_count, MIN({field}) AS min_val, MAX({field}) AS max_val
+                    FROM filtered
+                ),
+                histogram AS (
+                    SELECT
+                        width_bucket({field}, bounds.min_val, bounds.max_val + 1, {num_bins}) AS bin_number,
+                        COUNT(*) AS count
+                    FROM filtered, bounds
+                    WHERE {field} IS NOT NULL
+                    GROUP BY 1
+                ),
+                bins AS (
+                    SELECT
+                        bins.bin_number,
+                        ROUND((min_val + (bins.bin_number - 1) * (max_val - min_val) / {num_bins})::NUMERIC, 2) AS lower_bound,
+                        ROUND((min_val + bins.bin_number * (max_val - min_val) / {num_bins})::NUMERIC, 2) AS upper_bound,
+                        COALESCE(histogram.count, 0) AS count
+                    FROM generate_series(1, {num_bins}) AS bins(bin_number)
+                    CROSS JOIN bounds
+                    LEFT JOIN histogram ON bins.bin_number = histogram.bin_number
+                )
+                SELECT JSONB_BUILD_OBJECT(
+                    'bins', JSONB_AGG(
+                        JSONB_BUILD_OBJECT('range', JSONB_BUILD_ARRAY(lower_bound, upper_bound), 'count', count)
+                        ORDER BY bin_number {order_mapped}
+                    ),
+                    'missing_count', MAX(total_count) - SUM(count),
+                    'total_rows', MAX(total_count)
+                )
+                FROM bins, bounds
+            """
+            return sql_query, [field]
+
+        if isinstance(metric, IStatisticClassBreaksMetric):
+            field = (
+                await self.check_column_statistics(
+                    layer_project=layer_project,
+                    column_name=metric.column_name,
+                    operation=ColumnStatisticsOperation.sum,
+                )
+            )["mapped_statistics_field"]
+            stripe_zeros_query = f"AND {field} != 0" if metric.stripe_zeros else ""
+            sql_query = f"""
+                SELECT STRING_AGG(FLOAT8SEND({field}::float8), ''::bytea)
+                FROM filtered
+                WHERE {field} IS NOT NULL
+                {stripe_zeros_query}
+            """
+            return sql_query, [field]
+
+        # Most frequent values ordered as of the unique values endpoint
+        field = search_value(layer_project.attribute_mapping, metric.column_name)
+        sql_query = f"""
+            SELECT JSONB_BUILD_OBJECT(
+                'items', COALESCE(
+                    JSONB_AGG(
+                        JSONB_BUILD_OBJECT('value', value, 'count', count) ORDER BY rank
+                    ) FILTER (WHERE rank <= {metric.size}),
+                    '[]'::jsonb
+                ),
+                'total', COUNT(*)
+            )
+            FROM (
+                SELECT TO_JSONB({field}) AS value, COUNT(*) AS count,
+                    ROW_NUMBER() OVER (ORDER BY COUNT(*) {order_mapped}, {field}) AS rank
+                FROM filtered
+                WHERE {field} IS NOT NULL
+                GROUP BY {field}
+            ) grouped
+        """
+        return sql_query, [field]
+
 
 layer_project = CRUDLayerProject(LayerProjectLink)
@@ -0,0 +1,247 @@
+from datetime import datetime, timezone
+from uuid import UUID
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel
+
+from src.core.config import settings
+from src.crud.base import CRUDBase
+from src.db.models.layer_statistics import LayerColumnStatistics, LayerRowCount
+
+# Column types of the user data tables with statistics
+NUMBER_COLUMN_TYPES = ["integer", "bigint", "float"]
+STATISTICS_COLUMN_TYPES = NUMBER_COLUMN_TYPES + ["text", "timestamp", "boolean"]
+
+
+class CRUDLayerColumnStatistics(CRUDBase):
+    """CRUD class for the statistics catalog of the columns and rows of layers."""
+
+    def get_statistics_columns(self, layer: SQLModel) -> dict[str, str]:
+        """Get the mapped columns of a layer with statistics and their types."""
+
+        columns = {}
+        for column_name in (layer.attribute_mapping or {}).keys():
+            column_type = column_name.split("_attr")[0]
+            if column_type in STATISTICS_COLUMN_TYPES:
+                columns[column_name] = column_type
+        return columns
+
+    async def get_summaries(
+        self, async_session: AsyncSession, layer: SQLModel, columns: dict[str, str]
+    ) -> tuple[int, dict[str, dict]]:
+        """Get the number of rows and the counts, moments and quantiles of the columns
+        in one scan."""
+
+        quantile_cnt = settings.COLUMN_STATISTICS_QUANTILE_CNT
+        selects = ["COUNT(*)"]
+        for column_name, column_type in columns.items():
+            selects.append(f"COUNT({column_name})")
+            if column_type in NUMBER_COLUMN_TYPES:
+                selects += [
+                    f"COUNT(*) FILTER (WHERE {column_name} = 0)",
+                    f"MIN({column_name})::float",
+                    f"MAX({column_name})::float",
+                    f"AVG({column_name})::float",
+                    f"STDDEV({column_name})::float",
+                    f"""(percentile_disc(ARRAY(SELECT generate_series(0, {quantile_cnt}) / {quantile_cnt}::numeric))
+                        WITHIN GROUP (ORDER BY {column_name}))::float[]""",
+                ]
+        result = await async_session.execute(
+            text(
+                f"""SELECT {', '.join(selects)}
+                FROM {layer.table_name}
+                WHERE layer_id = :layer_id"""
+            ),
+            {"layer_id": layer.id},
+        )
+        values = list(result.fetchone())
+
+        row_cnt = values.pop(0)
+        summaries = {}
+        for column_name, column_type in columns.items():
+            summary = {"row_cnt": row_cnt, "null_cnt": row_cnt - values.pop(0)}
+            if column_type in NUMBER_COLUMN_TYPES:
+                for key in ["zero_cnt", "min", "max", "mean", "stddev", "quantiles"]:
+                    summary[key] = values.pop(0)
+            summaries[column_name] = summary
+        return row_cnt, summaries
+
+    async def get_top_values(
+        self, async_session: AsyncSession, layer: SQLModel, columns: dict[str, str]
+    ) -> dict[str, dict]:
+        """Get the number of distinct values and the most frequent values of the columns.
+
+        All columns are grouped in one scan with grouping sets. The values are ordered by
+        count and value as the unique values endpoint does and stored in value order.
+        """
+
+        column_names = list(columns.keys())
+        column_index = " ".join(
+            f"WHEN GROUPING({column_name}) = 0 THEN {index}"
+            for index, column_name in enumerate(column_names)
+        )
+        column_value = " ".join(
+            f"WHEN GROUPING({column_name}) = 0 THEN TO_JSONB({column_name})"
+            for column_name in column_names
+        )
+        grouping_sets = ", ".join(f"({column_name})" for column_name in column_names)
+        result = await async_session.execute(
+            text(
+                f"""WITH grouped AS (
+                    SELECT CASE {column_index} END AS column_index,
+                        CASE {column_value} END AS value,
+                        COUNT(*) AS count
+                    FROM {layer.table_name}
+                    WHERE layer_id = :layer_id
+                    GROUP BY GROUPING SETS ({grouping_sets})
+                ),
+                ranked AS (
+                    SELECT column_index, value, count,
+                        ROW_NUMBER() OVER (PARTITION BY column_index ORDER BY count DESC, value) AS rank,
+                        COUNT(*) OVER (PARTITION BY column_index) AS distinct_cnt
+                    FROM grouped
+                    WHERE value IS NOT NULL
+                )
+                SELECT column_index, MAX(distinct_cnt),
+                    JSONB_AGG(JSONB_BUILD_OBJECT('value', value, 'count', count) ORDER BY value)
+                FROM ranked
+                WHERE rank <= :top_k
+                GROUP BY column_index"""
+            ),
+            {"layer_id": layer.id, "top_k": settings.COLUMN_STATISTICS_TOP_K},
+        )
+        top_values = {
+            column_name: {"distinct_cnt": 0, "top_values": []}
+            for column_name in column_names
+        }
+        for index, distinct_cnt, values in result.fetchall():
+            top_values[column_names[index]] = {
+                "distinct_cnt": distinct_cnt,
+                "top_values": values,
+            }
+        return top_values
+
+    async def compute(
+        self, async_session: AsyncSession, layer: SQLModel
+    ) -> list[LayerColumnStatistics]:
+        """Compute the number of rows and the statistics of the columns of a layer and
+        replace the stored ones.
+
+        It is called once the data of the layer is written and sets a new data version.
+        """
+
+        await self.delete_layer(async_session=async_session, layer_id=layer.id)
+        data_updated_at = datetime.now(timezone.utc)
+        columns = self.get_statistics_columns(layer)
+        row_cnt, summaries = await self.get_summaries(async_session, layer, columns)
+        async_session.add(
+            LayerRowCount(
+                layer_id=layer.id, row_cnt=row_cnt, data_updated_at=data_updated_at
+            )
+        )
+        if not columns:
+            await async_session.commit()
+            return []
+
+        top_values = await self.get_top_values(async_session, layer, columns)
+        statistics = [
+            LayerColumnStatistics(
+                layer_id=layer.id,
+                column_name=column_name,
+                **summaries[column_name],
+                **top_values[column_name],
+                data_updated_at=data_updated_at,
+            )
+            for column_name in columns
+        ]
+        async_session.add_all(statistics)
+        await async_session.commit()
+        return statistics
+
+    async def get_layer(
+        self,
+        async_session: AsyncSession,
+        layer_id: UUID,
+        data_updated_at: datetime | None,
+    ) -> list[LayerColumnStatistics]:
+        """Get the statistics of all columns of a layer computed from the data version.
+
+        Statistics of another version of the data are ignored.
+        """
+
+        result = await async_session.execute(
+            select(LayerColumnStatistics).where(
+                LayerColumnStatistics.layer_id == layer_id
+            )
+        )
+        return [
+            statistics
+            for statistics in result.scalars().all()
+            if statistics.data_updated_at == data_updated_at
+        ]
+
+    async def get_data_updated_at(
+        self, async_session: AsyncSession, layer_id: UUID
+    ) -> datetime | None:
+        """Get the data version of a layer, None if its data wasn't written yet."""
+
+        result = await async_session.execute(
+            select(LayerRowCount.data_updated_at).where(
+                LayerRowCount.layer_id == layer_id
+            )
+        )
+        return result.scalar_one_or_none()
+
+    async def get_row_counts(
+        self, async_session: AsyncSession, layer_ids: list[UUID]
+    ) -> dict[UUID, LayerRowCount]:
+        """Get the number of rows and the data version of layers by their ID.
+
+        The number of rows is written with the data version, so it is the number of
+        rows of the current data of the layer.
+        """
+
+        if not layer_ids:
+            return {}
+        result = await async_session.execute(
+            select(LayerRowCount).where(LayerRowCount.layer_id.in_(layer_ids))
+        )
+        return {row_count.layer_id: row_count for row_count in result.scalars().all()}
+
+    async def get_column(
+        self,
+        async_session: AsyncSession,
+        layer_id: UUID,
+        column_name: str,
+        data_updated_at: datetime | None,
+    ) -> LayerColumnStatistics | None:
+        """Get the statistics of a mapped column of a layer computed from the data
+        version."""
+
+        result = await async_session.execute(
+            select(LayerColumnStatistics).where(
+                LayerColumnStatistics.layer_id == layer_id,
+                LayerColumnStatistics.column_name == column_name,
+            )
+        )
+        statistics = result.scalars().first()
+        if statistics is None or statistics.data_updated_at != data_updated_at:
+            return None
+        return statistics
+
+    async def delete_layer(self, async_session: AsyncSession, layer_id: UUID):
+        """Delete the statistics and the data version of a layer, e.g. as its data is
+        deleted."""
+
+        await async_session.execute(
+            delete(LayerColumnStatistics).where(
+                LayerColumnStatistics.layer_id == layer_id
+            )
+        )
+        await async_session.execute(
+            delete(LayerRowCount).where(LayerRowCount.layer_id == layer_id)
+        )
+
+
+layer_column_statistics = CRUDLayerColumnStatistics(LayerColumnStatistics)
@@ -11,6 +11,7 @@ from .data_store import DataStore
 from .folder import Folder
 from .job import Job
 from .layer import Layer
+from .layer_statistics import LayerColumnStatistics, LayerRowCount
 from .project import Project
 from .scenario import Scenario
 from .scenario_feature import ScenarioFeature
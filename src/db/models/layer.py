@@ -81,6 +81,8 @@ class FeatureUploadType(str, Enum):
     gpkg = "gpkg"
     kml = "kml"
     zip = "zip"  # Commonly used for shapefiles
+    parquet = "parquet"  # GeoParquet
+    fgb = "fgb"  # FlatGeobuf
 
 
 class FileUploadType(str, Enum):
@@ -92,6 +94,8 @@ class FileUploadType(str, Enum):
     gpkg = "gpkg"
     kml = "kml"
     zip = "zip"  # Commonly used for shapefiles
+    parquet = "parquet"  # GeoParquet
+    fgb = "fgb"  # FlatGeobuf
 
 
 class FeatureLayerExportType(str, Enum):
@@ -103,6 +107,9 @@ class FeatureLayerExportType(str, Enum):
     csv = "csv"
     xlsx = "xlsx"
     kml = "kml"
+    fgb = "fgb"  # FlatGeobuf
+    parquet = "parquet"  # GeoParquet
+    arrow = "arrow"  # Arrow IPC file
 
 
 class TableLayerExportType(str, Enum):
@@ -110,6 +117,8 @@ class TableLayerExportType(str, Enum):
 
     csv = "csv"
     xlsx = "xlsx"
+    parquet = "parquet"
+    arrow = "arrow"  # Arrow IPC file
 
 
 class FeatureServeType(str, Enum):
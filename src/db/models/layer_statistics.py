@@ -0,0 +1,115 @@
+from datetime import datetime
+from typing import List
+from uuid import UUID
+
+from sqlalchemy import BigInteger, DateTime, Float
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.dialects.postgresql import UUID as UUID_PG
+from sqlmodel import Column, Field, ForeignKey, Text
+
+from src.core.config import settings
+from src.db.models._base_class import DateTimeBase
+
+
+class LayerColumnStatistics(DateTimeBase, table=True):
+    """Statistics of a column of a layer computed once the data of the layer is written.
+
+    The statistics are only valid for the data version they were computed from, see
+    `LayerRowCount`. Number statistics are stored as floats, which
+    represent integers beyond 2^53 inexactly, see `has_exact_statistics`. The statistics
+    are deleted with the data of the layer.
+    """
+
+    __tablename__ = "layer_column_statistics"
+    __table_args__ = {"schema": settings.CUSTOMER_SCHEMA}
+
+    layer_id: UUID = Field(
+        sa_column=Column(
+            UUID_PG(as_uuid=True),
+            ForeignKey(f"{settings.CUSTOMER_SCHEMA}.layer.id", ondelete="CASCADE"),
+            primary_key=True,
+            nullable=False,
+        ),
+        description="Layer ID",
+    )
+    column_name: str = Field(
+        sa_column=Column(Text, primary_key=True, nullable=False),
+        description="Mapped column name in the user data table",
+    )
+    row_cnt: int = Field(
+        sa_column=Column(BigInteger, nullable=False),
+        description="Number of rows of the layer",
+    )
+    null_cnt: int = Field(
+        sa_column=Column(BigInteger, nullable=False),
+        description="Number of rows without a value",
+    )
+    zero_cnt: int | None = Field(
+        sa_column=Column(BigInteger, nullable=True),
+        description="Number of rows with the value zero for number columns",
+    )
+    min: float | None = Field(
+        sa_column=Column(Float, nullable=True), description="Minimum value"
+    )
+    max: float | None = Field(
+        sa_column=Column(Float, nullable=True), description="Maximum value"
+    )
+    mean: float | None = Field(
+        sa_column=Column(Float, nullable=True), description="Mean value"
+    )
+    stddev: float | None = Field(
+        sa_column=Column(Float, nullable=True),
+        description="Sample standard deviation",
+    )
+    quantiles: List[float] | None = Field(
+        sa_column=Column(ARRAY(Float), nullable=True),
+        description="Values at evenly spaced percentiles from the minimum to the maximum",
+    )
+    distinct_cnt: int | None = Field(
+        sa_column=Column(BigInteger, nullable=True),
+        description="Number of distinct values",
+    )
+    top_values: List[dict] | None = Field(
+        sa_column=Column(JSONB, nullable=True),
+        description="Most frequent values with their count in the order of the values",
+    )
+    data_updated_at: datetime | None = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=True),
+        description="Data version of the layer the statistics were computed from",
+    )
+
+    @property
+    def count(self) -> int:
+        return self.row_cnt - self.null_cnt
+
+
+class LayerRowCount(DateTimeBase, table=True):
+    """Number of rows and data version of a layer written once its data is written.
+
+    It replaces counting the rows of the shared user data table whenever a project is
+    opened. The data version is the time the data was written. Results cached across
+    requests and processes are keyed on it, as reading it doesn't scan the user data
+    table. It is written when the data of a layer is imported or computed by a tool
+    and deleted with the data of the layer, see `delete_layer_data`.
+    """
+
+    __tablename__ = "layer_row_count"
+    __table_args__ = {"schema": settings.CUSTOMER_SCHEMA}
+
+    layer_id: UUID = Field(
+        sa_column=Column(
+            UUID_PG(as_uuid=True),
+            ForeignKey(f"{settings.CUSTOMER_SCHEMA}.layer.id", ondelete="CASCADE"),
+            primary_key=True,
+            nullable=False,
+        ),
+        description="Layer ID",
+    )
+    row_cnt: int = Field(
+        sa_column=Column(BigInteger, nullable=False),
+        description="Number of rows of the layer",
+    )
+    data_updated_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+        description="Time the data of the layer was written",
+    )
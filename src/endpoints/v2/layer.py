@@ -1,8 +1,10 @@
 # Standard Libraries
+import asyncio
 import json
 import os
-from typing import Any, Dict, Optional
-from uuid import UUID
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+from uuid import UUID, uuid4
 
 # Third-party Libraries
 from fastapi import (
@@ -11,6 +13,7 @@ from fastapi import (
     Body,
     Depends,
     File,
+    Header,
     HTTPException,
     Path,
     Query,
@@ -18,7 +21,7 @@ from fastapi import (
     UploadFile,
     status,
 )
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi_pagination import Page
 from fastapi_pagination import Params as PaginationParams
 from pydantic import UUID4
@@ -30,8 +33,14 @@ from src.core.config import settings
 from src.core.content import (
     read_content_by_id,
 )
+from src.core.upload import ChunkedUpload
 from src.crud.crud_job import job as crud_job
-from src.crud.crud_layer import CRUDLayerDatasetUpdate, CRUDLayerExport, CRUDLayerImport
+from src.crud.crud_layer import (
+    CRUDLayerDatasetUpdate,
+    CRUDLayerExport,
+    CRUDLayerImport,
+    CRUDLayerImportBatch,
+)
 from src.crud.crud_layer import layer as crud_layer
 from src.crud.crud_layer_project import layer_project as crud_layer_project
 from src.db.models._link_model import LayerProjectLink
@@ -55,6 +64,8 @@ from src.schemas.layer import (
     ICatalogLayerGet,
     IFileUploadExternalService,
     IFileUploadMetadata,
+    IFileUploadSessionCreate,
+    IFileUploadSessionRead,
     ILayerExport,
     ILayerFromDatasetCreate,
     ILayerGet,
@@ -69,11 +80,24 @@ from src.schemas.layer import (
 from src.schemas.layer import (
     request_examples as layer_request_examples,
 )
-from src.utils import build_where, check_file_size
+from src.utils import async_delete_dir, build_where, check_file_size
 
 router = APIRouter()
 
 
+def _get_upload_layer_type(file_ending: str) -> str:
+    """Check if the file is a feature or table."""
+
+    if file_ending in TableUploadType.__members__:
+        return LayerType.table.value
+    elif file_ending in FeatureUploadType.__members__:
+        return LayerType.feature.value
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail=f"File type not allowed. Allowed file types are: {', '.join(FileUploadType.__members__.keys())}",
+    )
+
+
 @router.post(
     "/file-upload",
     summary="Upload file to server and validate",
@@ -92,16 +116,7 @@ async def file_upload(
     """
 
     file_ending = os.path.splitext(file.filename)[-1][1:]
-    # Check if file is feature or table
-    if file_ending in TableUploadType.__members__:
-        layer_type = LayerType.table.value
-    elif file_ending in FeatureUploadType.__members__:
-        layer_type = LayerType.feature.value
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
-            detail=f"File type not allowed. Allowed file types are: {', '.join(FileUploadType.__members__.keys())}",
-        )
+    layer_type = _get_upload_layer_type(file_ending)
 
     if (
         await check_file_size(file=file, max_size=MaxFileSizeType[file_ending].value)
@@ -122,6 +137,138 @@ async def file_upload(
     return metadata
 
 
+@router.post(
+    "/file-upload-session",
+    summary="Start a resumable file upload",
+    response_model=IFileUploadSessionRead,
+    status_code=201,
+    dependencies=[Depends(auth_z)],
+)
+async def create_file_upload_session(
+    *,
+    user_id: UUID = Depends(get_user_id),
+    upload_in: IFileUploadSessionCreate = Body(
+        ...,
+        description="Name and size of the file to upload.",
+    ),
+):
+    """
+    Start a resumable upload. The file is sent in chunks and validated once finalized.
+    """
+
+    _get_upload_layer_type(os.path.splitext(upload_in.file_name)[-1][1:])
+    return await asyncio.to_thread(
+        ChunkedUpload(user_id=user_id, upload_id=uuid4()).create,
+        file_name=upload_in.file_name,
+        file_size=upload_in.file_size,
+    )
+
+
+@router.get(
+    "/file-upload-session/{upload_id}",
+    summary="Get the state of a resumable file upload",
+    response_model=IFileUploadSessionRead,
+    status_code=200,
+    dependencies=[Depends(auth_z)],
+)
+async def read_file_upload_session(
+    *,
+    user_id: UUID = Depends(get_user_id),
+    upload_id: UUID4 = Path(
+        ...,
+        description="The ID of the upload",
+        example="3fa85f64-5717-4562-b3fc-2c963f66afa6",
+    ),
+):
+    """
+    Get the offset to resume an interrupted upload from.
+    """
+
+    return await asyncio.to_thread(
+        ChunkedUpload(user_id=user_id, upload_id=upload_id).read_state
+    )
+
+
+@router.put(
+    "/file-upload-session/{upload_id}",
+    summary="Upload a chunk of a resumable file upload",
+    response_model=IFileUploadSessionRead,
+    status_code=200,
+    dependencies=[Depends(auth_z)],
+)
+async def upload_file_chunk(
+    *,
+    request: Request,
+    user_id: UUID = Depends(get_user_id),
+    upload_id: UUID4 = Path(
+        ...,
+        description="The ID of the upload",
+        example="3fa85f64-5717-4562-b3fc-2c963f66afa6",
+    ),
+    content_range: str = Header(
+        ...,
+        description="Byte range of the chunk e.g. 'bytes 0-8388607/20000000'.",
+    ),
+    x_chunk_checksum: str = Header(
+        ...,
+        description="Hex encoded SHA-256 checksum of the chunk.",
+    ),
+    content_length: int | None = Header(
+        None,
+        description="Size of the chunk in bytes.",
+    ),
+):
+    """
+    Upload the chunk in the request body. Chunks must be sent in order.
+    """
+
+    # The chunk is streamed into the file once its size is checked
+    return await ChunkedUpload(user_id=user_id, upload_id=upload_id).write_chunk(
+        content_range=content_range,
+        checksum=x_chunk_checksum,
+        chunks=request.stream(),
+        content_length=content_length,
+    )
+
+
+@router.post(
+    "/file-upload-session/{upload_id}/finalize",
+    summary="Finalize a resumable file upload and validate",
+    response_model=IFileUploadMetadata,
+    status_code=201,
+    dependencies=[Depends(auth_z)],
+)
+async def finalize_file_upload_session(
+    *,
+    async_session: AsyncSession = Depends(get_db),
+    user_id: UUID = Depends(get_user_id),
+    upload_id: UUID4 = Path(
+        ...,
+        description="The ID of the upload",
+        example="3fa85f64-5717-4562-b3fc-2c963f66afa6",
+    ),
+):
+    """
+    Finalize the upload once all chunks are received and validate the file. The upload ID is used as dataset ID.
+    """
+
+    upload = ChunkedUpload(user_id=user_id, upload_id=upload_id)
+    state = await asyncio.to_thread(upload.finalize)
+
+    # Run the validation
+    metadata = await crud_layer.validate_file(
+        async_session=async_session,
+        user_id=user_id,
+        dataset_id=upload_id,
+        file_path=upload.get_file_path(state),
+        file_ending=state["file_ending"],
+        file_size=state["file_size"],
+        layer_type=_get_upload_layer_type(state["file_ending"]),
+        content_hash=state["content_hash"],
+    )
+    return metadata
+
+
 @router.post(
     "/file-upload-external-service",
     summary="Fetch data from external service into a file, upload file to server and validate",
@@ -264,6 +411,80 @@ async def create_layer_feature_standard(
     )
 
 
+@router.post(
+    "/file-import-batch",
+    summary="Upload many files and create a layer from each dataset in one job",
+    response_class=JSONResponse,
+    status_code=201,
+    description="Upload files or ZIPs of datasets and import them in a single job. The progress of each dataset is reported in the job payload.",
+    dependencies=[Depends(auth_z)],
+)
+async def file_import_batch(
+    background_tasks: BackgroundTasks,
+    async_session: AsyncSession = Depends(get_db),
+    user_id: UUID = Depends(get_user_id),
+    folder_id: UUID4 = Query(
+        ...,
+        description="The ID of the folder to create the layers in",
+        example="3fa85f64-5717-4562-b3fc-2c963f66afa6",
+    ),
+    project_id: Optional[UUID] = Query(
+        None,
+        description="The ID of the project to add the layers to",
+        example="3fa85f64-5717-4562-b3fc-2c963f66afa6",
+    ),
+    files: List[UploadFile] = File(..., description="Files to import."),
+):
+    """Upload files and create a feature standard or table layer from each dataset."""
+
+    # Check all files before saving any of them
+    for file in files:
+        file_ending = os.path.splitext(file.filename)[-1][1:]
+        _get_upload_layer_type(file_ending)
+        if (
+            await check_file_size(
+                file=file, max_size=MaxFileSizeType[file_ending].value
+            )
+            is False
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"{file.filename}: File size too large. Max file size is {round(MaxFileSizeType[file_ending].value / 1048576, 2)} MB",
+            )
+
+    datasets = await crud_layer.upload_files(
+        async_session=async_session,
+        user_id=user_id,
+        files=files,
+    )
+
+    # Create one job for all datasets and check if user can create a new job
+    try:
+        job = await crud_job.check_and_create(
+            async_session=async_session,
+            user_id=user_id,
+            job_type=JobType.file_import_batch,
+            project_id=project_id,
+        )
+    except Exception:
+        for dataset in datasets:
+            await async_delete_dir(os.path.dirname(dataset["file_path"]))
+        raise
+
+    # Run the import
+    await CRUDLayerImportBatch(
+        background_tasks=background_tasks,
+        async_session=async_session,
+        user_id=user_id,
+        job_id=job.id,
+    ).import_files_job(
+        datasets=datasets,
+        folder_id=folder_id,
+        project_id=project_id,
+    )
+    return {"job_id": job.id}
+
+
 @router.post(
     "/raster",
     summary="Create a new raster layer",
@@ -352,9 +573,52 @@ async def export_layer(
     )
     with HTTPErrorHandler():
         zip_file_path = await crud_export.export_file_run(layer_in=layer_in)
-    # Return file
-    file_name = os.path.basename(zip_file_path)
-    return FileResponse(zip_file_path, media_type="application/zip", filename=file_name)
+    # Return file, which may be served from the export cache
+    return FileResponse(
+        zip_file_path,
+        media_type="application/zip",
+        filename=f"{layer_in.file_name}.zip",
+    )
+
+
+@router.post(
+    "/{layer_id}/export-stream",
+    summary="Export a layer to a file streamed while it is written",
+    response_class=StreamingResponse,
+    status_code=201,
+    description="Export a layer to a zip file that is sent while the rows are read from the database. Supports GeoJSON, CSV, FlatGeobuf, GeoPackage, GeoParquet and Arrow IPC.",
+    dependencies=[Depends(auth_z)],
+)
+async def export_layer_stream(
+    async_session: AsyncSession = Depends(get_db),
+    user_id: UUID4 = Depends(get_user_id),
+    layer_id: UUID4 = Path(
+        ...,
+        description="The ID of the layer to export",
+        example="3fa85f64-5717-4562-b3fc-2c963f66afa6",
+    ),
+    layer_in: ILayerExport = Body(
+        ...,
+        examples=layer_request_examples["export"],
+        description="Layer to export",
+    ),
+):
+    # Check the export before the response starts
+    crud_export = CRUDLayerExport(
+        id=layer_id,
+        async_session=async_session,
+        user_id=user_id,
+    )
+    with HTTPErrorHandler():
+        stream = await crud_export.export_file_stream(layer_in=layer_in)
+    return StreamingResponse(
+        stream,
+        status_code=201,
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename*=utf-8''{quote(layer_in.file_name + '.zip')}"
+        },
+    )
 
 
 @router.get(
@@ -668,6 +932,11 @@ async def get_area_statistics(
         description="CQL2-Filter in JSON format",
         example='{"op": ">", "args": [{"property": "id"}, "10"]}',
     ),
+    approximate: bool = Query(
+        False,
+        description="Estimate the statistics from a sample of the features if the layer exceeds the feature limit instead of rejecting the request. The response states whether the value is an estimate.",
+        example=True,
+    ),
 ):
     """Get statistics on the area size of a polygon layer. The area is computed using geography datatype and the unit is m²."""
 
@@ -677,6 +946,7 @@ async def get_area_statistics(
             id=layer_id,
             operation=operation,
             query=query,
+            approximate=approximate,
         )
 
     # Return result
@@ -714,6 +984,16 @@ async def get_unique_values(
         description="Specify the order to apply. There are the option ascendent or descendent.",
         example="descendent",
     ),
+    after_count: int = Query(
+        None,
+        description="Count of the last value of the previous page. Pages beyond the first values of columns with many values are requested by the count and value of the last value of the previous page instead of the page number.",
+        example=2,
+    ),
+    after_value: str = Query(
+        None,
+        description="Last value of the previous page.",
+        example="bus_stop",
+    ),
 ):
     """Get unique values of a column. Based on the passed CQL-filter and order."""
 
@@ -749,6 +1029,8 @@ async def get_unique_values(
             query=query,
             page_params=page_params,
             order=order,
+            after_count=after_count,
+            after_value=after_value,
         )
 
     # Return result
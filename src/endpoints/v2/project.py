@@ -1,8 +1,11 @@
+import json
+import os
 from typing import List
 from uuid import UUID
 
 from fastapi import (
     APIRouter,
+    BackgroundTasks,
     Body,
     Depends,
     HTTPException,
@@ -11,13 +14,15 @@ from fastapi import (
     Request,
     status,
 )
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse
 from fastapi_pagination import Page
 from fastapi_pagination import Params as PaginationParams
 from pydantic import UUID4
 from sqlalchemy import select
 
 from src.core.chart import read_chart_data
+from src.crud.crud_job import job as crud_job
+from src.crud.crud_layer import CRUDProjectExport
 from src.crud.crud_layer_project import layer_project as crud_layer_project
 from src.crud.crud_project import project as crud_project
 from src.crud.crud_scenario import scenario as crud_scenario
@@ -31,11 +36,13 @@ from src.deps.auth import auth_z, auth_z_lite
 from src.endpoints.deps import get_db, get_scenario, get_user_id
 from src.schemas.common import OrderEnum
 from src.schemas.error import HTTPErrorHandler
+from src.schemas.job import JobStatusType, JobType
 from src.schemas.project import (
     IFeatureStandardProjectRead,
     IFeatureToolProjectRead,
     InitialViewState,
     IProjectBaseUpdate,
+    IProjectExport,
     IProjectCreate,
     IProjectRead,
     IRasterProjectRead,
@@ -54,6 +61,10 @@ from src.schemas.scenario import (
 from src.schemas.scenario import (
     request_examples as scenario_request_examples,
 )
+from src.schemas.statistics import IStatisticsBatch
+from src.schemas.statistics import (
+    request_examples as statistics_request_examples,
+)
 from src.schemas.toolbox_base import ColumnStatisticsOperation
 from src.utils import delete_orphans, to_feature_collection
 
@@ -485,6 +496,99 @@ async def delete_layer_from_project(
     return None
 
 
+@router.post(
+    "/{project_id}/export",
+    summary="Export the layers of a project into one archive",
+    response_class=JSONResponse,
+    status_code=201,
+    description="Export the feature and table layers of a project with their filters in a job. The archive contains a folder per layer and a manifest.",
+    dependencies=[Depends(auth_z)],
+)
+async def export_project(
+    background_tasks: BackgroundTasks,
+    async_session: AsyncSession = Depends(get_db),
+    user_id: UUID4 = Depends(get_user_id),
+    project_id: UUID4 = Path(
+        ...,
+        description="The ID of the project to export",
+        example="3fa85f64-5717-4562-b3fc-2c963f66afa6",
+    ),
+    project_in: IProjectExport = Body(
+        ...,
+        examples=project_request_examples["export"],
+        description="Export options",
+    ),
+):
+    """Export the layers of a project into one archive."""
+
+    # Check if user can create a new job
+    job = await crud_job.check_and_create(
+        async_session=async_session,
+        user_id=user_id,
+        job_type=JobType.project_export,
+        project_id=project_id,
+    )
+
+    # Run the export
+    await CRUDProjectExport(
+        background_tasks=background_tasks,
+        async_session=async_session,
+        user_id=user_id,
+        job_id=job.id,
+    ).export_project_job(project_id=project_id, project_in=project_in)
+    return {"job_id": job.id}
+
+
+@router.get(
+    "/{project_id}/export/{job_id}",
+    summary="Download the archive of a project export",
+    response_class=FileResponse,
+    status_code=200,
+    dependencies=[Depends(auth_z)],
+)
+async def download_project_export(
+    async_session: AsyncSession = Depends(get_db),
+    user_id: UUID4 = Depends(get_user_id),
+    project_id: UUID4 = Path(
+        ...,
+        description="The ID of the exported project",
+        example="3fa85f64-5717-4562-b3fc-2c963f66afa6",
+    ),
+    job_id: UUID4 = Path(
+        ...,
+        description="The ID of the project export job",
+        example="3fa85f64-5717-4562-b3fc-2c963f66afa6",
+    ),
+):
+    """Download the archive of a finished project export."""
+
+    job = await crud_job.get(async_session, id=job_id)
+    if (
+        job is None
+        or job.user_id != user_id
+        or job.project_id != project_id
+        or job.type != JobType.project_export
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project export not found",
+        )
+
+    archive_path = CRUDProjectExport.get_archive_path(user_id, job_id)
+    if job.status_simple != JobStatusType.finished or not os.path.exists(
+        archive_path
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="The archive of the project export is not available",
+        )
+    return FileResponse(
+        archive_path,
+        media_type="application/zip",
+        filename=job.payload["file_name"],
+    )
+
+
 @router.get(
     "/{project_id}/layer/{layer_project_id}/chart-data",
     response_model=dict,
@@ -719,6 +823,60 @@ async def get_statistic_histogram(
     return values
 
 
+@router.post(
+    "/{project_id}/layer/{layer_project_id}/statistics",
+    summary="Get several statistics of a layer at once",
+    response_model=dict,
+    status_code=200,
+)
+async def get_statistics_batch(
+    request: Request,
+    async_session: AsyncSession = Depends(get_db),
+    project_id: UUID4 = Path(
+        ...,
+        description="The ID of the project to get",
+        example="3fa85f64-5717-4562-b3fc-2c963f66afa6",
+    ),
+    layer_project_id: int = Path(
+        ...,
+        description="Layer Project ID to get the statistics",
+        example="1",
+    ),
+    statistics_in: IStatisticsBatch = Body(
+        ...,
+        examples=statistics_request_examples["batch"],
+        description="The metrics to compute and the CQL-filter to apply",
+    ),
+):
+    """Get aggregations, histograms, unique values and class breaks of a layer project with one CQL-filter. The features are read once and the results are returned in the order of the metrics."""
+
+    # Check authorization status
+    try:
+        await auth_z_lite(request, async_session)
+    except HTTPException:
+        # Check publication status if unauthorized
+        public_project = await crud_project.get_public_project(
+            async_session=async_session,
+            project_id=str(project_id),
+        )
+        if not public_project:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized"
+            )
+
+    with HTTPErrorHandler():
+        values = await crud_layer_project.get_statistics_batch(
+            async_session=async_session,
+            project_id=project_id,
+            layer_project_id=layer_project_id,
+            metrics=statistics_in.metrics,
+            query=json.dumps(statistics_in.query) if statistics_in.query else None,
+        )
+
+    # Return result
+    return values
+
+
 ##############################################
 ### Scenario endpoints
 ##############################################
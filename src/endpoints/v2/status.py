@@ -1,9 +1,12 @@
+from typing import Any, Dict
+
 from fastapi import Body, Depends, APIRouter
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.endpoints.deps import get_db
 from src.deps.auth import is_superuser
 from src.db.models import Status
 from src.crud.crud_status import status as crud_status
+from src.core.cache import cache_stats
 
 router = APIRouter()
 
@@ -50,3 +53,18 @@ async def update_status(
     # Update the status
     status = await crud_status.update(db=async_session, db_obj=status, obj_in=obj_in)
     return status
+
+
+@router.get(
+    "/cache",
+    summary="Get the hit and miss counters of the caches of this process",
+    response_model=Dict[str, Dict[str, Any]],
+    status_code=200,
+    dependencies=[Depends(is_superuser)],
+)
+async def get_cache_status():
+    """
+    Get the hit and miss counters of the caches of this process.
+    """
+
+    return {name: stats.dict() for name, stats in cache_stats.items()}
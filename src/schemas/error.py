@@ -114,6 +114,12 @@ class Ogr2OgrError(Exception):
     pass
 
 
+class DataImportError(Exception):
+    """Raised when the data of a file cannot be imported."""
+
+    pass
+
+
 class RoutingEndpointError(Exception):
     """Raised when the routing endpoint fails to compute an catchment area."""
 
@@ -171,6 +177,7 @@ ERROR_MAPPING = {
     NoCRSError: status.HTTP_422_UNPROCESSABLE_ENTITY,
     DataOutCRSBoundsError: status.HTTP_422_UNPROCESSABLE_ENTITY,
     Ogr2OgrError: status.HTTP_500_INTERNAL_SERVER_ERROR,
+    DataImportError: status.HTTP_500_INTERNAL_SERVER_ERROR,
     RoutingEndpointError: status.HTTP_500_INTERNAL_SERVER_ERROR,
     R5EndpointError: status.HTTP_500_INTERNAL_SERVER_ERROR,
     R5CatchmentAreaComputeError: status.HTTP_500_INTERNAL_SERVER_ERROR,
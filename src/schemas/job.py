@@ -8,6 +8,7 @@ class JobType(str, Enum):
     """Job types."""
 
     file_import = "file_import"
+    file_import_batch = "file_import_batch"
     join = "join"
     catchment_area_active_mobility = "catchment_area_active_mobility"
     catchment_area_pt = "catchment_area_pt"
@@ -29,6 +30,7 @@ class JobType(str, Enum):
     heatmap_connectivity_motorized_mobility = "heatmap_connectivity_motorized_mobility"
     data_delete_multi = "data_delete_multi"
     update_layer_dataset = "update_layer_dataset"
+    project_export = "project_export"
 
 
 class JobStatusType(str, Enum):
@@ -71,6 +73,11 @@ class JobStatusFileImport(BaseModel):
     migration: JobStep = {}
 
 
+class JobStatusFileImportBatch(BaseModel):
+    validation: JobStep = {}
+    upload: JobStep = {}
+
+
 class JobStatusJoin(BaseModel):
     join: JobStep = {}
 
@@ -162,9 +169,14 @@ class JobStatusLayerDeleteMulti(BaseModel):
     data_delete_multi: JobStep = {}
 
 
+class JobStatusProjectExport(BaseModel):
+    export: JobStep = {}
+
+
 # Only add jobs here that are consisting of multiple steps
 job_mapping = {
     JobType.file_import: JobStatusFileImport,
+    JobType.file_import_batch: JobStatusFileImportBatch,
     JobType.join: JobStatusJoin,
     JobType.oev_gueteklasse: JobStatusOevGueteklasse,
     JobType.aggregate_point: JobStatusAggregationPoint,
@@ -184,4 +196,5 @@ job_mapping = {
     JobType.heatmap_connectivity_motorized_mobility: JobStatusHeatmapConnectivityMotorizedMobility,
     JobType.data_delete_multi: JobStatusLayerDeleteMulti,
     JobType.update_layer_dataset: JobStatusFileImport,
+    JobType.project_export: JobStatusProjectExport,
 }
@@ -4,7 +4,14 @@ from typing import List, Optional
 from uuid import UUID, uuid4
 
 # Third party imports
-from pydantic import BaseModel, Field, HttpUrl, ValidationError, validator
+from pydantic import (
+    BaseModel,
+    Field,
+    HttpUrl,
+    StrictInt,
+    ValidationError,
+    validator,
+)
 from pyproj import CRS
 from pyproj.exceptions import CRSError
 from shapely import wkt
@@ -42,6 +49,8 @@ class MaxFileSizeType(int, Enum):
     gpkg = 300000000
     kml = 300000000
     zip = 300000000
+    parquet = 1000000000
+    fgb = 1000000000
 
 
 class SupportedOgrGeomType(Enum):
@@ -74,12 +83,15 @@ class OgrDriverType(str, Enum):
     """OGR driver types."""
 
     geojson = "GeoJSON"
-    csv = "CSV"  # Using XLSX driver for CSV files as the file is converted to XLSX to keep data types
+    csv = "CSV"
     xlsx = "XLSX"
     gpkg = "GPKG"
     kml = "KML"
-    shp = "ESRI Shapefile"  # Using SHP driver for ZIP files as the file is converted to SHP to keep data types
-    zip = "ESRI Shapefile"  # Using SHP driver for ZIP files as the file is converted to SHP to keep data types
+    shp = "ESRI Shapefile"
+    zip = "ESRI Shapefile"  # Shapefiles are read from within the ZIP through /vsizip/
+    parquet = "Parquet"
+    fgb = "FlatGeobuf"
+    arrow = "Arrow"
 
 
 class NumberColumnsPerType(int, Enum):
@@ -104,6 +116,7 @@ class ComputeBreakOperation(Enum):
     standard_deviation = "standard_deviation"
     equal_interval = "equal_interval"
     heads_and_tails = "heads_and_tails"
+    natural_breaks = "natural_breaks"
 
 
 class AreaStatisticsOperation(Enum):
@@ -158,6 +171,15 @@ class ExternalServiceOtherProperties(BaseModel):
     height: Optional[int] = Field(None, description="Height of the WMS image")
     srs: Optional[str] = Field(None, description="SRS of the WMS image", max_length=50)
     legend_urls: Optional[List[HttpUrl]] = Field(None, description="Layer legend URLs")
+    bbox: Optional[List[float]] = Field(
+        None,
+        description="Extent to fetch vector tiles for as west, south, east, north in EPSG:4326",
+        min_items=4,
+        max_items=4,
+    )
+    zoom: Optional[int] = Field(
+        None, description="Zoom level to fetch vector tiles at", ge=0, le=22
+    )
 
 
 class ExternalServiceAttributesBase(BaseModel):
@@ -183,15 +205,57 @@ class IFileUploadExternalService(ExternalServiceAttributesBase):
     pass
 
 
+class IFileUploadSessionCreate(BaseModel):
+    """Model to create a resumable file upload."""
+
+    file_name: str = Field(..., description="File name including the file ending")
+    file_size: int = Field(..., description="File size in bytes", gt=0)
+
+
+class IFileUploadSessionRead(BaseModel):
+    """Model to read the state of a resumable file upload."""
+
+    upload_id: UUID = Field(..., description="Upload ID, used as dataset ID")
+    file_name: str = Field(..., description="File name")
+    file_size: int = Field(..., description="File size in bytes")
+    offset: int = Field(..., description="Number of bytes received")
+    chunk_size: int = Field(..., description="Suggested chunk size in bytes")
+    finalized: bool = Field(..., description="Whether the upload is finalized")
+
+
+class FieldProfile(BaseModel):
+    """Statistics of a field collected while profiling a dataset."""
+
+    name: str = Field(..., description="Field name")
+    type: str = Field(..., description="OGR field type")
+    null_ratio: float = Field(..., description="Share of features without a value")
+    # Strict to keep integers from being coerced into floats and vice versa
+    min: StrictInt | float | str | None = Field(None, description="Minimum value")
+    max: StrictInt | float | str | None = Field(None, description="Maximum value")
+
+
+class DatasetProfile(BaseModel):
+    """Profile of a dataset built in a single scan of the file."""
+
+    feature_cnt: int = Field(..., description="Number of features")
+    geometry_column: str | None = Field(None, description="Geometry column name")
+    geometry_type: str | None = Field(None, description="OGR geometry type")
+    extent: str | None = Field(None, description="Extent in EPSG:4326 as WKT")
+    srs: str | None = Field(None, description="Spatial reference system")
+    fields: List[FieldProfile] = Field([], description="Profiles of the fields")
+
+
 class IFileUploadMetadata(BaseModel):
     """Response model returned by file upload endpoints containing dataset metadata."""
 
     data_types: dict = Field(..., description="Data types of the columns")
+    profile: DatasetProfile | None = Field(None, description="Dataset profile")
     layer_type: LayerType = Field(..., description="Layer type")
     file_ending: str = Field(..., description="File ending", max_length=500)
     file_size: int = Field(..., description="File size")
     file_path: str = Field(..., description="File path", max_length=500)
     dataset_id: UUID = Field(..., description="Dataset ID")
+    content_hash: str | None = Field(None, description="SHA-256 of the file content")
     msg: Msg = Field(..., description="Response Message")
 
 
@@ -3,11 +3,17 @@ from enum import Enum
 from typing import List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field, HttpUrl, validator
+from pydantic import BaseModel, Field, HttpUrl, ValidationError, validator
+from pyproj import CRS
+from pyproj.exceptions import CRSError
 from sqlmodel import SQLModel
 
 from src.db.models._base_class import DateTimeBase
-from src.db.models.layer import ContentBaseAttributes, internal_layer_table_name
+from src.db.models.layer import (
+    ContentBaseAttributes,
+    FeatureLayerExportType,
+    internal_layer_table_name,
+)
 from src.schemas.common import CQLQuery
 from src.schemas.layer import (
     ExternalServiceOtherProperties,
@@ -243,6 +249,42 @@ layer_type_mapping_update = {
 }
 
 
+class IProjectExport(BaseModel):
+    """Project export input schema."""
+
+    file_type: FeatureLayerExportType = Field(
+        ...,
+        description="File type of the feature layers. Table layers are exported as CSV if the file type doesn't support tables.",
+    )
+    file_name: str = Field(
+        ..., description="File name of the exported file.", max_length=500
+    )
+    crs: str = Field(
+        "EPSG:4326", description="CRS of the exported feature layers.", max_length=20
+    )
+    layer_project_ids: List[int] | None = Field(
+        None,
+        description="IDs of the layers of the project to export. If not specified, all feature and table layers are exported.",
+    )
+
+    # Check if crs is valid
+    @validator("crs")
+    def validate_crs(cls, crs):
+        try:
+            CRS(crs)
+        except CRSError as e:
+            raise ValidationError(f"Invalid CRS: {e}")
+        return crs
+
+    # Check that projection is EPSG:4326 for KML
+    @validator("crs")
+    def validate_crs_kml(cls, crs, values):
+        if values.get("file_type") == FeatureLayerExportType.kml:
+            if crs != "EPSG:4326":
+                raise ValidationError("KML export only supports EPSG:4326 projection.")
+        return crs
+
+
 class ProjectPublicProjectConfig(BaseModel):
     id: UUID = Field(..., description="Project ID")
     name: str = Field(..., description="Project name")
@@ -302,6 +344,16 @@ request_examples = {
         "tags": ["tag1", "tag2"],
     },
     "initial_view_state": initial_view_state_example,
+    "export": {
+        "gpkg": {
+            "summary": "Export all layers as GeoPackage",
+            "value": {
+                "file_type": "gpkg",
+                "file_name": "project_export",
+                "crs": "EPSG:4326",
+            },
+        },
+    },
     "update_layer": {
         "feature_standard": {
             "summary": "Feature Layer Standard",
@@ -0,0 +1,122 @@
+from typing import Annotated, List, Literal, Union
+
+from pydantic import BaseModel, Field, validator
+
+from src.schemas.common import OrderEnum
+from src.schemas.layer import ComputeBreakOperation
+from src.schemas.toolbox_base import ColumnStatisticsOperation
+
+
+class IStatisticAggregationMetric(BaseModel):
+    """Aggregated statistics of a column grouped by another column."""
+
+    type: Literal["aggregation"] = Field(..., description="Metric type")
+    column_name: str | None = Field(
+        None, description="The column name to aggregate, optional for count"
+    )
+    operation: ColumnStatisticsOperation = Field(
+        ..., description="The operation to perform"
+    )
+    group_by_column_name: str = Field(..., description="The column name to group by")
+    size: int = Field(
+        100, description="The number of grouped values to return", ge=1, le=100
+    )
+    order: OrderEnum = Field(OrderEnum.descendent, description="Order of the values")
+
+    @validator("operation")
+    def validate_column_name(cls, operation, values):
+        if (
+            values.get("column_name") is None
+            and operation != ColumnStatisticsOperation.count
+        ):
+            raise ValueError(
+                "A column name must be specified for all operations except count."
+            )
+        return operation
+
+
+class IStatisticHistogramMetric(BaseModel):
+    """Histogram of a number column."""
+
+    type: Literal["histogram"] = Field(..., description="Metric type")
+    column_name: str = Field(..., description="The number column")
+    num_bins: int = Field(..., description="The number of bins", ge=1, le=100)
+    order: OrderEnum = Field(OrderEnum.ascendent, description="Order of the bins")
+
+
+class IStatisticUniqueValuesMetric(BaseModel):
+    """Most frequent values of a column."""
+
+    type: Literal["unique_values"] = Field(..., description="Metric type")
+    column_name: str = Field(..., description="The column name")
+    size: int = Field(
+        100, description="The number of unique values to return", ge=1, le=100
+    )
+    order: OrderEnum = Field(OrderEnum.descendent, description="Order of the counts")
+
+
+class IStatisticClassBreaksMetric(BaseModel):
+    """Class breaks of a number column."""
+
+    type: Literal["class_breaks"] = Field(..., description="Metric type")
+    column_name: str = Field(..., description="The number column")
+    operation: ComputeBreakOperation = Field(
+        ..., description="The class breaks operation"
+    )
+    breaks: int | None = Field(
+        None, description="Number of class breaks to create", ge=1, le=100
+    )
+    stripe_zeros: bool = Field(
+        True, description="Stripe zeros from the column before computing the breaks"
+    )
+
+
+IStatisticMetric = Annotated[
+    Union[
+        IStatisticAggregationMetric,
+        IStatisticHistogramMetric,
+        IStatisticUniqueValuesMetric,
+        IStatisticClassBreaksMetric,
+    ],
+    Field(discriminator="type"),
+]
+
+
+class IStatisticsBatch(BaseModel):
+    """Metrics of a layer of a project computed together with one filter."""
+
+    query: dict | None = Field(None, description="CQL2-Filter in JSON format")
+    metrics: List[IStatisticMetric] = Field(
+        ...,
+        description="The metrics to compute, the results are returned in the same order",
+        min_items=1,
+        max_items=20,
+    )
+
+
+request_examples = {
+    "batch": {
+        "dashboard": {
+            "summary": "Metrics of a dashboard",
+            "value": {
+                "query": {"op": "=", "args": [{"property": "category"}, "bus_stop"]},
+                "metrics": [
+                    {
+                        "type": "aggregation",
+                        "operation": "count",
+                        "group_by_column_name": "category",
+                        "size": 5,
+                    },
+                    {"type": "histogram", "column_name": "population", "num_bins": 10},
+                    {"type": "unique_values", "column_name": "name", "size": 10},
+                    {
+                        "type": "class_breaks",
+                        "column_name": "population",
+                        "operation": "quantile",
+                        "breaks": 5,
+                    },
+                ],
+            },
+        },
+    },
+}
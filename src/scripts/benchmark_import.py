@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import time
+from uuid import UUID, uuid4
+
+from src.core.bulk_load import (
+    ArrowBatchReader,
+    OgrFeatureBatchReader,
+    copy_chunks_parallel,
+    get_bulk_load_connection,
+    plan_feature_chunks,
+)
+from src.core.layer import OGRFileHandling, get_attribute_mapping
+from src.schemas.job import JobStatusType
+from src.db.models.layer import FileUploadType
+from src.schemas.layer import SupportedOgrGeomType
+from src.utils import print_hashtags, print_info, print_warning
+
+DEFAULT_WORKER_CNTS = [1, 2, 4, 8]
+ARROW_FILE_TYPES = [FileUploadType.parquet.value, FileUploadType.fgb.value]
+
+
+async def delete_rows(table_name: str, layer_id: UUID):
+    """Remove the benchmark rows again."""
+
+    connection = await get_bulk_load_connection()
+    try:
+        await connection.execute(
+            f"DELETE FROM {table_name} WHERE layer_id = $1", layer_id
+        )
+    finally:
+        await connection.close()
+
+
+async def benchmark_file(file_path: str, user_id: UUID, worker_cnts: list[int]):
+    """Import a file with each worker count and return the timings."""
+
+    file_handling = OGRFileHandling(
+        async_session=None, user_id=user_id, file_path=file_path
+    )
+    validation_result = await file_handling.validate()
+    if validation_result.get("status") == JobStatusType.failed.value:
+        print_warning(f"{file_path}: {validation_result['msg']}")
+        return []
+
+    data_types = validation_result["data_types"]
+    geometry_type = None
+    if data_types["geometry"].get("column_name") is not None:
+        geometry_type = SupportedOgrGeomType[data_types["geometry"]["type"]].value
+    table_name = file_handling.get_target_table(data_types)
+    source_path = file_handling.get_source_path()
+    reader_kwargs = {
+        "file_path": source_path,
+        "driver_name": file_handling.driver_name,
+        "attribute_mapping": get_attribute_mapping(data_types),
+        "geometry_type": geometry_type,
+    }
+
+    # Columnar formats are loaded in Arrow batches by a single reader
+    if file_handling.file_ending in ARROW_FILE_TYPES:
+        worker_cnts = [1]
+
+    results = []
+    for worker_cnt in worker_cnts:
+        layer_id = uuid4()
+        reader_kwargs["layer_id"] = layer_id
+        start = time.monotonic()
+        if file_handling.file_ending in ARROW_FILE_TYPES:
+            label = f"{file_handling.file_ending} (arrow)"
+            result = await file_handling.copy_reader(
+                ArrowBatchReader(
+                    **reader_kwargs,
+                    geometry_column=data_types["geometry"].get("column_name"),
+                ),
+                table_name,
+            )
+        else:
+            chunks = (
+                plan_feature_chunks(
+                    source_path, file_handling.driver_name, worker_cnt * 2
+                )
+                if worker_cnt > 1
+                else []
+            )
+            # Layers without a FID column are loaded by one reader as in the import
+            if len(chunks) > 1:
+                label = f"{file_handling.file_ending} ({worker_cnt} workers)"
+                result = await copy_chunks_parallel(
+                    reader_kwargs=reader_kwargs,
+                    chunks=chunks,
+                    table_name=table_name,
+                    worker_cnt=worker_cnt,
+                )
+            else:
+                label = f"{file_handling.file_ending} (1 worker)"
+                result = await file_handling.copy_reader(
+                    OgrFeatureBatchReader(**reader_kwargs), table_name
+                )
+        duration = time.monotonic() - start
+        results.append((label, result["row_cnt"], duration))
+        print_info(
+            f"{label}: {result['row_cnt']} rows in {duration:.2f}s ({round(result['row_cnt'] / duration)} rows/s)"
+        )
+        await delete_rows(table_name, layer_id)
+
+    return results
+
+
+async def run_benchmark(file_paths: list[str], user_id: UUID, worker_cnts: list[int]):
+    results = []
+    for file_path in file_paths:
+        results.extend(await benchmark_file(file_path, user_id, worker_cnts))
+    if not results:
+        return
+
+    # Compare the throughput against the first run e.g. a GeoPackage with one worker
+    print_hashtags()
+    baseline = results[0][1] / results[0][2]
+    for label, row_cnt, duration in results:
+        rows_per_second = row_cnt / duration
+        print_info(
+            f"{label}: {round(rows_per_second)} rows/s, {rows_per_second / baseline:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the import of files into a user table."
+    )
+    parser.add_argument(
+        "file_paths",
+        nargs="+",
+        help="Paths of the files e.g. a GeoPackage and a GeoParquet with the same data.",
+    )
+    parser.add_argument(
+        "--user-id",
+        type=UUID,
+        required=True,
+        help="User whose data tables are used for the import.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=DEFAULT_WORKER_CNTS,
+        help="Worker counts to compare for formats read through OGR.",
+    )
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.file_paths, args.user_id, args.workers))
@@ -0,0 +1,110 @@
+import argparse
+import time
+
+import numpy as np
+
+from src.utils import (
+    compute_r5_surface,
+    decode_r5_grid,
+    encode_r5_grid,
+    print_hashtags,
+    print_info,
+)
+
+# Width, height and depth of the grids from a single surface to a large R5 response
+DEFAULT_GRID_SIZES = [
+    (10, 10, 1),
+    (100, 100, 5),
+    (500, 500, 5),
+    (1000, 1000, 5),
+    (2000, 2000, 5),
+]
+
+
+def get_grid(width: int, height: int, depth: int) -> dict:
+    """Build a grid of travel times increasing with the percentiles."""
+
+    rng = np.random.default_rng(0)
+    travel_times = rng.integers(0, 120, size=width * height, dtype=np.int32)
+    data = np.concatenate([travel_times + i * 5 for i in range(depth)])
+    return {
+        "version": 0,
+        "zoom": 9,
+        "west": 0,
+        "north": 0,
+        "width": width,
+        "height": height,
+        "depth": depth,
+        "data": data,
+    }
+
+
+def get_duration(function, repeat: int) -> float:
+    """Get the fastest duration of repeated calls of a function."""
+
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def benchmark_grid(width: int, height: int, depth: int, repeat: int) -> dict:
+    """Encode and decode a grid and compute the surface of a percentile."""
+
+    grid = get_grid(width, height, depth)
+    encoded = encode_r5_grid(grid)
+    decoded = decode_r5_grid(encoded)
+    if not np.array_equal(decoded["data"], grid["data"]):
+        raise ValueError(f"The grid {width}x{height}x{depth} changed in the codec")
+
+    percentile = 50 if depth > 1 else 5
+    return {
+        "label": f"{width}x{height}x{depth}",
+        "size": len(encoded),
+        "encode": get_duration(lambda: encode_r5_grid(grid), repeat),
+        "decode": get_duration(lambda: decode_r5_grid(encoded), repeat),
+        "surface": get_duration(
+            lambda: compute_r5_surface(decoded, percentile), repeat
+        ),
+    }
+
+
+def run_benchmark(grid_sizes: list[tuple[int, int, int]], repeat: int):
+    results = [
+        benchmark_grid(width, height, depth, repeat)
+        for width, height, depth in grid_sizes
+    ]
+
+    print_hashtags()
+    for result in results:
+        megabytes = result["size"] / 1024 / 1024
+        print_info(
+            f"{result['label']}: encode {result['encode'] * 1000:.2f}ms, "
+            f"decode {result['decode'] * 1000:.2f}ms ({megabytes / result['decode']:.0f} MB/s), "
+            f"surface {result['surface'] * 1000:.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the codec of R5 travel time grids."
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=[f"{w}x{h}x{d}" for w, h, d in DEFAULT_GRID_SIZES],
+        help="Grid sizes as widthxheightxdepth e.g. 2000x2000x5.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Number of runs per grid, the fastest run is reported.",
+    )
+    args = parser.parse_args()
+    run_benchmark(
+        [tuple(int(value) for value in size.split("x")) for size in args.sizes],
+        args.repeat,
+    )
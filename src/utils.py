@@ -63,13 +63,21 @@ async def table_exists(db: AsyncSession, schema_name: str, table_name: str) -> b
     return table_exists.scalar() > 0
 
 
+# Header of R5 travel time grids
+R5_GRID_TYPE = b"ACCESSGR"
+R5_GRID_VERSION = 0
+R5_GRID_HEADER_ENTRIES = 7
+R5_GRID_HEADER_LENGTH = 9  # type + entries
+
+
 def encode_r5_grid(grid_data: Any) -> bytes:
     """
     Encode raster grid data
+
+    The values of each percentile surface are delta encoded along the rows of one
+    (depth, width * height) array.
     """
-    grid_type = "ACCESSGR"
-    grid_type_binary = str.encode(grid_type)
-    array = np.array(
+    header_bin = np.array(
         [
             grid_data["version"],
             grid_data["zoom"],
@@ -80,19 +88,24 @@ def encode_r5_grid(grid_data: Any) -> bytes:
             grid_data["depth"],
         ],
         dtype=np.int32,
-    )
-    header_bin = array.tobytes()
-    # - reshape the data
-    grid_size = grid_data["width"] * grid_data["height"]
-    if len(grid_data["data"]) == 0:
-        data = np.array([], dtype=np.int32)
+    ).tobytes()
+
+    # - delta encode the surfaces
+    grid_size = int(grid_data["width"]) * int(grid_data["height"])
+    data = np.asarray(grid_data["data"])
+    if data.size == 0:
+        z_diff = np.array([], dtype=np.int32)
     else:
-        data = grid_data["data"].reshape(grid_data["depth"], grid_size)
-        reshaped_data = np.array([])
-        for i in range(grid_data["depth"]):
-            reshaped_data = np.append(reshaped_data, np.diff(data[i], prepend=0))
-        data = reshaped_data.astype(np.int32)
-    z_diff_bin = data.tobytes()
+        data = data.reshape(int(grid_data["depth"]), grid_size)
+        z_diff = np.empty(data.shape, dtype=np.int32)
+        z_diff[:, 0] = data[:, 0]
+        np.subtract(
+            data[:, 1:],
+            data[:, :-1],
+            out=z_diff[:, 1:],
+            dtype=np.int32,
+            casting="unsafe",
+        )
 
     # - encode metadata
     metadata = {
@@ -105,66 +118,65 @@ def encode_r5_grid(grid_data: Any) -> bytes:
     }
     metadata_bin = json.dumps(metadata).encode("utf-8")
 
-    binary_output = b"".join([grid_type_binary, header_bin, z_diff_bin, metadata_bin])
-    return binary_output
+    return b"".join([R5_GRID_TYPE, header_bin, z_diff.tobytes(), metadata_bin])
 
 
 def decode_r5_grid(grid_data_buffer: bytes) -> dict:
     """
     Decode R5 grid data
+
+    The deltas are read as a view of the buffer and summed along the rows of one
+    (depth, width * height) array, which is the only copy of the data. The surfaces of
+    the percentiles are views of it, see `get_r5_surfaces`.
     """
-    CURRENT_VERSION = 0
-    HEADER_ENTRIES = 7
-    HEADER_LENGTH = 9  # type + entries
-    TIMES_GRID_TYPE = "ACCESSGR"
 
     # -- PARSE HEADER
-    ## - get header type
-    header = {}
-    header_data = np.frombuffer(grid_data_buffer, count=8, dtype=np.byte)
-    header_type = "".join(map(chr, header_data))
-    if header_type != TIMES_GRID_TYPE:
+    if bytes(grid_data_buffer[: len(R5_GRID_TYPE)]) != R5_GRID_TYPE:
         raise ValueError("Invalid grid type")
-    ## - get header data
     header_raw = np.frombuffer(
-        grid_data_buffer, count=HEADER_ENTRIES, offset=8, dtype=np.int32
+        grid_data_buffer,
+        count=R5_GRID_HEADER_ENTRIES,
+        offset=len(R5_GRID_TYPE),
+        dtype=np.int32,
     )
     version = header_raw[0]
-    if version != CURRENT_VERSION:
+    if version != R5_GRID_VERSION:
         raise ValueError("Invalid grid version")
-    header["zoom"] = header_raw[1]
-    header["west"] = header_raw[2]
-    header["north"] = header_raw[3]
-    header["width"] = header_raw[4]
-    header["height"] = header_raw[5]
-    header["depth"] = header_raw[6]
-    header["version"] = version
+    header = {
+        "zoom": header_raw[1],
+        "west": header_raw[2],
+        "north": header_raw[3],
+        "width": header_raw[4],
+        "height": header_raw[5],
+        "depth": header_raw[6],
+        "version": version,
+    }
 
     # -- PARSE DATA --
-    gridSize = header["width"] * header["height"]
-    # - skip the header
-    data = np.frombuffer(
+    depth = int(header["depth"])
+    grid_size = int(header["width"]) * int(header["height"])
+    data_offset = R5_GRID_HEADER_LENGTH * 4
+    z_diff = np.frombuffer(
         grid_data_buffer,
-        offset=HEADER_LENGTH * 4,
-        count=gridSize * header["depth"],
+        offset=data_offset,
+        count=grid_size * depth,
         dtype=np.int32,
-    )
-    # - reshape the data
-    data = data.reshape(header["depth"], gridSize)
-    reshaped_data = np.array([], dtype=np.int32)
-    for i in range(header["depth"]):
-        reshaped_data = np.append(reshaped_data, data[i].cumsum())
-    data = reshaped_data
+    ).reshape(depth, grid_size)
+    data = np.cumsum(z_diff, axis=1, dtype=np.int32)
+
     # - decode metadata
-    raw_metadata = np.frombuffer(
-        grid_data_buffer,
-        offset=(HEADER_LENGTH + header["width"] * header["height"] * header["depth"])
-        * 4,
-        dtype=np.int8,
+    metadata = json.loads(
+        bytes(grid_data_buffer[data_offset + grid_size * depth * 4 :])
     )
-    metadata = json.loads(raw_metadata.tostring())
 
-    return header | metadata | {"data": data, "errors": [], "warnings": []}
+    return header | metadata | {"data": data.reshape(-1), "errors": [], "warnings": []}
+
+
+def get_r5_surfaces(grid: dict) -> np.ndarray:
+    """
+    Get the surfaces of all percentiles of a grid as a (depth, width * height) view
+    """
+    return np.reshape(grid["data"], (int(grid["depth"]), -1))
 
 
 def compute_r5_surface(grid: dict, percentile: int) -> np.array:
@@ -185,8 +197,7 @@ def compute_r5_surface(grid: dict, percentile: int) -> np.array:
         # if only one percentile is requested, return the grid as is
         surface = grid["data"]
     else:
-        grid_percentiles = np.reshape(grid["data"], (grid["depth"], -1))
-        surface = grid_percentiles[percentile_index]
+        surface = get_r5_surfaces(grid)[percentile_index]
 
     return surface.astype(np.uint16)
 
@@ -6,6 +6,7 @@ import pytest
 from httpx import AsyncClient
 
 from src.core.config import settings
+from src.core.statistics import unique_values_cache
 from src.db.models.layer import LayerType
 from src.schemas.layer import (
     AreaStatisticsOperation,
@@ -316,6 +317,37 @@ async def test_get_unique_values_layer_pagination(
     return
 
 
+@pytest.mark.asyncio
+async def test_get_unique_values_layer_cursor(
+    client: AsyncClient, fixture_create_feature_layer, monkeypatch
+):
+    layer_id = fixture_create_feature_layer["id"]
+    column = "name"
+    url = f"{settings.API_V2_STR}/layer/{layer_id}/unique-values/{column}"
+
+    response = await client.get(f"{url}?page=1&size=10")
+    assert response.status_code == 200
+    first_ten = response.json()["items"]
+
+    # Values beyond the cached values are requested by the cursor of the last value
+    unique_values_cache.clear()
+    monkeypatch.setattr(settings, "UNIQUE_VALUES_CACHE_MAX_VALUES", 5)
+    response = await client.get(f"{url}?page=2&size=5")
+    assert response.status_code == 400
+    last_value = first_ten[4]
+    response = await client.get(
+        url,
+        params={
+            "size": 5,
+            "after_count": last_value["count"],
+            "after_value": last_value["value"],
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()["items"] == first_ten[5:]
+    return
+
+
 @pytest.mark.asyncio
 async def test_get_unique_values_layer_query(
     client: AsyncClient, fixture_create_feature_layer
@@ -290,3 +290,69 @@ async def test_delete_layer_project(client: AsyncClient, fixture_create_layer_pr
     )
     assert response.status_code == 200
     assert layer_project_id not in response.json()["layer_order"]
+
+
+@pytest.mark.asyncio
+async def test_get_statistics_batch(client: AsyncClient, fixture_create_layer_project):
+    project_id = fixture_create_layer_project["project_id"]
+    layer_project = next(
+        layer
+        for layer in fixture_create_layer_project["layer_project"]
+        if layer["type"] == "table"
+    )
+    layer_project_url = (
+        f"{settings.API_V2_STR}/project/{project_id}/layer/{layer_project['id']}"
+    )
+    layer_url = f"{settings.API_V2_STR}/layer/{layer_project['layer_id']}"
+    column = "einwohnerzahl_ewz"
+
+    response = await client.post(
+        f"{layer_project_url}/statistics",
+        json={
+            "metrics": [
+                {
+                    "type": "aggregation",
+                    "column_name": column,
+                    "operation": "sum",
+                    "group_by_column_name": "land",
+                    "size": 5,
+                },
+                {"type": "histogram", "column_name": column, "num_bins": 5},
+                {"type": "unique_values", "column_name": "land", "size": 5},
+                {
+                    "type": "class_breaks",
+                    "column_name": column,
+                    "operation": "quantile",
+                    "breaks": 5,
+                },
+            ]
+        },
+    )
+    assert response.status_code == 200
+    aggregation, histogram, unique_values, class_breaks = response.json()["results"]
+
+    # Each metric equals the result of its single-metric endpoint
+    response = await client.get(
+        f"{layer_project_url}/statistic-aggregation?column_name={column}&operation=sum&group_by_column_name=land&size=5"
+    )
+    assert response.status_code == 200
+    assert aggregation == response.json()
+
+    response = await client.get(
+        f"{layer_project_url}/statistic-histogram?column_name={column}&num_bins=5"
+    )
+    assert response.status_code == 200
+    assert histogram == response.json()
+
+    response = await client.get(
+        f"{layer_url}/unique-values/land?page=1&size=5&order=descendent"
+    )
+    assert response.status_code == 200
+    assert unique_values["items"] == response.json()["items"]
+    assert unique_values["total"] == response.json()["total"]
+
+    response = await client.get(
+        f"{layer_url}/class-breaks/quantile/{column}?breaks=5&stripe_zeros=true"
+    )
+    assert response.status_code == 200
+    assert class_breaks == response.json()["breaks"]
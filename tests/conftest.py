@@ -401,6 +401,7 @@ files = [
     "invalid_bad_formed.xlsx",
     "invalid_no_header.csv",
     "invalid_missing_file.zip",
+    "invalid_multiple_shapefiles.zip",
 ]
 
 
@@ -0,0 +1,209 @@
+import json
+import struct
+
+import h3
+import pyarrow as pa
+import pyarrow.parquet as pq
+from osgeo import ogr
+
+from src.core.bulk_load import (
+    EWKB_SRID_FLAG,
+    ArrowBatchReader,
+    OgrFeatureBatchReader,
+    add_h3_cells,
+    convert_wkb,
+    ewkb_to_wkb,
+    get_field_reader,
+    plan_feature_chunks,
+    split_table_name,
+    wkb_to_ewkb,
+)
+
+
+def test_wkb_to_ewkb_adds_srid():
+    # Test that the SRID is added to the header of the geometry
+    geometry = ogr.CreateGeometryFromWkt("POINT (11.5 48.1)")
+    wkb = geometry.ExportToWkb(ogr.wkbNDR)
+    ewkb = wkb_to_ewkb(wkb, srid=4326)
+
+    geom_type, srid = struct.unpack("<II", ewkb[1:9])
+    assert geom_type == ogr.wkbPoint | EWKB_SRID_FLAG
+    assert srid == 4326
+    assert ewkb[9:] == wkb[5:]
+
+
+def test_wkb_to_ewkb_big_endian():
+    # Test that the byte order of the geometry is kept
+    geometry = ogr.CreateGeometryFromWkt("POINT (11.5 48.1)")
+    wkb = geometry.ExportToWkb(ogr.wkbXDR)
+    ewkb = wkb_to_ewkb(wkb, srid=3857)
+
+    geom_type, srid = struct.unpack(">II", ewkb[1:9])
+    assert geom_type == ogr.wkbPoint | EWKB_SRID_FLAG
+    assert srid == 3857
+
+
+def test_split_table_name():
+    assert split_table_name("user_data.point_123") == ("user_data", "point_123")
+    assert split_table_name('user_data."point_123"') == ("user_data", "point_123")
+
+
+def test_date_fields_are_read_as_iso_text():
+    # Create an in-memory feature with a date field
+    field_defn = ogr.FieldDefn("date", ogr.OFTDate)
+    feature_defn = ogr.FeatureDefn()
+    feature_defn.AddFieldDefn(field_defn)
+    feature = ogr.Feature(feature_defn)
+    feature.SetField(0, 2024, 1, 31, 0, 0, 0, 0)
+
+    reader = get_field_reader(ogr.OFTDate, "text")
+    assert reader(feature, 0) == "2024-01-31"
+
+
+def write_geojson(tmp_path, feature_cnt: int) -> str:
+    features = ",".join(
+        f'{{"type": "Feature", "properties": {{"value": {i}}}, "geometry": {{"type": "Point", "coordinates": [11.5, 48.1]}}}}'
+        for i in range(feature_cnt)
+    )
+    file_path = tmp_path / "file.geojson"
+    file_path.write_text(f'{{"type": "FeatureCollection", "features": [{features}]}}')
+    return str(file_path)
+
+
+def write_geopackage(tmp_path, feature_cnt: int) -> str:
+    file_path = str(tmp_path / "file.gpkg")
+    data_source = ogr.GetDriverByName("GPKG").CreateDataSource(file_path)
+    layer = data_source.CreateLayer("file", geom_type=ogr.wkbPoint)
+    layer.CreateField(ogr.FieldDefn("value", ogr.OFTInteger))
+    for i in range(feature_cnt):
+        feature = ogr.Feature(layer.GetLayerDefn())
+        feature.SetField("value", i)
+        feature.SetGeometry(ogr.CreateGeometryFromWkt("POINT (11.5 48.1)"))
+        layer.CreateFeature(feature)
+    data_source = None
+    return file_path
+
+
+def test_plan_feature_chunks_skips_small_layers(tmp_path):
+    file_path = write_geopackage(tmp_path, 10)
+    assert plan_feature_chunks(file_path, "GPKG", 4, min_feature_cnt=100) == []
+
+
+def test_plan_feature_chunks_skips_layers_without_fid(tmp_path):
+    # Chunks of layers without a FID column would each read the whole file
+    file_path = write_geojson(tmp_path, 10)
+    assert plan_feature_chunks(file_path, "GeoJSON", 3) == []
+
+
+def test_feature_chunks_cover_all_features(tmp_path):
+    # Test that reading all chunks returns every feature exactly once
+    file_path = write_geopackage(tmp_path, 10)
+    chunks = plan_feature_chunks(file_path, "GPKG", 3)
+    assert len(chunks) == 3
+
+    values = []
+    for chunk in chunks:
+        reader = OgrFeatureBatchReader(
+            file_path=file_path,
+            driver_name="GPKG",
+            attribute_mapping={"integer_attr1": "value"},
+            layer_id="a5f6c8d2-0000-0000-0000-000000000000",
+            geometry_type="point",
+            batch_size=2,
+            feature_range=chunk,
+        ).open()
+        while records := reader.read_batch():
+            values.extend(record[0] for record in records)
+        reader.close()
+    assert sorted(values) == list(range(10))
+
+
+def test_convert_wkb_keeps_2d_geometries():
+    # Test that 2D geometries in EPSG:4326 only get the SRID added
+    wkb = ogr.CreateGeometryFromWkt("LINESTRING (11 48, 12 49)").ExportToWkb(
+        ogr.wkbNDR
+    )
+    assert convert_wkb(wkb, None, "line") == wkb_to_ewkb(wkb)
+
+
+def test_convert_wkb_forces_multipolygon():
+    wkb = ogr.CreateGeometryFromWkt(
+        "POLYGON Z ((11 48 1, 12 48 1, 12 49 1, 11 48 1))"
+    ).ExportToIsoWkb()
+    ewkb = convert_wkb(wkb, None, "polygon")
+
+    geom_type = struct.unpack("<I", ewkb[1:5])[0]
+    assert geom_type == ogr.wkbMultiPolygon | EWKB_SRID_FLAG
+
+
+def test_arrow_batch_reader_parquet(tmp_path):
+    geometries = [
+        ogr.CreateGeometryFromWkt(wkt).ExportToWkb(ogr.wkbNDR)
+        for wkt in ["POINT (11 48)", "POINT (12 49)", "POINT (13 50)"]
+    ]
+    table = pa.table(
+        {
+            "Value": [1, 2, None],
+            "name": ["a", "b", "c"],
+            "geometry": [geometries[0], None, geometries[2]],
+        }
+    )
+    geo = {
+        "version": "1.0.0",
+        "primary_column": "geometry",
+        "columns": {"geometry": {"encoding": "WKB", "geometry_types": ["Point"]}},
+    }
+    table = table.replace_schema_metadata({"geo": json.dumps(geo)})
+    file_path = str(tmp_path / "file.parquet")
+    pq.write_table(table, file_path)
+
+    reader = ArrowBatchReader(
+        file_path=file_path,
+        driver_name="Parquet",
+        attribute_mapping={"integer_attr1": "value", "text_attr1": "name"},
+        layer_id="a5f6c8d2-0000-0000-0000-000000000000",
+        geometry_type="point",
+        geometry_column="geometry",
+    ).open()
+    records = reader.read_batch()
+    reader.close()
+
+    # The row without a geometry is skipped
+    assert [record[:2] for record in records] == [(1, "a"), (None, "c")]
+    assert records[0][2] == wkb_to_ewkb(geometries[0])
+
+
+def get_trigger_h3_cells(lng: float, lat: float) -> tuple[int, int]:
+    """H3 cells as computed by the trigger basic.set_user_data_h3."""
+
+    cell_3 = int(h3.geo_to_h3(lat, lng, 3), 16)
+    return (cell_3 & 0x000FFFF000000000) >> 36, int(h3.geo_to_h3(lat, lng, 8), 16)
+
+
+def test_ewkb_to_wkb_removes_srid():
+    wkb = ogr.CreateGeometryFromWkt("POINT (11.5 48.1)").ExportToWkb(ogr.wkbXDR)
+    assert ewkb_to_wkb(wkb_to_ewkb(wkb)) == wkb
+
+
+def test_add_h3_cells():
+    points = [
+        ogr.CreateGeometryFromWkt(wkt).ExportToWkb(byte_order)
+        for wkt, byte_order in (
+            ("POINT (11.5 48.1)", ogr.wkbNDR),
+            ("POINT (-73.98 40.75)", ogr.wkbNDR),
+            ("POINT (139.7 35.7)", ogr.wkbXDR),
+        )
+    ]
+    polygon = ogr.CreateGeometryFromWkt(
+        "MULTIPOLYGON (((11 48, 12 48, 12 49, 11 49, 11 48)))"
+    ).ExportToWkb(ogr.wkbNDR)
+    records = [("a", wkb_to_ewkb(wkb)) for wkb in points + [polygon]] + [("b", None)]
+
+    records = add_h3_cells(records, geom_idx=1)
+    assert [record[2:] for record in records] == [
+        get_trigger_h3_cells(11.5, 48.1),
+        get_trigger_h3_cells(-73.98, 40.75),
+        get_trigger_h3_cells(139.7, 35.7),
+        get_trigger_h3_cells(11.5, 48.5),
+        (None, None),
+    ]
@@ -0,0 +1,68 @@
+import os
+import time
+
+from src.core.cache import MemoryCache, evict_lru, get_cache_stats, invalidate_layer
+
+
+def write_file(path, size: int, age: int):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    os.utime(path, (time.time() - age,) * 2)
+
+
+def test_evict_lru_by_age_and_size(tmp_path):
+    write_file(tmp_path / "old", 10, 300)
+    write_file(tmp_path / "used", 10, 100)
+    write_file(tmp_path / "new", 10, 0)
+    # Files that are still written are kept
+    write_file(tmp_path / "new.123.tmp", 100, 1000)
+
+    assert evict_lru(str(tmp_path), max_size=100, max_age=200) == 1
+    assert sorted(os.listdir(tmp_path)) == ["new", "new.123.tmp", "used"]
+
+    assert evict_lru(str(tmp_path), max_size=10) == 1
+    assert sorted(os.listdir(tmp_path)) == ["new", "new.123.tmp"]
+
+
+def test_cache_stats():
+    stats = get_cache_stats("test")
+    assert get_cache_stats("test") is stats
+    stats.record_miss()
+    stats.record_hit()
+    stats.record_hit()
+    assert stats.dict()["hits"] == 2
+    assert stats.dict()["hit_ratio"] == round(2 / 3, 4)
+
+
+def test_memory_cache_evicts_least_recently_used_and_expired():
+    cache = MemoryCache("test_memory", max_entries=2, max_age=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    cache.max_age = -1
+    assert cache.get("c") is None
+    assert cache.stats.evictions == 2
+
+    cache.max_age = None
+    cache.set(("layer", "a"), 1)
+    cache.set(("layer", "b"), 2)
+    assert cache.delete(lambda key: key[0] == "layer") == 2
+    assert cache.get(("layer", "a")) is None
+
+
+def test_invalidate_layer_deletes_results_of_all_caches():
+    breaks_cache = MemoryCache("test_breaks", max_entries=10)
+    values_cache = MemoryCache("test_values", max_entries=10)
+    breaks_cache.set(("1", "integer_attr1", "filter"), 1)
+    values_cache.set(("1", "text_attr1", "filter"), 2)
+    values_cache.set(("2", "text_attr1", "filter"), 3)
+    values_cache.set("1", 4)
+
+    assert invalidate_layer("1") == 2
+    assert breaks_cache.get(("1", "integer_attr1", "filter")) is None
+    assert values_cache.get(("2", "text_attr1", "filter")) == 3
+    assert values_cache.get("1") == 4
@@ -0,0 +1,182 @@
+import csv
+import io
+import json
+import os
+import time
+import zipfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.core.export import (
+    ExportCache,
+    encode_arrow,
+    encode_csv,
+    encode_geojson,
+    get_unique_file_names,
+    iterate_content,
+    stream_zip,
+)
+
+
+async def read_batches(batches):
+    for batch in batches:
+        yield batch
+
+
+async def read_stream(stream) -> bytes:
+    return b"".join([chunk async for chunk in stream])
+
+
+BATCHES = [
+    [("1", "a", [1, 2], '{"type":"Point","coordinates":[11,48]}')],
+    [
+        ("2", "b", None, '{"type":"Point","coordinates":[12,49]}'),
+        ("3", "c", None, None),
+    ],
+]
+
+
+@pytest.mark.asyncio
+async def test_encode_geojson():
+    content = await read_stream(
+        encode_geojson(read_batches(BATCHES), ["id", "name", "values"], "places", 4326)
+    )
+    collection = json.loads(content)
+    assert collection["name"] == "places"
+    assert "crs" not in collection
+    assert [feature["properties"]["name"] for feature in collection["features"]] == [
+        "a",
+        "b",
+        "c",
+    ]
+    assert collection["features"][0]["properties"]["values"] == "[1, 2]"
+    assert collection["features"][1]["geometry"]["coordinates"] == [12, 49]
+    assert collection["features"][2]["geometry"] is None
+
+
+@pytest.mark.asyncio
+async def test_encode_csv_writes_geometry_first():
+    batches = [[("1", "a", "POINT (11 48)")], [("2", "b", "POINT (12 49)")]]
+    content = await read_stream(encode_csv(read_batches(batches), ["id", "name"], True))
+    rows = list(csv.reader(io.StringIO(content.decode())))
+    assert rows == [
+        ["WKT", "id", "name"],
+        ["POINT (11 48)", "1", "a"],
+        ["POINT (12 49)", "2", "b"],
+    ]
+
+
+ARROW_COLUMNS = [("id", "text"), ("name", "text"), ("values", "arrint")]
+WKB_POINT = bytes.fromhex("010100000000000000000026400000000000004840")
+
+
+@pytest.mark.asyncio
+async def test_encode_arrow_geoparquet_row_groups():
+    batches = [
+        [("1", "a", [1, 2], WKB_POINT), ("2", "b", None, WKB_POINT)],
+        [("3", "c", [3], None)],
+    ]
+    content = await read_stream(
+        encode_arrow(
+            read_batches(batches), "parquet", ARROW_COLUMNS, 3857, row_group_size=2
+        )
+    )
+    parquet_file = pq.ParquetFile(io.BytesIO(content))
+    assert parquet_file.metadata.num_row_groups == 2
+    assert parquet_file.metadata.row_group(0).column(0).compression == "ZSTD"
+    geo = json.loads(parquet_file.schema_arrow.metadata[b"geo"])
+    assert geo["primary_column"] == "geometry"
+    assert geo["columns"]["geometry"]["encoding"] == "WKB"
+    assert geo["columns"]["geometry"]["crs"]["id"] == {"authority": "EPSG", "code": 3857}
+
+    table = parquet_file.read()
+    assert table.column_names == ["id", "name", "values", "geometry"]
+    assert table.column("values").to_pylist() == [[1, 2], None, [3]]
+    assert table.column("geometry").to_pylist() == [WKB_POINT, WKB_POINT, None]
+
+
+@pytest.mark.asyncio
+async def test_encode_arrow_ipc_table():
+    batches = [[("1", "a", {"key": "value"})]]
+    content = await read_stream(
+        encode_arrow(
+            read_batches(batches),
+            "arrow",
+            [("id", "text"), ("name", "text"), ("properties", "jsonb")],
+        )
+    )
+    table = pa.ipc.open_file(pa.BufferReader(content)).read_all()
+    assert table.schema.metadata is None
+    assert table.to_pylist() == [
+        {"id": "1", "name": "a", "properties": '{"key": "value"}'}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stream_zip_yields_chunks_of_archive():
+    async def content():
+        for i in range(100):
+            yield f"{i}: {'x' * 1000}\n".encode()
+
+    chunks = [
+        chunk
+        async for chunk in stream_zip(
+            [
+                ("export/export.csv", content()),
+                ("export/metadata.txt", iterate_content(b"Metadata")),
+            ],
+            chunk_size=1024,
+        )
+    ]
+    # The archive is sent in several chunks while it is written
+    assert len([chunk for chunk in chunks if chunk]) > 2
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as zip_file:
+        assert zip_file.namelist() == ["export/export.csv", "export/metadata.txt"]
+        assert zip_file.read("export/metadata.txt") == b"Metadata"
+        assert zip_file.read("export/export.csv").count(b"\n") == 100
+
+
+@pytest.mark.asyncio
+async def test_export_cache_adds_completed_streams(tmp_path):
+    cache = ExportCache(cache_dir=str(tmp_path), max_size=10**6)
+    key = ExportCache.get_key(layer_id="1", crs="EPSG:4326", file_type="geojson")
+    assert key == ExportCache.get_key(file_type="geojson", crs="EPSG:4326", layer_id="1")
+    assert cache.get(key) is None
+
+    # An interrupted stream is not cached
+    stream = cache.tee(key, iterate_content(b"archive"))
+    await stream.__anext__()
+    await stream.aclose()
+    assert cache.get(key) is None
+    assert os.listdir(tmp_path) == []
+
+    assert await read_stream(cache.tee(key, iterate_content(b"archive"))) == b"archive"
+    hit_cnt = cache.stats.hits
+    with open(cache.get(key), "rb") as f:
+        assert f.read() == b"archive"
+    assert cache.stats.hits == hit_cnt + 1
+
+
+def test_export_cache_evicts_least_recently_used(tmp_path):
+    source_path = str(tmp_path / "source.zip")
+    with open(source_path, "wb") as f:
+        f.write(b"x" * 10)
+    cache_dir = tmp_path / "cache"
+    cache = ExportCache(cache_dir=str(cache_dir), max_size=20)
+
+    for cnt, key in enumerate(["a", "b"]):
+        cache.put(key, source_path)
+        os.utime(cache.get_path(key), (time.time() - 100 + cnt * 10,) * 2)
+    cache.get("a")
+    cache.put("c", source_path)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_get_unique_file_names():
+    assert get_unique_file_names(
+        ["Bus stops", "bus stops", "Schools/Kindergartens", "..", "Bus stops"]
+    ) == ["Bus stops", "bus stops_2", "Schools_Kindergartens", "layer", "Bus stops_3"]
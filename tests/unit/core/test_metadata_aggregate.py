@@ -0,0 +1,36 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.crud.crud_layer import layer as crud_layer
+from src.schemas.layer import IMetadataAggregate
+
+
+@pytest.mark.asyncio
+async def test_get_metadata_aggregate_query():
+    params = IMetadataAggregate(
+        license=["ODC_ODbL"], data_category=["transportation"], search="bus"
+    )
+    sql_query = await crud_layer.get_metadata_aggregate_query(
+        user_id=uuid4(), params=params
+    )
+    compiled = str(sql_query.compile(dialect=postgresql.dialect()))
+    select_clause, where_clause = compiled.split("\nFROM ")
+
+    # All attributes are counted in one aggregation
+    assert "GROUP BY GROUPING SETS(" in where_clause
+    assert select_clause.count("grouping(") == 6
+
+    # The counts of an attribute are not filtered by its own values
+    license_count, data_category_count, *other_counts = select_clause.split(
+        "count("
+    )[1:]
+    assert "layer.license IN" not in license_count
+    assert "layer.data_category IN" in license_count
+    assert "layer.data_category IN" not in data_category_count
+    assert all(
+        "layer.license IN" in count and "layer.data_category IN" in count
+        for count in other_counts
+    )
+    assert "license IN" not in where_clause
@@ -0,0 +1,114 @@
+import json
+import os
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from osgeo import gdal
+from shapely.geometry import shape
+
+from src.core.mvt import MVTFetcher, MVTTileLimitError, get_tiles
+
+
+@pytest_asyncio.fixture
+async def tile_server(tmp_path):
+    """Serve vector tiles at zoom 1 of a polygon split across four tiles and a point."""
+
+    source_path = tmp_path / "places.geojson"
+    source_path.write_text(
+        json.dumps(
+            {
+                "type": "FeatureCollection",
+                "features": [
+                    {
+                        "type": "Feature",
+                        "id": 1,
+                        "properties": {"name": "square"},
+                        "geometry": {
+                            "type": "Polygon",
+                            "coordinates": [
+                                [[-10, -10], [10, -10], [10, 10], [-10, 10], [-10, -10]]
+                            ],
+                        },
+                    },
+                    {
+                        "type": "Feature",
+                        "id": 2,
+                        "properties": {"name": "point"},
+                        "geometry": {"type": "Point", "coordinates": [50, 50]},
+                    },
+                ],
+            }
+        )
+    )
+    tile_dir = tmp_path / "tiles"
+    gdal.VectorTranslate(
+        str(tile_dir),
+        str(source_path),
+        format="MVT",
+        datasetCreationOptions=["MINZOOM=1", "MAXZOOM=1", "COMPRESS=NO"],
+    )
+
+    async def handle(request: web.Request) -> web.Response:
+        tile_path = os.path.join(
+            tile_dir,
+            request.match_info["z"],
+            request.match_info["x"],
+            request.match_info["y"] + ".pbf",
+        )
+        if not os.path.exists(tile_path):
+            return web.Response(status=404)
+        with open(tile_path, "rb") as f:
+            return web.Response(body=f.read())
+
+    app = web.Application()
+    app.router.add_get("/tiles/{z}/{x}/{y}.pbf", handle)
+    async with TestServer(app) as server:
+        yield str(server.make_url("/tiles")) + "/{z}/{x}/{y}.pbf"
+
+
+def test_get_tiles():
+    assert len(get_tiles([-180, -85, 180, 85], 1)) == 4
+    assert get_tiles([11.5, 48.1, 11.55, 48.2], 10) == [(10, 544, 355)]
+
+
+@pytest.mark.asyncio
+async def test_mvt_fetcher_stitches_split_features(tile_server, tmp_path):
+    output_file = str(tmp_path / "file.geojson")
+    progress = []
+
+    async def on_progress(tile_cnt, total_tile_cnt):
+        progress.append((tile_cnt, total_tile_cnt))
+
+    feature_cnt = await MVTFetcher(
+        url=tile_server,
+        layer_name="places",
+        bbox=[-180, -85, 180, 85],
+        zoom=1,
+        on_progress=on_progress,
+    ).fetch(output_file)
+
+    assert feature_cnt == 2
+    assert progress[-1] == (4, 4)
+    with open(output_file) as f:
+        features = {
+            feature["properties"]["name"]: shape(feature["geometry"])
+            for feature in json.load(f)["features"]
+        }
+    # The four parts of the square are merged into one polygon
+    assert features["square"].geom_type == "Polygon"
+    assert features["square"].bounds == pytest.approx((-10, -10, 10, 10), abs=0.1)
+    assert features["point"].coords[0] == pytest.approx((50, 50), abs=0.1)
+
+
+@pytest.mark.asyncio
+async def test_mvt_fetcher_rejects_too_many_tiles(tile_server, tmp_path):
+    with pytest.raises(MVTTileLimitError):
+        await MVTFetcher(
+            url=tile_server,
+            layer_name="places",
+            bbox=[-180, -85, 180, 85],
+            zoom=1,
+            max_tile_cnt=2,
+        ).fetch(str(tmp_path / "file.geojson"))
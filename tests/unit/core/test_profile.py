@@ -0,0 +1,94 @@
+import pytest
+
+from osgeo import ogr
+
+from src.core.bulk_load import CsvBatchReader
+from src.core.profile import CSVProfiler, build_ogr_profile, infer_csv_value_type
+
+
+def write_csv(tmp_path, content: str) -> str:
+    file_path = tmp_path / "file.csv"
+    file_path.write_text(content)
+    return str(file_path)
+
+
+def test_infer_csv_value_type():
+    assert infer_csv_value_type("42") == "Integer"
+    assert infer_csv_value_type("-3000000000") == "Integer64"
+    assert infer_csv_value_type("1.5e3") == "Real"
+    assert infer_csv_value_type("1_000") == "String"
+    assert infer_csv_value_type("2024-01-31") == "String"
+
+
+def test_csv_profiler_infers_types(tmp_path):
+    file_path = write_csv(
+        tmp_path,
+        "id,big,value,name,empty\n1,3000000000,1.5,a,\n2,1,2,b,\n",
+    )
+    profile = CSVProfiler(file_path).profile()
+    assert profile.feature_cnt == 2
+    assert profile.geometry_column is None
+    assert {field.name: field.type for field in profile.fields} == {
+        "id": "Integer",
+        "big": "Integer64",
+        "value": "Real",
+        "name": "String",
+        "empty": "String",
+    }
+    fields = {field.name: field for field in profile.fields}
+    assert fields["empty"].null_ratio == 1
+    assert (fields["big"].min, fields["big"].max) == (1, 3000000000)
+    assert (fields["value"].min, fields["value"].max) == (1.5, 2.0)
+    assert fields["name"].min is None
+
+
+def test_csv_profiler_widens_types_after_sample(tmp_path):
+    # The value after the sample doesn't fit the inferred type
+    file_path = write_csv(tmp_path, "id,value\n1,1\n2,2\n3,2.5\n4,x\n")
+    profile = CSVProfiler(file_path, sample_size=2).profile()
+    assert [field.type for field in profile.fields] == ["Integer", "String"]
+
+
+def test_csv_profiler_rejects_ragged_rows(tmp_path):
+    file_path = write_csv(tmp_path, "id,value\n1,1\n2\n")
+    with pytest.raises(ValueError):
+        CSVProfiler(file_path).profile()
+
+
+def test_build_ogr_profile(tmp_path):
+    file_path = tmp_path / "file.geojson"
+    file_path.write_text(
+        """{"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"value": 3, "name": "a"}, "geometry": {"type": "Point", "coordinates": [11.0, 48.0]}},
+        {"type": "Feature", "properties": {"value": null, "name": "b"}, "geometry": {"type": "Point", "coordinates": [12.0, 49.0]}},
+        {"type": "Feature", "properties": {"value": -1, "name": "c"}, "geometry": {"type": "Point", "coordinates": [11.5, 48.5]}}
+        ]}"""
+    )
+    data_source = ogr.Open(str(file_path))
+    profile = build_ogr_profile(data_source, data_source.GetLayer(0))
+
+    assert profile.feature_cnt == 3
+    assert profile.geometry_type == "Point"
+    assert profile.srs == "EPSG:4326"
+    assert profile.extent.startswith("MULTIPOLYGON(((11")
+    fields = {field.name: field for field in profile.fields}
+    assert fields["value"].null_ratio == 1 / 3
+    assert (fields["value"].min, fields["value"].max) == (-1, 3)
+
+
+def test_csv_batch_reader(tmp_path):
+    file_path = write_csv(tmp_path, "ID,Some-Value,name\n1,1.5,a\n2,,b\n3,3,c\n")
+    reader = CsvBatchReader(
+        file_path=file_path,
+        attribute_mapping={"float_attr1": "some_value", "integer_attr1": "id"},
+        layer_id="a5f6c8d2-0000-0000-0000-000000000000",
+        batch_size=2,
+    ).open()
+    assert reader.columns == ["float_attr1", "integer_attr1", "layer_id"]
+    assert reader.read_batch() == [
+        (1.5, 1, "a5f6c8d2-0000-0000-0000-000000000000"),
+        (None, 2, "a5f6c8d2-0000-0000-0000-000000000000"),
+    ]
+    assert len(reader.read_batch()) == 1
+    assert reader.read_batch() == []
+    reader.close()
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from src.utils import (
+    compute_r5_surface,
+    decode_r5_grid,
+    encode_r5_grid,
+    get_r5_surfaces,
+)
+
+
+def get_grid(width: int, height: int, depth: int) -> dict:
+    rng = np.random.default_rng(0)
+    return {
+        "version": 0,
+        "zoom": 9,
+        "west": 100,
+        "north": 200,
+        "width": width,
+        "height": height,
+        "depth": depth,
+        "data": rng.integers(0, 120, size=width * height * depth),
+    }
+
+
+def test_decode_r5_grid():
+    grid = get_grid(4, 3, 5)
+    decoded = decode_r5_grid(encode_r5_grid(grid))
+    assert (decoded["width"], decoded["height"], decoded["depth"]) == (4, 3, 5)
+    assert np.array_equal(decoded["data"], grid["data"])
+    assert decoded["accessibility"] == {}
+
+    # The surfaces are views of the decoded data
+    surfaces = get_r5_surfaces(decoded)
+    assert surfaces.shape == (5, 12)
+    assert np.shares_memory(surfaces, decoded["data"])
+    assert np.array_equal(
+        compute_r5_surface(decoded, 50), grid["data"].reshape(5, 12)[2]
+    )
+
+
+def test_encode_r5_grid():
+    # The surfaces are delta encoded separately
+    grid = get_grid(2, 1, 2) | {"data": np.array([3, 5, 10, 7], dtype=np.uint16)}
+    encoded = encode_r5_grid(grid)
+    assert encoded[:8] == b"ACCESSGR"
+    assert np.frombuffer(encoded, offset=36, count=4, dtype=np.int32).tolist() == [
+        3,
+        2,
+        10,
+        -3,
+    ]
+    assert decode_r5_grid(bytearray(encoded))["data"].tolist() == [3, 5, 10, 7]
+
+    with pytest.raises(ValueError):
+        decode_r5_grid(b"INVALID!" + encoded[8:])
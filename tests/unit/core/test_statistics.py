@@ -0,0 +1,272 @@
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from src.core.statistics import (
+    get_class_breaks_from_statistics,
+    estimate_from_sample,
+    get_class_breaks_from_values,
+    get_jenks_breaks,
+    get_statistic_aggregation_from_statistics,
+    get_unique_values_from_statistics,
+    get_unique_values_page,
+    has_exact_statistics,
+)
+from src.db.models.layer_statistics import LayerColumnStatistics
+from src.schemas.layer import ComputeBreakOperation
+from src.schemas.statistics import (
+    IStatisticAggregationMetric,
+    IStatisticHistogramMetric,
+    IStatisticsBatch,
+    request_examples,
+)
+from src.schemas.toolbox_base import ColumnStatisticsOperation
+
+LAYER_ID = uuid4()
+
+
+def get_statistics(column_name: str, **kwargs) -> LayerColumnStatistics:
+    return LayerColumnStatistics(
+        layer_id=LAYER_ID, column_name=column_name, row_cnt=10, **kwargs
+    )
+
+
+# Values 0, 1, ..., 8 and one null with the quantiles of four intervals
+NUMBER_STATISTICS = get_statistics(
+    "integer_attr1",
+    null_cnt=1,
+    zero_cnt=1,
+    min=0,
+    max=8,
+    mean=4,
+    stddev=2,
+    quantiles=[0, 2, 4, 6, 8],
+)
+TEXT_STATISTICS = get_statistics(
+    "text_attr1",
+    null_cnt=2,
+    distinct_cnt=3,
+    top_values=[
+        {"value": "a", "count": 2},
+        {"value": "b", "count": 5},
+        {"value": "c", "count": 1},
+    ],
+)
+
+
+def test_get_unique_values_from_statistics():
+    assert get_unique_values_from_statistics(TEXT_STATISTICS, "descendent", 1, 2) == (
+        [{"value": "b", "count": 5}, {"value": "a", "count": 2}],
+        3,
+    )
+    assert get_unique_values_from_statistics(TEXT_STATISTICS, "ascendent", 2, 2) == (
+        [{"value": "b", "count": 5}],
+        3,
+    )
+
+    # Pages beyond the stored values of a column with more values are not known
+    statistics = get_statistics(
+        "text_attr1",
+        null_cnt=0,
+        distinct_cnt=10,
+        top_values=TEXT_STATISTICS.top_values,
+    )
+    assert get_unique_values_from_statistics(statistics, "descendent", 1, 3) is not None
+    assert get_unique_values_from_statistics(statistics, "descendent", 2, 3) is None
+    assert get_unique_values_from_statistics(statistics, "ascendent", 1, 3) is None
+
+
+def test_get_unique_values_page():
+    values = [{"value": value, "count": 10 - value} for value in range(6)]
+    assert get_unique_values_page(values, 6, 2, 2) == values[2:4]
+    assert get_unique_values_page(values, 6, 1, 2, 9, "1") == values[2:4]
+    assert get_unique_values_page(values, 6, 1, 10, 9, "1") == values[2:]
+
+    # Pages beyond the first values are queried
+    assert get_unique_values_page(values, 8, 3, 3) is None
+    assert get_unique_values_page(values, 8, 1, 3, 7, "3") is None
+    assert get_unique_values_page(values, 8, 1, 3, 1, "9") is None
+
+
+def test_get_class_breaks_from_statistics():
+    assert get_class_breaks_from_statistics(
+        NUMBER_STATISTICS, ComputeBreakOperation.quantile, 3, False
+    ) == {"mean": 4, "min": 0, "max": 8, "breaks": [2, 4, 6]}
+    assert get_class_breaks_from_statistics(
+        NUMBER_STATISTICS, ComputeBreakOperation.equal_interval, 3, False
+    )["breaks"] == [2, 4, 6]
+    assert get_class_breaks_from_statistics(
+        NUMBER_STATISTICS, ComputeBreakOperation.standard_deviation, None, False
+    )["breaks"] == [3, 5, 7, 9]
+
+    # The statistics include the zeros and can't compute heads and tails breaks
+    assert (
+        get_class_breaks_from_statistics(
+            NUMBER_STATISTICS, ComputeBreakOperation.quantile, 3, True
+        )
+        is None
+    )
+    assert (
+        get_class_breaks_from_statistics(
+            NUMBER_STATISTICS, ComputeBreakOperation.heads_and_tails, 3, False
+        )
+        is None
+    )
+
+
+def test_has_exact_statistics():
+    assert has_exact_statistics(NUMBER_STATISTICS)
+    assert has_exact_statistics(get_statistics("bigint_attr1", min=-(2**53 - 1), max=1))
+
+    # Bigints beyond 2^53 are rounded by the stored floats and queried instead
+    large_statistics = get_statistics(
+        "bigint_attr1", null_cnt=0, min=0, max=2**53, quantiles=[0, 2**52, 2**53]
+    )
+    assert not has_exact_statistics(large_statistics)
+    assert (
+        get_class_breaks_from_statistics(
+            large_statistics, ComputeBreakOperation.quantile, 1, False
+        )
+        is None
+    )
+    assert (
+        get_statistic_aggregation_from_statistics(
+            [large_statistics],
+            "bigint_attr1",
+            None,
+            ColumnStatisticsOperation.max,
+            5,
+            "descendent",
+        )
+        is None
+    )
+
+
+def test_get_statistic_aggregation_from_statistics():
+    layer_statistics = [NUMBER_STATISTICS, TEXT_STATISTICS]
+    assert get_statistic_aggregation_from_statistics(
+        layer_statistics, "integer_attr1", None, ColumnStatisticsOperation.max, 5, "descendent"
+    ) == {
+        "items": [{"operation_value": 8, "grouped_value": None}],
+        "total_items": 1,
+        "total_count": 9,
+    }
+    assert get_statistic_aggregation_from_statistics(
+        layer_statistics, None, "text_attr1", ColumnStatisticsOperation.count, 3, "descendent"
+    ) == {
+        "items": [
+            {"operation_value": 5, "grouped_value": "b"},
+            {"operation_value": 2, "grouped_value": "a"},
+            {"operation_value": 2, "grouped_value": None},
+        ],
+        "total_items": 4,
+        "total_count": 10,
+    }
+
+    # Sums and aggregations of grouped columns are queried
+    assert (
+        get_statistic_aggregation_from_statistics(
+            layer_statistics, "integer_attr1", None, ColumnStatisticsOperation.sum, 5, "descendent"
+        )
+        is None
+    )
+    assert (
+        get_statistic_aggregation_from_statistics(
+            layer_statistics,
+            "integer_attr1",
+            "text_attr1",
+            ColumnStatisticsOperation.max,
+            5,
+            "descendent",
+        )
+        is None
+    )
+
+
+def test_get_class_breaks_from_values():
+    class_breaks = get_class_breaks_from_values(
+        np.array([5, 1, 2, 3, 4, 6, 7, 8], dtype=float), 3, 1000
+    )
+    assert class_breaks[ComputeBreakOperation.quantile] == {
+        "mean": 4.5,
+        "min": 1,
+        "max": 8,
+        "breaks": [2, 4, 6],
+    }
+    assert class_breaks[ComputeBreakOperation.equal_interval]["breaks"] == [
+        2.75,
+        4.5,
+        6.25,
+    ]
+    assert class_breaks[ComputeBreakOperation.heads_and_tails]["breaks"] == [
+        4.5,
+        6.5,
+        7.5,
+    ]
+    assert len(class_breaks[ComputeBreakOperation.standard_deviation]["breaks"]) == 4
+
+    # Heads and tails breaks are filled with the maximum once no values are left
+    class_breaks = get_class_breaks_from_values(np.array([1.0, 1.0, 4.0]), 4, 1000)
+    assert class_breaks[ComputeBreakOperation.heads_and_tails]["breaks"] == [
+        2,
+        4,
+        4,
+        4,
+    ]
+    assert get_class_breaks_from_values(np.array([]), 3, 1000)[
+        ComputeBreakOperation.quantile
+    ] == {"mean": None, "min": None, "max": None, "breaks": []}
+
+
+def test_get_jenks_breaks():
+    values = np.array([1, 2, 3, 10, 11, 12, 20, 21, 22], dtype=float)
+    assert get_jenks_breaks(values, 1) == [12]
+    assert get_jenks_breaks(values, 2) == [3, 12]
+    assert get_jenks_breaks(values[:2], 5) == [1]
+
+    # The breaks of a sample are the upper bounds of the clusters of all values
+    rng = np.random.default_rng(0)
+    values = np.sort(
+        np.concatenate([rng.normal(center, 1, 2000) for center in (0, 20, 40)])
+    )
+    class_breaks = get_class_breaks_from_values(values, 2, 300)
+    breaks = class_breaks[ComputeBreakOperation.natural_breaks]["breaks"]
+    assert 1 < breaks[0] < 5 and 21 < breaks[1] < 25
+
+
+def test_estimate_from_sample():
+    # A tenth of 1000 features with an area of 2
+    estimate = estimate_from_sample("sum", 100, 200.0, 400.0, 2.0, 2.0, 0.1)
+    assert estimate["value"] == 2000
+    lower, upper = estimate["confidence_interval"]
+    assert 200 <= lower < 2000 < upper
+    assert upper - 2000 == 2000 - lower
+
+    assert estimate_from_sample("min", 100, 200.0, 400.0, 1.0, 3.0, 0.1) == {
+        "value": 1.0,
+        "confidence_interval": [None, 1.0],
+    }
+    assert estimate_from_sample("max", 0, None, None, None, None, 0.1)["value"] is None
+
+    # The sample holds all values
+    estimate = estimate_from_sample("sum", 3, 6.0, 14.0, 1.0, 3.0, 1.0)
+    assert estimate == {"value": 6.0, "confidence_interval": [6.0, 6.0]}
+
+
+def test_statistics_batch():
+    statistics_batch = IStatisticsBatch(**request_examples["batch"]["dashboard"]["value"])
+    assert isinstance(statistics_batch.metrics[0], IStatisticAggregationMetric)
+    assert isinstance(statistics_batch.metrics[1], IStatisticHistogramMetric)
+    assert statistics_batch.metrics[1].order == "ascendent"
+
+    # A column is required for all aggregations except counts
+    with pytest.raises(ValidationError):
+        IStatisticsBatch(
+            metrics=[
+                {"type": "aggregation", "operation": "sum", "group_by_column_name": "a"}
+            ]
+        )
+    with pytest.raises(ValidationError):
+        IStatisticsBatch(metrics=[])
@@ -0,0 +1,186 @@
+import hashlib
+import os
+import time
+import zipfile
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from src.core.config import settings
+from src.core.upload import (
+    FILE_HASHERS,
+    ChunkedUpload,
+    UploadCache,
+    extract_archive_dataset,
+    is_shapefile_archive,
+    list_archive_datasets,
+    parse_content_range,
+    validate_first_chunk,
+)
+
+
+async def stream(data: bytes, size: int = 4):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+async def send_chunk(
+    upload: ChunkedUpload, data: bytes, start: int, total: int
+) -> dict:
+    return await upload.write_chunk(
+        content_range=f"bytes {start}-{start + len(data) - 1}/{total}",
+        checksum=hashlib.sha256(data).hexdigest(),
+        chunks=stream(data),
+        content_length=len(data),
+    )
+
+
+def test_parse_content_range():
+    assert parse_content_range("bytes 0-99/1000") == (0, 99, 1000)
+    with pytest.raises(HTTPException):
+        parse_content_range("bytes 100-99/1000")
+    with pytest.raises(HTTPException):
+        parse_content_range("0-99")
+
+
+def test_validate_first_chunk():
+    assert validate_first_chunk("gpkg", b"SQLite format 3\x00...") is None
+    assert validate_first_chunk("gpkg", b"PK\x03\x04") is not None
+    assert validate_first_chunk("csv", b"id,name\n1,a\n") is None
+    assert validate_first_chunk("csv", b"id,,name\n1,a,b\n") is not None
+
+
+async def test_chunked_upload_resumes_at_offset(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+    content = b"id,name\n1,a\n2,b\n3,c\n"
+    upload = ChunkedUpload(user_id=uuid4(), upload_id=uuid4())
+    upload.create(file_name="file.csv", file_size=len(content))
+
+    state = await send_chunk(upload, content[:10], 0, len(content))
+    assert state["offset"] == 10
+
+    # A chunk that doesn't continue at the offset is rejected
+    with pytest.raises(HTTPException) as e:
+        await send_chunk(upload, content[12:], 12, len(content))
+    assert e.value.status_code == 409
+    with pytest.raises(HTTPException) as e:
+        upload.finalize()
+    assert e.value.status_code == 409
+
+    await send_chunk(upload, content[10:], 10, len(content))
+    # The file is hashed while the chunks are received
+    assert FILE_HASHERS[str(upload.upload_id)][0] == len(content)
+    state = upload.finalize()
+    assert str(upload.upload_id) not in FILE_HASHERS
+    with open(upload.get_file_path(state), "rb") as f:
+        assert f.read() == content
+    assert state["content_hash"] == hashlib.sha256(content).hexdigest()
+
+
+async def test_chunked_upload_rejects_wrong_checksum(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+    upload = ChunkedUpload(user_id=uuid4(), upload_id=uuid4())
+    state = upload.create(file_name="file.csv", file_size=8)
+    await send_chunk(upload, b"abcd", 0, 8)
+    with pytest.raises(HTTPException) as e:
+        await upload.write_chunk(
+            "bytes 4-7/8", hashlib.sha256(b"efgh").hexdigest(), stream(b"efgi")
+        )
+    assert e.value.status_code == 400
+    assert upload.read_state()["offset"] == 4
+    # The file is truncated back to the offset
+    assert os.path.getsize(upload.get_file_path(state)) == 4
+
+    # Chunks larger than the Content-Range are rejected before they are read
+    with pytest.raises(HTTPException) as e:
+        await upload.write_chunk(
+            "bytes 4-7/8", hashlib.sha256(b"efgh").hexdigest(), stream(b""), 5
+        )
+    assert e.value.status_code == 400
+    monkeypatch.setattr(settings, "UPLOAD_MAX_CHUNK_SIZE", 2)
+    with pytest.raises(HTTPException) as e:
+        await upload.write_chunk(
+            "bytes 4-7/8", hashlib.sha256(b"efgh").hexdigest(), stream(b"")
+        )
+    assert e.value.status_code == 413
+
+
+def test_upload_cache_keys_validation_on_content(tmp_path):
+    cache = UploadCache(cache_dir=str(tmp_path))
+    cache.put_validation("abc", "csv", {"data_types": {}})
+    assert cache.get_validation("abc", "csv") == {"data_types": {}}
+    assert cache.get_validation("abc", "xlsx") is None
+
+    user_id = uuid4()
+    cache.put_loaded_layer(user_id, "abc", {"layer_id": "1"})
+    assert cache.get_loaded_layer(user_id, "abc") == {"layer_id": "1"}
+    assert cache.get_loaded_layer(uuid4(), "abc") is None
+
+
+def test_upload_cache_evicts_by_age_and_size(tmp_path):
+    cache = UploadCache(cache_dir=str(tmp_path))
+    for cnt, content_hash in enumerate(["old", "used", "new"]):
+        cache.put_validation(content_hash, "csv", {"data": "x" * 100})
+        # Spread the last use of the entries
+        path = cache.get_validation_path(content_hash, "csv")
+        os.utime(path, (time.time() - 300 + cnt * 100,) * 2)
+    cache.get_validation("used", "csv")
+
+    cache.evict(max_age=250, max_size=10**6)
+    assert cache.get_validation("old", "csv") is None
+    assert cache.get_validation("new", "csv") is not None
+
+    # The least recently used entry is evicted first
+    os.utime(cache.get_validation_path("new", "csv"), (time.time() - 10,) * 2)
+    entry_size = os.path.getsize(cache.get_validation_path("new", "csv"))
+    cache.evict(max_age=10**6, max_size=entry_size)
+    assert cache.get_validation("new", "csv") is None
+    assert cache.get_validation("used", "csv") is not None
+
+
+def test_list_archive_datasets(tmp_path):
+    zip_path = str(tmp_path / "datasets.zip")
+    with zipfile.ZipFile(zip_path, "w") as zip_ref:
+        for file_name in [
+            "roads/roads.shp",
+            "roads/roads.shx",
+            "roads/roads.dbf",
+            "roads/roads.prj",
+            "schools.geojson",
+            "population.csv",
+            "readme.txt",
+            "__MACOSX/._schools.geojson",
+        ]:
+            zip_ref.writestr(file_name, "x")
+
+    datasets = list_archive_datasets(zip_path)
+    assert datasets == {
+        "schools.geojson": ["schools.geojson"],
+        "population.csv": ["population.csv"],
+        "roads/roads.shp": [
+            "roads/roads.dbf",
+            "roads/roads.prj",
+            "roads/roads.shp",
+            "roads/roads.shx",
+        ],
+    }
+    assert not is_shapefile_archive(datasets)
+    assert is_shapefile_archive({"roads/roads.shp": datasets["roads/roads.shp"]})
+
+    # Shapefiles are packed into a ZIP of their own
+    file_path = extract_archive_dataset(
+        zip_path, datasets["roads/roads.shp"], str(tmp_path / "roads")
+    )
+    assert file_path.endswith("file.zip")
+    with zipfile.ZipFile(file_path) as zip_ref:
+        assert sorted(zip_ref.namelist()) == [
+            "roads.dbf",
+            "roads.prj",
+            "roads.shp",
+            "roads.shx",
+        ]
+    file_path = extract_archive_dataset(
+        zip_path, datasets["population.csv"], str(tmp_path / "population")
+    )
+    assert file_path.endswith("file.csv")
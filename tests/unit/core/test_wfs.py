@@ -0,0 +1,108 @@
+import json
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.core.wfs import WFSFeatureLimitError, WFSFetcher, WFSFormatError
+
+FEATURES = [
+    {
+        "type": "Feature",
+        "properties": {"id": i},
+        "geometry": {"type": "Point", "coordinates": [11.0, 48.0 + i / 100]},
+    }
+    for i in range(23)
+]
+
+
+def create_wfs_app(
+    report_hits: bool = True,
+    output_format: str = "json",
+    max_features: int | None = None,
+) -> web.Application:
+    """Stand-in for a WFS that pages the features with startIndex and count."""
+
+    app = web.Application()
+    app["requests"] = []
+
+    async def handle(request: web.Request) -> web.Response:
+        app["requests"].append(dict(request.query))
+        if request.query.get("resultType") == "hits":
+            if not report_hits:
+                return web.Response(
+                    text='<wfs:FeatureCollection numberMatched="unknown"/>'
+                )
+            return web.Response(
+                text=f'<wfs:FeatureCollection numberMatched="{len(FEATURES)}"/>'
+            )
+        if output_format != "json":
+            return web.Response(text="<wfs:FeatureCollection/>")
+
+        start_index = int(request.query["startIndex"])
+        count = min(int(request.query["count"]), max_features or len(FEATURES))
+        return web.json_response(
+            {
+                "type": "FeatureCollection",
+                "features": FEATURES[start_index : start_index + count],
+            }
+        )
+
+    app.router.add_get("/wfs", handle)
+    return app
+
+
+async def fetch(app: web.Application, output_file: str, **kwargs) -> int:
+    async with TestServer(app) as server:
+        return await WFSFetcher(
+            url=str(server.make_url("/wfs")),
+            layer_name="test:points",
+            **{"max_feature_cnt": 100, "page_size": 5, "concurrency": 3, **kwargs},
+        ).fetch(output_file)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("report_hits", [True, False])
+async def test_wfs_fetcher_writes_pages_in_order(tmp_path, report_hits):
+    output_file = str(tmp_path / "file.geojson")
+    feature_cnt = await fetch(create_wfs_app(report_hits=report_hits), output_file)
+
+    assert feature_cnt == len(FEATURES)
+    with open(output_file) as f:
+        assert json.load(f)["features"] == FEATURES
+
+
+@pytest.mark.asyncio
+async def test_wfs_fetcher_continues_after_capped_pages(tmp_path):
+    # The service returns at most 4 of the 5 requested features per page
+    output_file = str(tmp_path / "file.geojson")
+    feature_cnt = await fetch(create_wfs_app(max_features=4), output_file)
+
+    assert feature_cnt == len(FEATURES)
+    with open(output_file) as f:
+        assert json.load(f)["features"] == FEATURES
+
+
+@pytest.mark.asyncio
+async def test_wfs_fetcher_rejects_large_layer_before_paging(tmp_path):
+    app = create_wfs_app()
+    with pytest.raises(WFSFeatureLimitError):
+        await fetch(app, str(tmp_path / "file.geojson"), max_feature_cnt=10)
+    assert len(app["requests"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_wfs_fetcher_stops_at_feature_limit(tmp_path):
+    app = create_wfs_app(report_hits=False)
+    with pytest.raises(WFSFeatureLimitError):
+        await fetch(
+            app, str(tmp_path / "file.geojson"), max_feature_cnt=10, concurrency=1
+        )
+    # The hits request and the three pages up to the limit
+    assert len(app["requests"]) == 4
+
+
+@pytest.mark.asyncio
+async def test_wfs_fetcher_requires_geojson(tmp_path):
+    with pytest.raises(WFSFormatError):
+        await fetch(create_wfs_app(output_format="gml"), str(tmp_path / "file.geojson"))